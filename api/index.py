@@ -11,7 +11,9 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import engine, Base, SessionLocal, Student, Progress
-from routers import students, progress, summaries, reports, whatsapp
+from routers import students, progress, summaries, reports, coverage, whatsapp
+from report_jobs import start_report_workers
+from whatsapp_outbox import start_outbox_worker
 from datetime import date, timedelta
 
 # Load environment variables
@@ -90,8 +92,19 @@ app.include_router(students.router, prefix="/api/students", tags=["students"])
 app.include_router(progress.router, prefix="/api/progress", tags=["progress"])
 app.include_router(summaries.router, prefix="/api/summaries", tags=["summaries"])
 app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+app.include_router(coverage.router, prefix="/api/coverage", tags=["coverage"])
 app.include_router(whatsapp.router, prefix="/api/whatsapp", tags=["whatsapp"])
 
+@app.on_event("startup")
+def resume_report_jobs():
+    # Pick up report jobs left queued by a previous run
+    start_report_workers()
+
+@app.on_event("startup")
+def resume_whatsapp_outbox():
+    # Send the WhatsApp messages left queued by a previous run
+    start_outbox_worker()
+
 @app.get("/")
 async def root():
     return {"message": "Quran Memorization Tracker API"}
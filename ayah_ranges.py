@@ -0,0 +1,139 @@
+"""
+Parse free-text memorization entries into (surah, start_ayah, end_ayah) ranges.
+
+Understands the formats written by the frontend's SurahAyahSelector, plus the
+looser forms teachers type by hand:
+
+    "Al-Baqarah Ayah 1-10"
+    "Al-Baqarah Ayah 1 - Al-Imran Ayah 10"
+    "Surah Al-Ikhlas"
+    "Al-Mulk Ayah 1-5, Ayah 10"
+
+Overlapping ranges are merged before counting, so "Ayah 1-10, Ayah 5-15"
+counts 15 ayahs rather than 21.
+"""
+
+import re
+from typing import List, NamedTuple, Optional
+
+from quran_metadata import SURAH_AYAH_COUNTS, find_surah_number, page_of
+
+# Progress fields that hold memorization text, used as the range category
+PROGRESS_RANGE_FIELDS = ("new_memorization", "recent_revision", "old_revision")
+
+class AyahRange(NamedTuple):
+    surah: Optional[int]  # None when the surah could not be determined
+    start_ayah: int
+    end_ayah: int
+
+_PARENTHETICAL = re.compile(r"\([^)]*\)")
+_CLAUSE_SEPARATOR = re.compile(r"[,;&\n]+|\s+and\s+", re.IGNORECASE)
+_AYAH_WORD = r"(?:ayahs?|ayat|verses?)"
+_CROSS_SURAH = re.compile(
+    rf"^(?P<start_name>.+?)\s+{_AYAH_WORD}\s+(?P<start>\d+)\s*-\s*(?P<end_name>\D.*?)\s+{_AYAH_WORD}\s+(?P<end>\d+)$",
+    re.IGNORECASE
+)
+_AYAH_REFERENCE = re.compile(
+    rf"^(?:(?P<name>.*?[^\s-])\s+)?{_AYAH_WORD}\s+(?P<start>\d+)(?:\s*-\s*(?:{_AYAH_WORD}\s+)?(?P<end>\d+))?$",
+    re.IGNORECASE
+)
+_NUMBER_RANGE = re.compile(r"^(?:(?P<name>.*?\D)\s+)?(?P<start>\d+)\s*-\s*(?P<end>\d+)$")
+
+def _make_range(surah: Optional[int], start: int, end: int) -> Optional[AyahRange]:
+    """Validate a range, clamping it to the surah's length when the surah is known"""
+    if start > end:
+        # Ranges written backwards ("Ayah 20-10") still cover the same ayahs
+        start, end = end, start
+    if surah is not None:
+        end = min(end, SURAH_AYAH_COUNTS[surah])
+    if start < 1 or start > end:
+        # Also rejects ranges starting past the end of the surah
+        return None
+    return AyahRange(surah, start, end)
+
+def parse_ayah_ranges(text: str) -> List[AyahRange]:
+    """Parse memorization text into a list of ayah ranges"""
+    if not text:
+        return []
+
+    ranges = []
+    current_surah = None  # Carried over to clauses like ", Ayah 10"
+
+    # Notes in parentheses, e.g. "(focus on tajweed)", are not references
+    for clause in _CLAUSE_SEPARATOR.split(_PARENTHETICAL.sub(" ", text)):
+        clause = clause.strip(" .")
+        if not clause:
+            continue
+
+        match = _CROSS_SURAH.match(clause)
+        if match:
+            start_surah = find_surah_number(match.group("start_name"))
+            end_surah = find_surah_number(match.group("end_name"))
+            if start_surah and end_surah and start_surah != end_surah:
+                start, end = int(match.group("start")), int(match.group("end"))
+                step = 1 if start_surah < end_surah else -1
+                candidates = [_make_range(start_surah, start, SURAH_AYAH_COUNTS[start_surah])]
+                candidates += [
+                    _make_range(surah, 1, SURAH_AYAH_COUNTS[surah])
+                    for surah in range(start_surah + step, end_surah, step)
+                ]
+                candidates.append(_make_range(end_surah, 1, end))
+                ranges.extend(r for r in candidates if r)
+                current_surah = end_surah
+                continue
+
+        match = _AYAH_REFERENCE.match(clause) or _NUMBER_RANGE.match(clause)
+        if match:
+            if match.group("name"):
+                current_surah = find_surah_number(match.group("name"))
+            start = int(match.group("start"))
+            end = int(match.group("end")) if match.group("end") else start
+            ayah_range = _make_range(current_surah, start, end)
+            if ayah_range:
+                ranges.append(ayah_range)
+            continue
+
+        # A bare surah name means the whole surah (a bare number is not a surah)
+        surah = None if clause.isdigit() else find_surah_number(clause)
+        if surah:
+            ranges.append(AyahRange(surah, 1, SURAH_AYAH_COUNTS[surah]))
+            current_surah = surah
+
+    return ranges
+
+def merge_ayah_ranges(ranges: List[AyahRange]) -> List[AyahRange]:
+    """Merge overlapping and adjacent ranges within each surah.
+
+    Ranges are sorted once and swept in order, so merging k ranges is O(k log k).
+    Ranges without a known surah are only merged with each other.
+    """
+    merged = []
+    for ayah_range in sorted(ranges, key=lambda r: (r.surah or 0, r.start_ayah)):
+        if merged and merged[-1].surah == ayah_range.surah and ayah_range.start_ayah <= merged[-1].end_ayah + 1:
+            if ayah_range.end_ayah > merged[-1].end_ayah:
+                merged[-1] = merged[-1]._replace(end_ayah=ayah_range.end_ayah)
+        else:
+            merged.append(ayah_range)
+    return merged
+
+def count_ayah_ranges(ranges: List[AyahRange]) -> int:
+    """Count the distinct ayahs covered by a list of ranges"""
+    return sum(r.end_ayah - r.start_ayah + 1 for r in merge_ayah_ranges(ranges))
+
+def count_pages(ranges: List[AyahRange]) -> int:
+    """Count the distinct mushaf pages a list of ranges touches.
+
+    Each range maps to a contiguous span of pages through two array lookups;
+    ranges without a known surah cannot be placed on a page and are skipped.
+    """
+    page_spans = sorted(
+        (page_of(r.surah, r.start_ayah), page_of(r.surah, r.end_ayah))
+        for r in ranges if r.surah is not None
+    )
+    pages = 0
+    last_counted = 0
+    for first_page, last_page in page_spans:
+        if last_page > last_counted:
+            pages += last_page - max(first_page, last_counted + 1) + 1
+            last_counted = last_page
+    return pages
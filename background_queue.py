@@ -0,0 +1,186 @@
+"""
+Work queues kept in a database table and drained by background threads.
+
+Requests add rows to the table and wake the workers. A worker claims due rows
+with a conditional UPDATE that only one claimant can win, and the claim is a
+lease: run_after is moved to when the lease runs out. A lease that runs out
+means the worker stopped (or hung) mid-way; depending on the queue, the row
+is either claimed again while it has attempts left, or failed because
+repeating the work is not safe. Failed attempts are retried with exponential
+backoff up to max_attempts, and finished rows are purged after their TTL.
+
+Because the queue is the table, queued work survives a restart and several
+server processes can share it; idle workers poll for rows queued by other
+processes every poll_seconds. The table needs the columns id, status,
+attempts, error, created_at, run_after and finished_at.
+
+On Vercel an invocation is frozen once it has answered, so no worker threads
+are started there (RUN_IN_REQUEST); the routes that queue or look up work
+hand run_pending to the request's background tasks instead, which run before
+the invocation ends.
+"""
+
+import os
+import threading
+import time
+from typing import Callable, Optional
+
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+
+RUN_IN_REQUEST = bool(os.getenv("VERCEL"))
+
+class DatabaseQueue:
+    """A queue over `model`'s table; `process(db)` claims and runs work, returning whether it found any"""
+
+    def __init__(
+        self,
+        name: str,
+        model,
+        process: Callable[[Session], bool],
+        workers: int,
+        lease_seconds: float,
+        max_attempts: int,
+        ttl_seconds: float,
+        poll_seconds: float,
+        retry_backoff_seconds: float = 30,
+        max_retry_delay_seconds: Optional[float] = None,
+        retry_expired_leases: bool = True,
+        expired_error: str = "The worker stopped before finishing",
+        queued: str = "queued",
+        running: str = "running",
+        done: str = "done",
+        failed: str = "failed"
+    ):
+        self.name = name
+        self.model = model
+        self.process = process
+        self.workers = workers
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.ttl_seconds = ttl_seconds
+        self.poll_seconds = poll_seconds
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.max_retry_delay_seconds = max_retry_delay_seconds
+        self.retry_expired_leases = retry_expired_leases
+        self.expired_error = expired_error
+        self.queued, self.running, self.done, self.failed = queued, running, done, failed
+        self._threads = []
+        self._threads_lock = threading.Lock()
+        self._wakeup = threading.Condition()
+        self._enqueued = 0
+        self._last_purge = 0.0
+
+    def notify(self):
+        """Wake a worker for work just queued, starting the workers if needed"""
+        if RUN_IN_REQUEST:
+            return
+        self.start()
+        with self._wakeup:
+            self._enqueued += 1
+            self._wakeup.notify()
+
+    def start(self):
+        """Start the worker threads if they are not running yet; queued work resumes from the table"""
+        if RUN_IN_REQUEST:
+            return
+        with self._threads_lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name=f"{self.name}-{len(self._threads) + 1}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def expire_leases(self, db: Session):
+        """Fail the rows whose lease ran out and may not be claimed again"""
+        model = self.model
+        now = time.time()
+        expired = (model.status == self.running) & (model.run_after <= now)
+        if self.retry_expired_leases:
+            # The others are claimed again by claim()
+            expired &= model.attempts >= self.max_attempts
+        db.query(model).filter(expired).update({
+            model.status: self.failed,
+            model.error: self.expired_error,
+            model.finished_at: now
+        }, synchronize_session=False)
+        db.commit()
+
+    def claim(self, db: Session, count: int) -> list:
+        """Lease up to `count` of the oldest due rows to this worker"""
+        model = self.model
+        now = time.time()
+        due = model.status == self.queued
+        if self.retry_expired_leases:
+            due |= model.status == self.running
+        due &= model.run_after <= now
+        candidates = db.query(model.id).filter(due).order_by(model.created_at, model.id).limit(count + self.workers).all()
+        claimed_ids = []
+        for row_id, in candidates:
+            # A row another worker claimed first no longer matches `due`: its run_after moved past `now`
+            if db.query(model).filter(model.id == row_id, due).update({
+                model.status: self.running,
+                model.run_after: now + self.lease_seconds,
+                model.attempts: model.attempts + 1
+            }, synchronize_session=False):
+                claimed_ids.append(row_id)
+                if len(claimed_ids) == count:
+                    break
+        db.commit()
+        if not claimed_ids:
+            return []
+        return db.query(model).filter(model.id.in_(claimed_ids)).order_by(model.created_at, model.id).all()
+
+    def retry_later(self, row, error: Optional[str], retry_after: float = 0) -> bool:
+        """Queue a failed attempt again with backoff, or fail the row once its attempts are used up"""
+        now = time.time()
+        if row.attempts < self.max_attempts:
+            delay = self.retry_backoff_seconds * 2 ** (row.attempts - 1)
+            if self.max_retry_delay_seconds is not None:
+                delay = min(delay, self.max_retry_delay_seconds)
+            row.status, row.error, row.run_after = self.queued, error, now + max(delay, retry_after)
+            return True
+        row.status, row.error, row.finished_at = self.failed, error, now
+        return False
+
+    def purge_finished(self, db: Session):
+        """Drop finished rows past their TTL, at most once a minute per process"""
+        model = self.model
+        now = time.time()
+        if now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        db.query(model).filter(
+            model.status.in_([self.done, self.failed]),
+            model.finished_at < now - self.ttl_seconds
+        ).delete(synchronize_session=False)
+        db.commit()
+
+    def run_pending(self):
+        """Process the work that is due in the calling thread, until none is left"""
+        db = SessionLocal()
+        try:
+            self.expire_leases(db)
+            while self.process(db):
+                pass
+            self.purge_finished(db)
+        except Exception as e:
+            print(f"{self.name} error: {e}")
+        finally:
+            db.close()
+
+    def _work(self):
+        while True:
+            seen = self._enqueued
+            db = SessionLocal()
+            try:
+                self.expire_leases(db)
+                if self.process(db):
+                    continue
+                self.purge_finished(db)
+            except Exception as e:
+                print(f"{self.name} worker error: {e}")
+            finally:
+                db.close()
+            with self._wakeup:
+                self._wakeup.wait_for(lambda: self._enqueued != seen, timeout=self.poll_seconds)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Measure how class-wide report rendering scales with worker processes.
+
+A class of synthetic students is rendered into a streamed ZIP archive, as the
+bulk report endpoints do, once for every worker count from 1 up to --workers.
+The report cache is disabled so every report is drawn. Scaling efficiency is
+the speedup over one worker divided by the number of workers; it can only
+approach 100% up to the number of physical cores of the machine.
+
+Usage (from the repository root):
+
+    python benchmarks/bulk_report_scaling.py --students 200 --kind weekly
+    python benchmarks/bulk_report_scaling.py --students 200 --kind monthly --workers 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ["REPORT_CACHE_DIR"] = ""
+
+from bulk_reports import render_report, stream_reports_zip
+from models import Progress, WeeklySummary, MonthlySummary
+from report_data import ReportData
+
+FIRST_WEEK = date(2024, 1, 1)
+
+def weekly_summary(student: int, week: int) -> WeeklySummary:
+    """A synthetic weekly summary with a previous week and an AI-length summary text"""
+    def progress(week_number: int) -> Progress:
+        return Progress(
+            id=student * 100 + week_number,
+            student_id=student,
+            week_start=FIRST_WEEK + timedelta(weeks=week_number),
+            new_memorization=f"Al-Mulk Ayah {week_number * 3 + 1}-{week_number * 3 + 3}",
+            recent_revision="Surah Al-Ikhlas",
+            old_revision="Al-Baqarah Ayah 1-20",
+            teacher_notes=f"Week {week_number + 1}: steady recitation, work on madd"
+        )
+    return WeeklySummary(
+        student_name=f"Student {student}",
+        week_start=FIRST_WEEK + timedelta(weeks=week),
+        current_week=progress(week),
+        previous_week=progress(week - 1) if week else None,
+        summary_text="Masha'Allah, a steady week of memorization and revision. " * 8,
+        new_ayahs_count=3,
+        revision_pages_count=2
+    )
+
+def build_reports(kind: str, students: int) -> list:
+    reports = []
+    for student in range(1, students + 1):
+        if kind == "weekly":
+            summary = weekly_summary(student, 3)
+            period = str(summary.week_start)
+        else:
+            weeks = [weekly_summary(student, week) for week in range(4)]
+            summary = MonthlySummary(
+                student_name=f"Student {student}",
+                month_start=FIRST_WEEK,
+                month_end=date(2024, 1, 31),
+                total_new_ayahs=12,
+                total_revision_pages=8,
+                attendance_weeks=4,
+                summary_text="A consistent month with good attendance. " * 10,
+                weekly_breakdown=weeks
+            )
+            period = "2024_01"
+        reports.append(ReportData(kind, student, period, f"{kind}_Student {student}_{period}.pdf", summary, []))
+    return reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--kind", default="weekly", choices=["weekly", "monthly"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Highest worker count to try")
+    args = parser.parse_args()
+
+    reports = build_reports(args.kind, args.students)
+    print(f"🔄 Rendering {args.students} {args.kind} reports on {os.cpu_count()} CPU(s)...")
+
+    baseline = None
+    for workers in range(1, args.workers + 1):
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        # Start the workers (and their imports) before timing
+        wait([pool.submit(render_report, reports[0].kind, reports[0].summary.model_dump_json()) for _ in range(workers)])
+
+        start = time.perf_counter()
+        archive_size = sum(len(chunk) for chunk in stream_reports_zip(reports, pool=pool))
+        elapsed = time.perf_counter() - start
+        pool.shutdown()
+
+        baseline = baseline or elapsed
+        speedup = baseline / elapsed
+        print(f"📊 {workers:>2} worker(s): {args.students / elapsed:7.1f} reports/sec, "
+              f"{elapsed:6.2f}s, speedup {speedup:4.2f}x, efficiency {speedup / workers:5.1%}, "
+              f"ZIP {archive_size / 1024 / 1024:.1f} MB")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure how many fallback summaries and WhatsApp messages the message
+templates render per second.
+
+Usage (from the repository root):
+
+    python benchmarks/message_rendering.py --messages 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from message_templates import render_message
+
+ENTRIES = ["", "Al-Mulk Ayah 1-5", "Surah Al-Ikhlas", "Al-Baqarah Ayah 280 - Al-Imran Ayah 10", "Juz Amma"]
+
+def build_contexts(count: int) -> dict:
+    """Varied render contexts for every template"""
+    rng = random.Random(42)
+
+    def week():
+        return SimpleNamespace(
+            new_memorization=rng.choice(ENTRIES),
+            recent_revision=rng.choice(ENTRIES),
+            old_revision=rng.choice(ENTRIES),
+            teacher_notes=rng.choice(["", "Good progress this week", "Work on tajweed"])
+        )
+
+    contexts = {name: [] for name in ("fallback_weekly_summary", "fallback_monthly_summary", "whatsapp_weekly_report", "whatsapp_report_ready")}
+    for i in range(count):
+        student_name = f"Student {i}"
+        contexts["fallback_weekly_summary"].append(dict(
+            current_week=week(), previous_week=rng.choice([None, week()]), student_name=student_name
+        ))
+        contexts["fallback_monthly_summary"].append(dict(
+            student_name=student_name, month_start=date(2024, 1, 1), month_end=date(2024, 1, 31),
+            total_new_ayahs=rng.randint(0, 40), total_revision_pages=rng.randint(0, 20), attendance_weeks=rng.randint(0, 4)
+        ))
+        contexts["whatsapp_weekly_report"].append(dict(
+            student_name=student_name,
+            report_data={"new_memorization": rng.choice(ENTRIES), "recent_revision": rng.choice(ENTRIES),
+                         "summary_text": "Excellent work this week! Keep practicing regularly."}
+        ))
+        contexts["whatsapp_report_ready"].append(dict(student_name=student_name, generated_at=datetime.now().astimezone()))
+    return contexts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10_000, help="Messages to render per template")
+    parser.add_argument("--min-rate", type=float, default=10_000, help="Fail below this many messages/sec")
+    args = parser.parse_args()
+
+    slowest = None
+    for name, contexts in build_contexts(args.messages).items():
+        start = time.perf_counter()
+        for context in contexts:
+            render_message(name, **context)
+        rate = len(contexts) / (time.perf_counter() - start)
+        slowest = rate if slowest is None else min(slowest, rate)
+        print(f"📊 {name:<26} {rate:>10,.0f} messages/sec")
+
+    passed = slowest >= args.min_rate
+    print(f"{'✅' if passed else '❌'} Slowest template: {slowest:,.0f} messages/sec (target {args.min_rate:,.0f})")
+    sys.exit(0 if passed else 1)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Check the ayah range parser against a golden corpus of real progress entries,
+then measure what it costs on the write path.
+
+The memorization text of a progress entry is parsed once, when the entry is
+saved (sync_parsed_fields), into ayah range rows and stored counts; summaries
+and reports read the stored values. The cost reported here is therefore paid
+per progress write: parsing a single string, and parsing and counting the
+three memorization fields of an entry.
+
+Usage (from the repository root):
+
+    python benchmarks/parse_ayah_ranges.py --strings 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ayah_ranges import parse_ayah_ranges, count_ayah_ranges
+from database import Progress
+from progress_history import sync_parsed_fields
+
+# (entry text, expected count of distinct ayahs)
+GOLDEN_CORPUS = [
+    ('Surah Al-Fatiha Ayah 1-7', 7),
+    ('Surah Al-Baqarah Ayah 1-10', 10),
+    ('Surah Al-Ikhlas', 4),
+    ('Surah Al-Falaq', 5),
+    ('Surah Al-Fatiha Ayah 1-3', 3),
+    ('Surah Al-Baqarah Ayah 1-5', 5),
+    ('Al-Baqarah Ayah 1-10', 10),
+    ('Al-Baqarah Ayah 280 - Al-Imran Ayah 10', 17),
+    ('Al-Mulk Ayah 1-5, Ayah 10', 6),
+    ('Ayah 5', 1),
+    ('Ayah 1-10, Ayah 5-15', 15),
+    ('Al-Kahf Ayah 20-10', 11),
+    ('Al-Kahf Ayah 15 - 20', 6),
+    ('1-10', 10),
+    ('5-15 and 20-25', 17),
+    ('Juz 30', 0),
+    ('Pages 3 and 4', 0),
+    ('2025-08-31 review', 0),
+    ('Al-Naba 1-40', 40),
+    ('An-Nas, Al-Falaq, Al-Ikhlas', 15),
+    ('Ayah 0', 0),
+    ('', 0),
+    ('Surah 18 Ayah 1-110', 110),
+    ('Al-Baqarah Ayah 255, Ayah 285-286', 3),
+    ('Revised Juz Amma (An-Naba to An-Nas)', 0),
+    ('Ayah 1 - Ayah 7', 7),
+    ('Al-Mulk 1-30', 30),
+    ('Yasin Ayah 1-83', 83),
+    ('Ar-Rahman Ayah 1-78 (slow, focus on tajweed)', 78),
+    ('3 pages from Al-Imran', 0),
+]
+
+def build_inputs(count: int) -> list:
+    """Mix golden entries into longer, multi-reference revision strings"""
+    rng = random.Random(42)
+    entries = [text for text, _ in GOLDEN_CORPUS]
+    return [", ".join(rng.choice(entries) for _ in range(rng.randint(1, 6))) for _ in range(count)]
+
+def count_ayahs(text: str) -> int:
+    return count_ayah_ranges(parse_ayah_ranges(text))
+
+def throughput(function, inputs: list) -> float:
+    start = time.perf_counter()
+    for text in inputs:
+        function(text)
+    return len(inputs) / (time.perf_counter() - start)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strings", type=int, default=100_000, help="Number of strings to count")
+    args = parser.parse_args()
+
+    failures = [(text, expected, count_ayahs(text)) for text, expected in GOLDEN_CORPUS if count_ayahs(text) != expected]
+    for text, expected, actual in failures:
+        print(f"❌ {text!r}: expected {expected}, got {actual}")
+
+    print(f"📊 Golden corpus: {len(GOLDEN_CORPUS) - len(failures)}/{len(GOLDEN_CORPUS)} match")
+
+    inputs = build_inputs(args.strings)
+    # Unsaved entries: the parse, range rows and counts of a write, without the database round trip
+    entries = [
+        Progress(new_memorization=inputs[i], recent_revision=inputs[i + 1], old_revision=inputs[i + 2])
+        for i in range(0, len(inputs) - 2, 3)
+    ]
+
+    parse_rate = throughput(parse_ayah_ranges, inputs)
+    entry_rate = throughput(sync_parsed_fields, entries)
+    print(f"📊 parse_ayah_ranges:          {parse_rate:,.0f} strings/sec ({1e6 / parse_rate:.1f} µs per string)")
+    print(f"📊 Progress write (3 fields):  {entry_rate:,.0f} entries/sec ({1e6 / entry_rate:.1f} µs per saved entry)")
+
+    sys.exit(1 if failures else 0)
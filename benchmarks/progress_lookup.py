@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark student/week progress lookups before and after the
+ix_progress_student_week index is built.
+
+Usage (from the repository root):
+
+    python benchmarks/progress_lookup.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WEEKS_PER_STUDENT = 52
+FIRST_WEEK = date(2024, 1, 7)
+
+def populate(db_path: str, rows: int):
+    """Create the schema without the student/week index and fill it with `rows` progress entries"""
+    from database import engine, Base
+    from migrate import PROGRESS_STUDENT_WEEK_INDEX
+
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute(f"DROP INDEX {PROGRESS_STUDENT_WEEK_INDEX}")
+    students = rows // WEEKS_PER_STUDENT + 1
+    conn.executemany(
+        "INSERT INTO students (id, name, class_day) VALUES (?, ?, 'Sunday')",
+        ((i, f"Student {i}") for i in range(1, students + 1))
+    )
+
+    def progress_rows():
+        for n in range(rows):
+            student_id = n // WEEKS_PER_STUDENT + 1
+            week_start = FIRST_WEEK + timedelta(weeks=n % WEEKS_PER_STUDENT)
+            yield (student_id, week_start.isoformat(), "Surah Al-Mulk Ayah 1-5", "Surah Al-Baqarah Ayah 1-10", "Surah Al-Ikhlas", "")
+
+    conn.executemany(
+        "INSERT INTO progress (student_id, week_start, new_memorization, recent_revision, old_revision, teacher_notes) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        progress_rows()
+    )
+    conn.commit()
+    conn.close()
+    return students
+
+def time_lookups(session_factory, students: int, lookups: int) -> float:
+    """Average milliseconds per monthly window lookup"""
+    from progress_history import get_week_window
+
+    rng = random.Random(42)
+    db = session_factory()
+    try:
+        start = time.perf_counter()
+        for _ in range(lookups):
+            month_start = FIRST_WEEK + timedelta(weeks=rng.randrange(WEEKS_PER_STUDENT - 4))
+            get_week_window(db, rng.randint(1, students), month_start, month_start + timedelta(days=30))
+        return (time.perf_counter() - start) / lookups * 1000
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Number of progress rows to generate")
+    parser.add_argument("--lookups", type=int, default=200, help="Number of window lookups to time")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+
+    print(f"🔄 Generating {args.rows:,} progress rows...")
+    start = time.perf_counter()
+    students = populate(db_path, args.rows)
+    print(f"   done in {time.perf_counter() - start:.1f}s ({students:,} students)")
+
+    from database import SessionLocal
+    from migrate import create_student_week_index
+
+    before = time_lookups(SessionLocal, students, args.lookups)
+    print(f"📊 Without index: {before:.3f} ms per lookup")
+
+    start = time.perf_counter()
+    create_student_week_index()
+    print(f"   index built in {time.perf_counter() - start:.1f}s")
+
+    after = time_lookups(SessionLocal, students, args.lookups)
+    print(f"📊 With index:    {after:.3f} ms per lookup ({before / after:.0f}x faster)")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure the per-report CPU cost of rendering weekly and 12-week monthly PDFs,
+with the report layout (stylesheet, paragraph and table styles, fixed text)
+reused across reports versus rebuilt for every report. The old renderer
+also rebuilt two styles for every week of a monthly report, so the saving
+shown for monthly reports is a lower bound.
+
+Both the story building alone and the full render to PDF bytes are timed
+with CPU time. The two variants alternate over several rounds and the best
+round of each is reported, which keeps a noisy machine from skewing one side.
+
+Usage (from the repository root):
+
+    python benchmarks/report_rendering.py --reports 100 --rounds 5
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bulk_report_scaling import weekly_summary
+from models import MonthlySummary
+from report_generator import _weekly_story, _monthly_story, render_weekly_pdf, render_monthly_pdf
+from report_templates import ReportLayout, get_report_layout
+
+def monthly_summary(weeks: int) -> MonthlySummary:
+    return MonthlySummary(
+        student_name="Student 1",
+        month_start=date(2024, 1, 1),
+        month_end=date(2024, 3, 31),
+        total_new_ayahs=3 * weeks,
+        total_revision_pages=2 * weeks,
+        attendance_weeks=weeks,
+        summary_text="A consistent term with good attendance. " * 10,
+        weekly_breakdown=[weekly_summary(1, week) for week in range(weeks)]
+    )
+
+def cpu_ms_per_report(function, reports: int) -> float:
+    start = time.process_time()
+    for _ in range(reports):
+        function()
+    return (time.process_time() - start) * 1000 / reports
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=100, help="Reports to render per round")
+    parser.add_argument("--weeks", type=int, default=12, help="Weeks in the monthly report")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    weekly = weekly_summary(1, 3)
+    monthly = monthly_summary(args.weeks)
+    get_report_layout()  # Built once before timing, as on a warm server
+
+    cases = [
+        ("weekly story", lambda: _weekly_story(weekly, ReportLayout()), lambda: _weekly_story(weekly, get_report_layout())),
+        (f"{args.weeks}-week monthly story", lambda: _monthly_story(monthly, ReportLayout()), lambda: _monthly_story(monthly, get_report_layout())),
+        ("weekly PDF", lambda: render_weekly_pdf(weekly, ReportLayout()), lambda: render_weekly_pdf(weekly)),
+        (f"{args.weeks}-week monthly PDF", lambda: render_monthly_pdf(monthly, ReportLayout()), lambda: render_monthly_pdf(monthly)),
+    ]
+    for name, per_report_layout, shared_layout in cases:
+        rebuilt, reused = float("inf"), float("inf")
+        for _ in range(args.rounds):
+            rebuilt = min(rebuilt, cpu_ms_per_report(per_report_layout, args.reports))
+            reused = min(reused, cpu_ms_per_report(shared_layout, args.reports))
+        print(f"📊 {name:<24} rebuilt layout {rebuilt:7.2f} ms, reused layout {reused:7.2f} ms, "
+              f"saving {rebuilt - reused:6.2f} ms/report ({(rebuilt - reused) / rebuilt:5.1%})")
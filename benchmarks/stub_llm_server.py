@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+A stub OpenAI-compatible chat completions server, for exercising the `local`
+LLM backend (and its HTTP round-trips) on a machine with no network.
+
+Usage (from the repository root):
+
+    python benchmarks/stub_llm_server.py --port 8001 --latency-ms 300
+    LLM_BACKEND=local LLM_BASE_URL=http://localhost:8001/v1 python main.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_backends import StubBackend, StubBackendError
+
+def create_app(stub: StubBackend) -> FastAPI:
+    app = FastAPI(title="Stub LLM server")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        arguments = await request.json()
+        try:
+            response = await stub.acomplete(arguments)
+        except StubBackendError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": arguments.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": response.content},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": response.prompt_tokens,
+                "completion_tokens": response.completion_tokens,
+                "total_tokens": response.prompt_tokens + response.completion_tokens
+            }
+        }
+
+    return app
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=300, help="Mean response latency")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Fraction of requests answered with a 500")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    stub = StubBackend(latency_ms=args.latency_ms, failure_rate=args.failure_rate, seed=args.seed)
+    uvicorn.run(create_app(stub), host="127.0.0.1", port=args.port)
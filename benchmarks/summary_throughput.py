@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Measure end-to-end summary throughput through the API against a configurable
+LLM backend, with no network needed when using the stub backend.
+
+Each run starts from an empty response cache, so every summary reaches the
+backend. Per-call latency, token and error histograms are printed at the end.
+
+Usage (from the repository root):
+
+    python benchmarks/summary_throughput.py --route monthly --latency-ms 300
+    python benchmarks/summary_throughput.py --backend local   # against LLM_BASE_URL
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FIRST_WEEK = date(2024, 1, 1)
+ROUTES = {
+    "weekly": "/api/summaries/weekly/{student_id}",
+    "monthly": "/api/summaries/monthly/{student_id}?month_start=2024-01-01",
+    "async-monthly": "/api/summaries/async/monthly/{student_id}?month_start=2024-01-01",
+}
+
+def populate(students: int, weeks: int):
+    """Create `students` students with `weeks` weekly progress entries each"""
+    from database import Base, engine, SessionLocal, Student, Progress
+    from progress_history import sync_parsed_fields
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for i in range(students):
+            student = Student(name=f"Student {i + 1}", class_day="Sunday")
+            db.add(student)
+            db.flush()
+            for week in range(weeks):
+                progress = Progress(
+                    student_id=student.id,
+                    week_start=FIRST_WEEK + timedelta(weeks=week),
+                    new_memorization=f"Al-Mulk Ayah {week * 3 + 1}-{week * 3 + 3}",
+                    recent_revision="Surah Al-Ikhlas",
+                    old_revision="Al-Baqarah Ayah 1-20",
+                    teacher_notes=f"Week {week + 1} notes"
+                )
+                sync_parsed_fields(progress)
+                db.add(progress)
+        db.commit()
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", default="stub", choices=["stub", "local", "openai"])
+    parser.add_argument("--route", default="weekly", choices=sorted(ROUTES))
+    parser.add_argument("--students", type=int, default=40)
+    parser.add_argument("--weeks", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent API clients")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Mean stub latency")
+    parser.add_argument("--failure-rate", type=float, default=0, help="Fraction of stub calls that fail")
+    parser.add_argument("--budget-ms", type=int, default=0, help="LLM latency budget (0 waits for every answer)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm_cache.db")
+    os.environ["LLM_BACKEND"] = args.backend
+    os.environ["LLM_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LLM_STUB_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["LLM_LATENCY_BUDGET_MS"] = str(args.budget_ms)
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "1000000")
+    os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "1000000000")
+    os.environ.setdefault("LLM_BREAKER_FAILURES", "1000000")
+
+    from fastapi.testclient import TestClient
+    from main import app
+    from llm_service import get_llm_status
+
+    print(f"🔄 Creating {args.students} students with {args.weeks} weeks each...")
+    populate(args.students, args.weeks)
+
+    client = TestClient(app)
+    route = ROUTES[args.route]
+
+    def fetch(student_id: int) -> str:
+        response = client.get(route.format(student_id=student_id))
+        response.raise_for_status()
+        return response.json()["summary_source"]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        sources = list(pool.map(fetch, range(1, args.students + 1)))
+    elapsed = time.perf_counter() - start
+
+    status = get_llm_status()
+    print(f"📊 {args.route} summaries via {status['backend']}: {len(sources) / elapsed:.1f}/sec "
+          f"({elapsed:.2f}s for {len(sources)}, {sources.count('fallback')} served as fallback)")
+    print(json.dumps(status["metrics"], indent=2))
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure the peak memory of building a class's term report as the class grows.
+
+Classes of synthetic students with a progress entry for every week of the term
+are written to a temporary SQLite database. Each class is then rendered twice,
+each time in a fresh process so the high-water mark starts clean:
+
+  streamed   rows read through the server-side cursor and sections laid out
+             as they are created, as the /api/reports/term endpoint does
+  buffered   every row fetched and every flowable created before the build,
+             as the weekly and monthly reports do for one student
+
+The peak RSS growth over the process's baseline is reported for both, next to
+the size of the PDF. With streaming, what remains is the finished pages that
+reportlab keeps until it writes the file, so growth follows the PDF size
+while the buffered build also holds every row and flowable.
+
+Usage (from the repository root):
+
+    python benchmarks/term_report_memory.py --students 25 100 400 --weeks 40
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Inherited by the measuring processes, which import the database module themselves
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/term_report_benchmark.db")
+
+from database import Base, engine, SessionLocal, Student, Progress
+from term_reports import iter_class_progress, term_report_sections, write_term_pdf
+
+FIRST_WEEK = date(2024, 1, 1)
+
+def create_class(db, class_day: str, students: int, weeks: int):
+    for number in range(1, students + 1):
+        student = Student(name=f"Student {number:04d}", class_day=class_day)
+        db.add(student)
+        db.flush()
+        db.add_all(Progress(
+            student_id=student.id,
+            week_start=FIRST_WEEK + timedelta(weeks=week),
+            new_memorization=f"Al-Mulk Ayah {week % 10 * 3 + 1}-{week % 10 * 3 + 3}",
+            recent_revision="Surah Al-Ikhlas",
+            old_revision="Al-Baqarah Ayah 1-20",
+            teacher_notes=f"Week {week + 1}: steady recitation, keep working on the madd and the stops. " * 2,
+            new_ayahs_count=3,
+            revision_pages_count=2
+        ) for week in range(weeks))
+    db.commit()
+
+def max_rss_mb() -> float:
+    # Kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def measure(class_day: str, end: date, streamed: bool) -> tuple:
+    """Render one term report in this process; returns (peak RSS growth MB, PDF MB, seconds)"""
+    db = SessionLocal()
+    output = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+    baseline = max_rss_mb()
+    start = time.perf_counter()
+    try:
+        with output:
+            rows = iter_class_progress(db, class_day, FIRST_WEEK, end)
+            sections = term_report_sections(rows, class_day, FIRST_WEEK, end)
+            if not streamed:
+                rows = list(rows)
+                sections = [[flowable for section in term_report_sections(rows, class_day, FIRST_WEEK, end) for flowable in section]]
+            write_term_pdf(sections, output)
+        return max_rss_mb() - baseline, os.path.getsize(output.name) / 1024 / 1024, time.perf_counter() - start
+    finally:
+        db.close()
+        os.remove(output.name)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[25, 100, 400], help="Class sizes to measure")
+    parser.add_argument("--weeks", type=int, default=40, help="Weeks of progress in the term")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    print("🔄 Creating classes...")
+    for students in args.students:
+        create_class(db, f"Class {students}", students, args.weeks)
+    db.close()
+
+    end = FIRST_WEEK + timedelta(weeks=args.weeks - 1)
+    context = multiprocessing.get_context("spawn")
+    for students in args.students:
+        results = {}
+        for streamed in (True, False):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[streamed] = pool.submit(measure, f"Class {students}", end, streamed).result()
+        (streamed_mb, pdf_mb, streamed_seconds), (buffered_mb, _, buffered_seconds) = results[True], results[False]
+        print(f"📊 {students:4d} students x {args.weeks} weeks ({pdf_mb:5.1f} MB PDF): "
+              f"streamed +{streamed_mb:6.1f} MB in {streamed_seconds:5.1f}s, "
+              f"buffered +{buffered_mb:6.1f} MB in {buffered_seconds:5.1f}s")
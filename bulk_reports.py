@@ -0,0 +1,154 @@
+"""
+Class-wide report downloads.
+
+Drawing a PDF is CPU-bound, so the reports of a class are rendered on a pool of
+worker processes (REPORT_WORKERS, default one per core) and written into a ZIP
+archive that is streamed to the client as each report completes, rather than
+after the last one. The AI summaries are generated inside the stream as well,
+a few at a time on threads, and each report is rendered as soon as its
+summary is ready. Reports already in the report cache are sent without
+rendering, and newly rendered ones are stored there.
+"""
+
+import multiprocessing
+import os
+import threading
+import zipfile
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterator, List, Optional
+
+from database import SessionLocal
+from models import WeeklySummary, MonthlySummary
+from report_generator import render_weekly_pdf, render_monthly_pdf
+from report_cache import report_key, get_cached_report, store_report
+from report_data import ReportData
+
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", "0")) or os.cpu_count() or 1
+
+_RENDERERS = {
+    "weekly": (WeeklySummary, render_weekly_pdf),
+    "monthly": (MonthlySummary, render_monthly_pdf)
+}
+
+def render_report(kind: str, summary_json: str) -> bytes:
+    """Render one report in a worker process; the summary is passed as JSON to keep pickling cheap"""
+    model, render = _RENDERERS[kind]
+    return render(model.model_validate_json(summary_json))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def get_report_pool() -> ProcessPoolExecutor:
+    """The shared worker pool, started on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the server process holds threads and open connections
+            _pool = ProcessPoolExecutor(max_workers=REPORT_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+class _ZipSink:
+    """Write-only file for ZipFile that hands its output over in chunks.
+
+    It has no tell() or seek(), so ZipFile writes each entry followed by a data
+    descriptor and never goes back to patch a header.
+    """
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def stream_reports_zip(
+    reports: List[ReportData],
+    skipped: List[str] = (),
+    prepare: Optional[Callable[[ReportData], object]] = None,
+    prepare_workers: int = 1,
+    pool: Optional[Executor] = None
+) -> Iterator[bytes]:
+    """Yield a ZIP archive of the reports, one chunk per report as it is ready.
+
+    `prepare`, when given, fills in a report's summary text before it is
+    rendered, on `prepare_workers` threads. Students that have no report, and
+    reports that failed to prepare or render, are listed in a skipped.txt
+    entry at the end of the archive.
+    """
+    pool = pool or get_report_pool()
+    skipped = list(skipped)
+    sink = _ZipSink()
+    preparing = {}
+    pending = {}
+    summary_pool = ThreadPoolExecutor(max_workers=prepare_workers, thread_name_prefix="report-summary") if prepare else None
+    # The stream outlives the request's session, so it keeps its own
+    db = SessionLocal()
+    try:
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+
+            def start(report: ReportData):
+                """Write the report from the cache, or submit it for rendering"""
+                key = report_key(report.kind, report.summary)
+                cached_path = get_cached_report(db, key)
+                if cached_path:
+                    try:
+                        with open(cached_path, "rb") as f:
+                            archive.writestr(report.filename, f.read())
+                        return
+                    except FileNotFoundError:
+                        # Superseded or invalidated since the lookup; render it again
+                        pass
+                future = pool.submit(render_report, report.kind, report.summary.model_dump_json())
+                pending[future] = (report, key)
+
+            if prepare:
+                preparing = {summary_pool.submit(prepare, report): report for report in reports}
+            else:
+                for report in reports:
+                    start(report)
+                    chunk = sink.take()
+                    if chunk:
+                        yield chunk
+
+            while preparing or pending:
+                done, _ = wait(list(preparing) + list(pending), return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in preparing:
+                        report = preparing.pop(future)
+                        try:
+                            future.result()
+                        except Exception as e:
+                            skipped.append(f"{report.filename}: error generating summary: {e}")
+                            continue
+                        start(report)
+                        continue
+                    report, key = pending.pop(future)
+                    try:
+                        pdf = future.result()
+                    except Exception as e:
+                        skipped.append(f"{report.filename}: error generating PDF: {e}")
+                        continue
+                    archive.writestr(report.filename, pdf)
+                    store_report(db, key, report.kind, report.student_id, report.period, report.progress_ids, pdf)
+                chunk = sink.take()
+                if chunk:
+                    yield chunk
+
+            if skipped:
+                archive.writestr("skipped.txt", "\n".join(skipped) + "\n")
+        yield sink.take()
+    finally:
+        # The client went away: drop the summaries and reports that have not started yet
+        if summary_pool:
+            summary_pool.shutdown(wait=False, cancel_futures=True)
+        for future in pending:
+            future.cancel()
+        db.close()
@@ -0,0 +1,113 @@
+"""
+Per-student memorization coverage, kept as bitmaps over all 6,236 ayahs.
+
+Bit i of a category's bitmap is set when the ayah at position i (see
+quran_metadata.ayah_index) appears in that field of any of the student's
+progress entries. Bitmaps are Python ints in memory and 780-byte blobs in the
+student_coverage table.
+"""
+
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date
+
+from database import Progress, ProgressAyahRange, StudentCoverage
+from ayah_ranges import PROGRESS_RANGE_FIELDS
+from quran_metadata import SURAHS, SURAH_OFFSETS, JUZ_OFFSETS, TOTAL_AYAHS, ayah_index
+
+COVERAGE_BYTES = (TOTAL_AYAHS + 7) // 8
+
+# (first position, length) of every surah and juz
+SURAH_SPANS = [(SURAH_OFFSETS[number], ayahs) for number, _, ayahs in SURAHS]
+JUZ_SPANS = [
+    (start, end - start)
+    for start, end in zip(JUZ_OFFSETS, JUZ_OFFSETS[1:] + [TOTAL_AYAHS])
+]
+
+def encode_bitmap(bitmap: int) -> bytes:
+    return bitmap.to_bytes(COVERAGE_BYTES, "little")
+
+def decode_bitmap(data: Optional[bytes]) -> int:
+    return int.from_bytes(data, "little") if data else 0
+
+def count_bits(bitmap: int) -> int:
+    return bin(bitmap).count("1")
+
+def count_in_span(bitmap: int, start: int, length: int) -> int:
+    """Count the set bits in positions [start, start + length)"""
+    return count_bits((bitmap >> start) & ((1 << length) - 1))
+
+def ranges_to_bitmap(ranges: Iterable) -> int:
+    """Build a bitmap from ayah ranges; ranges without a known surah are skipped"""
+    bitmap = 0
+    for ayah_range in ranges:
+        if ayah_range.surah is None:
+            continue
+        length = ayah_range.end_ayah - ayah_range.start_ayah + 1
+        bitmap |= ((1 << length) - 1) << ayah_index(ayah_range.surah, ayah_range.start_ayah)
+    return bitmap
+
+def _query_bitmaps(db: Session, student_id: int, since: Optional[date] = None) -> Dict[str, int]:
+    """Build a student's bitmaps from their stored ayah ranges"""
+    query = db.query(
+        ProgressAyahRange.category,
+        ProgressAyahRange.surah,
+        ProgressAyahRange.start_ayah,
+        ProgressAyahRange.end_ayah
+    ).join(Progress).filter(
+        Progress.student_id == student_id,
+        ProgressAyahRange.surah.isnot(None)
+    )
+    if since is not None:
+        query = query.filter(Progress.week_start >= since)
+
+    bitmaps = {field: 0 for field in PROGRESS_RANGE_FIELDS}
+    for row in query:
+        bitmaps[row.category] |= ranges_to_bitmap([row])
+    return bitmaps
+
+def _get_or_create_coverage(db: Session, student_id: int) -> StudentCoverage:
+    coverage = db.query(StudentCoverage).filter(StudentCoverage.student_id == student_id).first()
+    if not coverage:
+        coverage = StudentCoverage(student_id=student_id)
+        db.add(coverage)
+    return coverage
+
+def add_progress_to_coverage(db: Session, progress: Progress):
+    """Add a new progress entry's ayah ranges to its student's coverage"""
+    coverage = _get_or_create_coverage(db, progress.student_id)
+    for field in PROGRESS_RANGE_FIELDS:
+        added = ranges_to_bitmap(r for r in progress.ayah_ranges if r.category == field)
+        setattr(coverage, field, encode_bitmap(decode_bitmap(getattr(coverage, field)) | added))
+
+def rebuild_student_coverage(db: Session, student_id: int):
+    """Recompute a student's coverage from their stored ayah ranges.
+
+    Used when an entry is edited or deleted, since bits cannot simply be
+    cleared: the same ayahs may also appear in other entries.
+    """
+    db.flush()
+    bitmaps = _query_bitmaps(db, student_id)
+    coverage = _get_or_create_coverage(db, student_id)
+    for field, bitmap in bitmaps.items():
+        setattr(coverage, field, encode_bitmap(bitmap))
+
+def load_coverage(db: Session, student_id: int) -> Dict[str, int]:
+    """Get a student's coverage bitmaps by category"""
+    coverage = db.query(StudentCoverage).filter(StudentCoverage.student_id == student_id).first()
+    if not coverage:
+        # Not backfilled yet (see `python migrate.py coverage`)
+        return _query_bitmaps(db, student_id)
+    return {field: decode_bitmap(getattr(coverage, field)) for field in PROGRESS_RANGE_FIELDS}
+
+def load_revised_since(db: Session, student_id: int, since: date) -> int:
+    """Bitmap of the ayahs a student revised in entries from `since` onwards"""
+    bitmaps = _query_bitmaps(db, student_id, since)
+    return bitmaps["recent_revision"] | bitmaps["old_revision"]
+
+def summarize_spans(bitmaps: Dict[str, int], spans: List[Tuple[int, int]]) -> List[Dict[str, int]]:
+    """Count covered ayahs per category within each (start, length) span"""
+    return [
+        {field: count_in_span(bitmap, start, length) for field, bitmap in bitmaps.items()}
+        for start, length in spans
+    ]
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, Date, ForeignKey
+from sqlalchemy import create_engine, Column, Integer, String, Text, Date, Float, ForeignKey, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import os
@@ -27,9 +27,37 @@ class Student(Base):
     
     # Relationship to progress entries
     progress_entries = relationship("Progress", back_populates="student")
+    
+    # Memorization coverage bitmaps, maintained on every progress write
+    coverage = relationship("StudentCoverage", back_populates="student", uselist=False, cascade="all, delete-orphan")
+    
+    # Generated PDF reports kept by the report cache
+    reports = relationship("Report", back_populates="student", cascade="all, delete-orphan")
+    
+    # Reports requested for background generation
+    report_jobs = relationship("ReportJob", back_populates="student", cascade="all, delete-orphan")
+    
+    # WhatsApp messages queued for sending
+    whatsapp_messages = relationship("WhatsAppMessage", back_populates="student", cascade="all, delete-orphan")
+
+class StudentCoverage(Base):
+    __tablename__ = "student_coverage"
+    
+    # One bit per ayah of the Quran (see coverage.py), per memorization field
+    student_id = Column(Integer, ForeignKey("students.id"), primary_key=True)
+    new_memorization = Column(LargeBinary)
+    recent_revision = Column(LargeBinary)
+    old_revision = Column(LargeBinary)
+    
+    # Relationship to student
+    student = relationship("Student", back_populates="coverage")
 
 class Progress(Base):
     __tablename__ = "progress"
+    __table_args__ = (
+        # One entry per student per week; also serves the student/week lookups
+        Index("ix_progress_student_week", "student_id", "week_start", unique=True),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"))
@@ -60,8 +88,102 @@ class Progress(Base):
     recent_revision_confidence = Column(String, default="")
     old_revision_confidence = Column(String, default="")
     
+    # Counts derived from the memorization text, maintained on write
+    new_ayahs_count = Column(Integer)
+    revision_pages_count = Column(Integer)
+    
     # Relationship to student
     student = relationship("Student", back_populates="progress_entries")
+    
+    # Ayah ranges parsed from the memorization fields on write
+    ayah_ranges = relationship("ProgressAyahRange", back_populates="progress", cascade="all, delete-orphan")
+
+class ProgressAyahRange(Base):
+    __tablename__ = "progress_ayah_ranges"
+    __table_args__ = (
+        Index("ix_progress_ayah_ranges_progress_category", "progress_id", "category"),
+        Index("ix_progress_ayah_ranges_surah", "surah", "start_ayah"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    progress_id = Column(Integer, ForeignKey("progress.id"), nullable=False)
+    category = Column(String, nullable=False)  # new_memorization, recent_revision, old_revision
+    surah = Column(Integer)  # Null when the text did not name a surah
+    start_ayah = Column(Integer, nullable=False)
+    end_ayah = Column(Integer, nullable=False)
+    
+    # Relationship to progress entry
+    progress = relationship("Progress", back_populates="ayah_ranges")
+
+class Report(Base):
+    __tablename__ = "reports"
+    __table_args__ = (
+        # One report per student per week or month; a newer one replaces it
+        Index("ix_reports_student_type_period", "student_id", "type", "period", unique=True),
+        Index("ix_reports_created_at", "created_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    type = Column(String, nullable=False)  # weekly, monthly
+    period = Column(String, nullable=False)  # Week start (2024-01-08) or month (2024_01)
+    key = Column(String, nullable=False, index=True)  # Content hash, see report_cache.report_key
+    progress_ids = Column(String, nullable=False, default="")  # Entries it was drawn from, as "-12-13-"
+    path = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    created_at = Column(Float, nullable=False)  # Unix time
+    
+    # Relationship to student
+    student = relationship("Student", back_populates="reports")
+
+class ReportJob(Base):
+    __tablename__ = "report_jobs"
+    __table_args__ = (
+        # The workers' lookup of the next job to run
+        Index("ix_report_jobs_status_run_after", "status", "run_after"),
+    )
+    
+    id = Column(String, primary_key=True)  # Random hex id handed to the client
+    type = Column(String, nullable=False)  # weekly, monthly
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    period_start = Column(Date)  # Week or month start; the latest one when empty
+    status = Column(String, nullable=False)  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    filename = Column(String)
+    pdf = Column(LargeBinary)  # Kept until the job is purged, also when the report cache is off
+    created_at = Column(Float, nullable=False)  # Unix time
+    run_after = Column(Float, nullable=False)  # Queued: not before this; running: lease ends at this
+    finished_at = Column(Float)
+    
+    # Relationship to student
+    student = relationship("Student", back_populates="report_jobs")
+
+class WhatsAppMessage(Base):
+    __tablename__ = "whatsapp_outbox"
+    __table_args__ = (
+        # A repeated send request with the same key finds the message already queued
+        Index("ix_whatsapp_outbox_idempotency_key", "idempotency_key", unique=True),
+        # The worker's lookup of the next batch to send
+        Index("ix_whatsapp_outbox_status_run_after", "status", "run_after"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    idempotency_key = Column(String, nullable=False)
+    student_id = Column(Integer, ForeignKey("students.id"))
+    to_phone = Column(String, nullable=False)
+    payloads = Column(Text, nullable=False)  # JSON list of Graph API message payloads, sent in order
+    parts_sent = Column(Integer, nullable=False, default=0)  # Payloads delivered so far; never sent again
+    message_ids = Column(Text, nullable=False, default="[]")  # JSON list of the WhatsApp ids of the sent payloads
+    status = Column(String, nullable=False)  # queued, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    created_at = Column(Float, nullable=False)  # Unix time
+    run_after = Column(Float, nullable=False)  # Queued: not before this; sending: lease ends at this
+    finished_at = Column(Float)
+    
+    # Relationship to student
+    student = relationship("Student", back_populates="whatsapp_messages")
 
 # Dependency to get database session
 def get_db():
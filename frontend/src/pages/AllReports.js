@@ -1,12 +1,20 @@
-import React, { useState, useEffect, useCallback } from 'react';
+import React, { useState, useEffect, useCallback, useMemo } from 'react';
 import { Link } from 'react-router-dom';
 import { toast } from 'react-toastify';
 import { studentsAPI, reportsAPI } from '../services/api';
 
+// Reports fetched per page, newest first; counts always cover every report
+const REPORTS_PAGE_SIZE = 200;
+
+const reportKey = (report) => `${report.student_id}:${report.filename}:${report.created_at}`;
+
 const AllReports = () => {
   const [students, setStudents] = useState([]);
-  const [reportsData, setReportsData] = useState({});
+  const [loadedReports, setLoadedReports] = useState([]);
+  const [reportCounts, setReportCounts] = useState({});
+  const [totalReports, setTotalReports] = useState(0);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const fetchStudents = useCallback(async () => {
     try {
@@ -18,68 +26,58 @@ const AllReports = () => {
     }
   }, []);
 
-  const fetchAllReports = useCallback(async () => {
+  const fetchReportsPage = useCallback(async (offset) => {
     try {
-      const reportsPromises = students.map(student => 
-        reportsAPI.list(student.id).then(response => ({
-          studentId: student.id,
-          studentName: student.name,
-          reports: response.data.reports
-        })).catch(error => {
-          console.error(`Error fetching reports for student ${student.id}:`, error);
-          return {
-            studentId: student.id,
-            studentName: student.name,
-            reports: []
-          };
-        })
-      );
+      // A page of the newest reports across all students, plus per-student counts
+      const response = await reportsAPI.listAll({ offset, limit: REPORTS_PAGE_SIZE });
+      const { reports, counts, total } = response.data;
 
-      const allReports = await Promise.all(reportsPromises);
-      const reportsMap = {};
-      allReports.forEach(({ studentId, studentName, reports }) => {
-        reportsMap[studentId] = { studentName, reports };
+      setLoadedReports(previous => {
+        if (offset === 0) {
+          return reports;
+        }
+        // Reports created since the last page shift the offsets; skip the ones already shown
+        const seen = new Set(previous.map(reportKey));
+        return [...previous, ...reports.filter(report => !seen.has(reportKey(report)))];
       });
-      
-      setReportsData(reportsMap);
+      setReportCounts(counts);
+      setTotalReports(total);
     } catch (error) {
       toast.error('Error fetching reports');
       console.error('Error:', error);
-    } finally {
-      setLoading(false);
     }
-  }, [students]);
-
-  useEffect(() => {
-    fetchStudents();
-  }, [fetchStudents]);
+  }, []);
 
   useEffect(() => {
-    if (students.length > 0) {
-      fetchAllReports();
-    }
-  }, [students, fetchAllReports]);
+    Promise.all([fetchStudents(), fetchReportsPage(0)]).finally(() => setLoading(false));
+  }, [fetchStudents, fetchReportsPage]);
 
-  const getTotalReports = () => {
-    return Object.values(reportsData).reduce((total, { reports }) => total + reports.length, 0);
+  const loadMoreReports = async () => {
+    setLoadingMore(true);
+    await fetchReportsPage(loadedReports.length);
+    setLoadingMore(false);
   };
 
-  const getRecentReports = () => {
-    const allReports = [];
-    Object.entries(reportsData).forEach(([studentId, { studentName, reports }]) => {
-      reports.forEach(report => {
-        allReports.push({
-          ...report,
-          studentId: parseInt(studentId),
-          studentName
-        });
-      });
+  const reportsData = useMemo(() => {
+    const reportsMap = {};
+    loadedReports.forEach(report => {
+      if (!reportsMap[report.student_id]) {
+        reportsMap[report.student_id] = { studentName: report.student_name, reports: [] };
+      }
+      reportsMap[report.student_id].reports.push(report);
     });
-    
-    return allReports
-      .sort((a, b) => b.created_at - a.created_at)
-      .slice(0, 5);
-  };
+    return reportsMap;
+  }, [loadedReports]);
+
+  const recentReports = useMemo(() => loadedReports.slice(0, 5).map(report => ({
+    ...report,
+    studentId: report.student_id,
+    studentName: report.student_name
+  })), [loadedReports]);
+
+  const getTotalReports = () => totalReports;
+
+  const getRecentReports = () => recentReports;
 
   if (loading) {
     return <div className="loading">Loading reports...</div>;
@@ -114,7 +112,7 @@ const AllReports = () => {
         
         <div className="card" style={{ textAlign: 'center' }}>
           <h3 style={{ color: 'var(--primary-purple)', margin: '0 0 0.5rem 0' }}>
-            {Object.values(reportsData).filter(({ reports }) => reports.length > 0).length}
+            {Object.keys(reportCounts).length}
           </h3>
           <p style={{ margin: 0, color: 'var(--text-light)' }}>Students with Reports</p>
         </div>
@@ -195,7 +193,7 @@ const AllReports = () => {
           <div style={{ display: 'grid', gap: '1rem' }}>
             {students.map(student => {
               const studentReports = reportsData[student.id] || { studentName: student.name, reports: [] };
-              const reportCount = studentReports.reports.length;
+              const reportCount = reportCounts[student.id] || 0;
               
               return (
                 <div key={student.id} className="card" style={{ padding: '1rem', border: '1px solid var(--border-light)' }}>
@@ -265,6 +263,17 @@ const AllReports = () => {
             })}
           </div>
         )}
+
+        {loadedReports.length < totalReports && (
+          <div style={{ textAlign: 'center', marginTop: '1rem' }}>
+            <p style={{ margin: '0 0 0.5rem 0', color: 'var(--text-light)', fontSize: '0.9rem' }}>
+              Showing the newest {loadedReports.length} of {totalReports} reports
+            </p>
+            <button className="btn btn-secondary" onClick={loadMoreReports} disabled={loadingMore}>
+              {loadingMore ? 'Loading...' : 'Load More Reports'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
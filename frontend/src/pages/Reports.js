@@ -158,6 +158,19 @@ const Reports = () => {
                         studentName={student?.name} 
                         weekStart={report.week_start} 
                       />
+                      <a
+                        href={reportsAPI.previewUrl(
+                          report.type,
+                          studentId,
+                          report.type === 'weekly' ? report.week_start : `${report.period.replace('_', '-')}-01`
+                        )}
+                        target="_blank"
+                        rel="noopener noreferrer"
+                        className="btn btn-secondary"
+                        style={{ fontSize: '12px', padding: '5px 10px' }}
+                      >
+                        Preview
+                      </a>
                       <button
                         onClick={() => downloadReport(report.filename, report.type)}
                         className="btn btn-secondary"
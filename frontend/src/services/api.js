@@ -55,7 +55,13 @@ export const reportsAPI = {
       responseType: 'blob'
     });
   },
+  previewUrl: (type, studentId, periodStart) => {
+    const param = type === 'weekly' ? 'week_start' : 'month_start';
+    const query = periodStart ? `?${param}=${periodStart}` : '';
+    return `${API_BASE_URL}/reports/preview/${type}/${studentId}${query}`;
+  },
   list: (studentId) => api.get(`/reports/list/${studentId}`),
+  listAll: (params = {}) => api.get('/reports/list', { params }),
 };
 
 export default api;
@@ -0,0 +1,210 @@
+"""
+LLM backends for the summary generator, selected with LLM_BACKEND:
+
+    openai  - the OpenAI API (default)
+    local   - any OpenAI-compatible server at LLM_BASE_URL (vLLM, llama.cpp,
+              Ollama, or benchmarks/stub_llm_server.py)
+    stub    - deterministic in-process answers with configurable latency and
+              failure rate, for load tests on a machine with no network
+
+Every backend takes the chat completion arguments built by llm_service and
+returns an LLMResponse. LLMMetrics records per-call latency, token counts and
+errors as histograms.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional
+
+class LLMResponse(NamedTuple):
+    content: str
+    prompt_tokens: int
+    completion_tokens: int
+
+class LLMBackend(ABC):
+    name = "base"
+
+    @abstractmethod
+    def complete(self, arguments: dict) -> LLMResponse:
+        """Run a chat completion with the arguments of chat.completions.create"""
+
+    @abstractmethod
+    async def acomplete(self, arguments: dict) -> LLMResponse:
+        """Async version of complete"""
+
+class OpenAIBackend(LLMBackend):
+    name = "openai"
+
+    def __init__(self, api_key: Optional[str], base_url: Optional[str] = None, timeout: float = 60):
+        import openai
+        # The SDK's own retries are disabled: a failed call falls back straight away and
+        # is counted by the circuit breaker, and the next view of the summary retries it.
+        # The timeout replaces the SDK's 10 minutes, so a hung provider frees the worker
+        # threads and counts as a failure well before then.
+        self.client = openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+        self.async_client = openai.AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0, timeout=timeout)
+
+    @staticmethod
+    def _to_response(completion) -> LLMResponse:
+        usage = completion.usage
+        return LLMResponse(
+            content=completion.choices[0].message.content,
+            prompt_tokens=usage.prompt_tokens if usage else 0,
+            completion_tokens=usage.completion_tokens if usage else 0
+        )
+
+    def complete(self, arguments: dict) -> LLMResponse:
+        return self._to_response(self.client.chat.completions.create(**arguments))
+
+    async def acomplete(self, arguments: dict) -> LLMResponse:
+        return self._to_response(await self.async_client.chat.completions.create(**arguments))
+
+class LocalHTTPBackend(OpenAIBackend):
+    """An OpenAI-compatible server, such as a local model or the stub server"""
+    name = "local"
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: float = 60):
+        # Local servers usually ignore the key, but the SDK requires one
+        super().__init__(api_key=api_key or "local", base_url=base_url, timeout=timeout)
+
+class StubBackendError(Exception):
+    """Simulated provider failure"""
+
+class StubBackend(LLMBackend):
+    """Deterministic answers derived from a hash of the prompt.
+
+    Latency and failures are drawn from a seeded generator, so a load test
+    replays the same way every run. JSON-mode requests get an object with a
+    paragraph for every "Week of YYYY-MM-DD" in the prompt, matching what the
+    batched monthly summary asks for.
+    """
+    name = "stub"
+
+    _WEEK_DATE = re.compile(r"Week of (\d{4}-\d{2}-\d{2})")
+
+    def __init__(self, latency_ms: float = 0, failure_rate: float = 0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _draw(self) -> tuple:
+        """Latency in seconds, and whether this call fails"""
+        with self._lock:
+            latency = self._random.uniform(0.5, 1.5) * self.latency_ms / 1000
+            fails = self._random.random() < self.failure_rate
+        return latency, fails
+
+    def _answer(self, arguments: dict, fails: bool) -> LLMResponse:
+        if fails:
+            raise StubBackendError("Simulated LLM failure")
+        prompt = arguments["messages"][-1]["content"]
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:12]
+        text = f"Stub summary {digest}. Keep up the steady memorization and revision."
+        if arguments.get("response_format", {}).get("type") == "json_object":
+            content = json.dumps({
+                "weekly": {week: f"{text} (week of {week})" for week in self._WEEK_DATE.findall(prompt)},
+                "monthly": text
+            })
+        else:
+            content = text
+        prompt_tokens = sum(len(message["content"]) for message in arguments["messages"]) // 4
+        return LLMResponse(content=content, prompt_tokens=prompt_tokens, completion_tokens=len(content) // 4)
+
+    def complete(self, arguments: dict) -> LLMResponse:
+        latency, fails = self._draw()
+        time.sleep(latency)
+        return self._answer(arguments, fails)
+
+    async def acomplete(self, arguments: dict) -> LLMResponse:
+        latency, fails = self._draw()
+        await asyncio.sleep(latency)
+        return self._answer(arguments, fails)
+
+def create_backend(kind: Optional[str] = None) -> LLMBackend:
+    """Create the backend named by `kind`, or by LLM_BACKEND (default: openai)"""
+    kind = (kind or os.getenv("LLM_BACKEND", "openai")).lower()
+    # Longest a single call may take, from connecting to the last token
+    timeout = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    if kind == "openai":
+        return OpenAIBackend(api_key=os.getenv("OPENAI_API_KEY"), timeout=timeout)
+    if kind == "local":
+        return LocalHTTPBackend(base_url=os.getenv("LLM_BASE_URL", "http://localhost:8001/v1"), api_key=os.getenv("LLM_API_KEY"), timeout=timeout)
+    if kind == "stub":
+        return StubBackend(
+            latency_ms=float(os.getenv("LLM_STUB_LATENCY_MS", "0")),
+            failure_rate=float(os.getenv("LLM_STUB_FAILURE_RATE", "0")),
+            seed=int(os.getenv("LLM_STUB_SEED", "0"))
+        )
+    raise ValueError(f"Unknown LLM backend: {kind}")
+
+# Histogram bucket upper bounds; the last bucket holds everything larger
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+TOKEN_BUCKETS = [100, 250, 500, 1000, 2000, 4000]
+
+class Histogram:
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def snapshot(self) -> dict:
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else 0,
+            "buckets": dict(zip(labels, self.counts))
+        }
+
+class LLMMetrics:
+    """Per-call latency, token and error statistics since startup"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.latency_ms = Histogram(LATENCY_BUCKETS_MS)
+            self.error_latency_ms = Histogram(LATENCY_BUCKETS_MS)
+            self.prompt_tokens = Histogram(TOKEN_BUCKETS)
+            self.completion_tokens = Histogram(TOKEN_BUCKETS)
+            self.errors: Dict[str, int] = {}
+
+    def record_success(self, latency_ms: float, response: LLMResponse):
+        with self._lock:
+            self.latency_ms.observe(latency_ms)
+            self.prompt_tokens.observe(response.prompt_tokens)
+            self.completion_tokens.observe(response.completion_tokens)
+
+    def record_error(self, latency_ms: float, error: Exception):
+        with self._lock:
+            self.error_latency_ms.observe(latency_ms)
+            name = type(error).__name__
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "latency_ms": self.latency_ms.snapshot(),
+                "error_latency_ms": self.error_latency_ms.snapshot(),
+                "prompt_tokens": self.prompt_tokens.snapshot(),
+                "completion_tokens": self.completion_tokens.snapshot(),
+                "prompt_tokens_total": int(self.prompt_tokens.total),
+                "completion_tokens_total": int(self.completion_tokens.total),
+                "errors": dict(self.errors)
+            }
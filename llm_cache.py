@@ -0,0 +1,151 @@
+"""
+Persistent cache for LLM responses.
+
+Responses are stored in a local SQLite file under a SHA-256 hash of everything
+that goes into the request: model, parameters, system message and prompt (which
+carries the progress fields, the previous week and the student name). Editing
+a progress entry changes its prompt and therefore its key, so a stale summary is
+never served; the old rows are also dropped straight away through the progress
+ids each entry is tagged with.
+
+Entries expire after a TTL, and the least recently used entries are evicted once
+the cache holds more than `max_entries`.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+if os.getenv("VERCEL"):
+    DEFAULT_CACHE_PATH = "/tmp/llm_cache.db"
+else:
+    DEFAULT_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "./llm_cache.db")
+
+DEFAULT_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+DEFAULT_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_DAYS", "30")) * 24 * 60 * 60
+
+def make_cache_key(**request) -> str:
+    """Hash the inputs of an LLM request into a cache key"""
+    payload = json.dumps(request, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: int = DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so importing the module never touches the disk
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    response TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_accessed REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS ix_llm_responses_last_accessed ON llm_responses (last_accessed);
+                CREATE TABLE IF NOT EXISTS llm_response_progress (
+                    key TEXT NOT NULL,
+                    progress_id INTEGER NOT NULL,
+                    PRIMARY KEY (progress_id, key)
+                );
+            """)
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None on a miss"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                self._delete_keys(conn, [key])
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_responses SET last_accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, response: str, progress_ids: Iterable[Optional[int]] = ()):
+        """Store a response, tagged with the progress entries it was generated from"""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN")
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, response, created_at, last_accessed) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO llm_response_progress (key, progress_id) VALUES (?, ?)",
+                [(key, progress_id) for progress_id in set(progress_ids) if progress_id is not None]
+            )
+            self._evict(conn, now)
+            conn.execute("COMMIT")
+
+    def invalidate_progress(self, progress_id: int) -> int:
+        """Drop every response generated from a progress entry; returns how many were dropped"""
+        with self._lock:
+            conn = self._connect()
+            keys = [key for key, in conn.execute("SELECT key FROM llm_response_progress WHERE progress_id = ?", (progress_id,))]
+            if keys:
+                conn.execute("BEGIN")
+                self._delete_keys(conn, keys)
+                conn.execute("COMMIT")
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM llm_responses")
+            conn.execute("DELETE FROM llm_response_progress")
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters since startup, plus the current size of the cache"""
+        with self._lock:
+            entries = self._connect().execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds
+        }
+
+    def _delete_keys(self, conn: sqlite3.Connection, keys: list):
+        placeholders = ",".join("?" * len(keys))
+        conn.execute(f"DELETE FROM llm_responses WHERE key IN ({placeholders})", keys)
+        conn.execute(f"DELETE FROM llm_response_progress WHERE key IN ({placeholders})", keys)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        expired = [key for key, in conn.execute("SELECT key FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,))]
+        overflow = conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0] - len(expired) - self.max_entries
+        if overflow > 0:
+            expired += [key for key, in conn.execute(
+                "SELECT key FROM llm_responses WHERE created_at >= ? ORDER BY last_accessed LIMIT ?",
+                (now - self.ttl_seconds, overflow)
+            )]
+        if expired:
+            self._delete_keys(conn, expired)
+            self.evictions += len(expired)
+
+llm_cache = LLMCache()
@@ -0,0 +1,130 @@
+"""
+Client-side protection for the LLM provider.
+
+RateLimiter keeps requests and tokens per minute under the provider's quota
+with two token buckets, and CircuitBreaker stops sending requests for a while
+after repeated failures (or when the provider asks us to back off with a 429),
+so callers go straight to fallback summaries instead of waiting on a failing
+call. Both are non-blocking: a request that cannot go out right now is refused
+and the caller serves the fallback.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+class RateLimitExceeded(Exception):
+    """The request would exceed the requests or tokens per minute limit"""
+
+class CircuitOpen(Exception):
+    """The provider is considered unhealthy and requests are short-circuited"""
+
+class RateLimiter:
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed_minutes = (now - self._updated) / 60
+        self._requests = min(self.requests_per_minute, self._requests + elapsed_minutes * self.requests_per_minute)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed_minutes * self.tokens_per_minute)
+        self._updated = now
+
+    def try_acquire(self, tokens: int) -> bool:
+        """Take one request and `tokens` tokens from the buckets if both have enough"""
+        with self._lock:
+            self._refill()
+            # A request larger than the whole bucket can still go out once the bucket is full
+            tokens = min(tokens, self.tokens_per_minute)
+            if self._requests < 1 or self._tokens < tokens:
+                self.rejected += 1
+                return False
+            self._requests -= 1
+            self._tokens -= tokens
+            return True
+
+    def state(self) -> Dict[str, float]:
+        with self._lock:
+            self._refill()
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "requests_available": round(self._requests, 2),
+                "tokens_available": round(self._tokens),
+                "rejected": self.rejected
+            }
+
+class CircuitBreaker:
+    """Opens after `failure_threshold` consecutive failures.
+
+    While open, requests are refused until the cooldown (or a longer
+    Retry-After from the provider) has passed. Then a single trial request is
+    let through: success closes the circuit, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.consecutive_failures = 0
+        self.short_circuited = 0
+        self._opened_until = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _current_state(self) -> str:
+        if self._opened_until == 0.0:
+            return self.CLOSED
+        if time.monotonic() < self._opened_until:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.short_circuited += 1
+            return False
+
+    def release(self):
+        """Give back a trial slot taken by allow_request for a request that was not sent"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self._opened_until = 0.0
+            self._trial_in_flight = False
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        """Count a failed request; `retry_after` opens the circuit for at least that long"""
+        with self._lock:
+            self.consecutive_failures += 1
+            self._trial_in_flight = False
+            if retry_after is not None or self.consecutive_failures >= self.failure_threshold or self._opened_until:
+                self._opened_until = time.monotonic() + max(self.cooldown_seconds, retry_after or 0)
+
+    def state(self) -> Dict[str, float]:
+        with self._lock:
+            state = self._current_state()
+            return {
+                "state": state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in_seconds": round(max(self._opened_until - time.monotonic(), 0), 1) if state == self.OPEN else 0,
+                "short_circuited": self.short_circuited
+            }
@@ -1,24 +1,260 @@
 import os
-from typing import Optional
+import json
+import asyncio
+import threading
+import weakref
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
 from models import Progress, WeeklySummary, MonthlySummary
+from llm_cache import llm_cache, make_cache_key
+from llm_limits import RateLimiter, CircuitBreaker, RateLimitExceeded, CircuitOpen
+from llm_backends import LLMMetrics, LLMResponse, create_backend
+from message_templates import render_message
 from datetime import date, timedelta
 
-# Initialize OpenAI client (optional)
+# Initialize the LLM backend (optional); LLM_BACKEND selects OpenAI, a local server or the stub
 try:
-    import openai
-    client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    OPENAI_AVAILABLE = True
+    backend = create_backend()
+    LLM_AVAILABLE = True
 except Exception as e:
-    print(f"OpenAI not available: {e}")
-    client = None
-    OPENAI_AVAILABLE = False
+    print(f"LLM backend not available: {e}")
+    backend = None
+    LLM_AVAILABLE = False
 
-def generate_weekly_summary(current_week: Progress, previous_week: Optional[Progress], student_name: str) -> str:
-    """Generate a natural language summary for weekly progress"""
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+LLM_TEMPERATURE = 0.7
+
+# Maximum number of weekly summaries generated at once by the async path
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# How long a request waits for the LLM before serving the fallback summary (0 waits indefinitely).
+# The LLM call keeps running in the background and its answer is cached for the next request.
+LLM_LATENCY_BUDGET_MS = int(os.getenv("LLM_LATENCY_BUDGET_MS", "3000"))
+
+# Maximum number of LLM requests in flight at once, across all routes
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+
+# Provider quota, and how the circuit breaker reacts to failures
+rate_limiter = RateLimiter(
+    requests_per_minute=int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60")),
+    tokens_per_minute=int(os.getenv("LLM_TOKENS_PER_MINUTE", "60000"))
+)
+circuit_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+    cooldown_seconds=float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+)
+llm_metrics = LLMMetrics()
+
+# Which variant of a summary was served
+SUMMARY_SOURCE_AI = "ai"
+SUMMARY_SOURCE_FALLBACK = "fallback"
+
+# Token budget of the batched monthly request: one paragraph per week plus the monthly summary
+BATCH_TOKENS_PER_WEEK = 200
+BATCH_MONTHLY_TOKENS = 500
+
+WEEKLY_SYSTEM_MESSAGE = "You are an experienced Quran memorization teacher providing weekly progress feedback to students and parents."
+MONTHLY_SYSTEM_MESSAGE = "You are an experienced Quran memorization teacher providing monthly progress reports to students and parents."
+
+def _build_request(system_message: str, prompt: str, max_tokens: int, json_mode: bool) -> Tuple[str, dict]:
+    """Build the cache key and the chat completion arguments of a request"""
+    request = dict(
+        backend=backend.name if backend else None,
+        model=LLM_MODEL,
+        temperature=LLM_TEMPERATURE,
+        max_tokens=max_tokens,
+        system=system_message,
+        prompt=prompt
+    )
+    options = {}
+    if json_mode:
+        request["response_format"] = "json_object"
+        options["response_format"] = {"type": "json_object"}
+    
+    arguments = dict(
+        model=LLM_MODEL,
+        messages=[
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=LLM_TEMPERATURE,
+        **options
+    )
+    return make_cache_key(**request), arguments
+
+class LatencyBudgetExceeded(Exception):
+    """The LLM did not answer within the latency budget; the request keeps running in the background"""
+
+class LLMOverloaded(Exception):
+    """Every request slot is taken, so a new request would only queue behind them"""
+
+class NotCached(Exception):
+    """A cache-only lookup missed; no request was made"""
+
+# The worker pool bounds sync requests in flight; async requests share a semaphore of the same size.
+# A request is refused rather than queued when every slot is taken: a slow or hung provider
+# then serves fallbacks straight away instead of building a backlog that outlives the callers.
+_executor = ThreadPoolExecutor(max_workers=LLM_MAX_IN_FLIGHT, thread_name_prefix="llm")
+_executor_slots = threading.BoundedSemaphore(LLM_MAX_IN_FLIGHT)
+_in_flight: Dict[str, Future] = {}
+_in_flight_lock = threading.Lock()
+
+class _LoopState:
+    """Async requests in flight on one event loop, and the semaphore bounding them"""
+    def __init__(self):
+        self.slots = asyncio.Semaphore(LLM_MAX_IN_FLIGHT)
+        self.in_flight: Dict[str, asyncio.Task] = {}
+
+# Tasks and semaphores belong to the loop that created them
+_loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = weakref.WeakKeyDictionary()
+
+def _latency_budget() -> Optional[float]:
+    return LLM_LATENCY_BUDGET_MS / 1000 if LLM_LATENCY_BUDGET_MS > 0 else None
+
+def _check_limits(arguments: dict):
+    """Refuse a request while the circuit is open or the rate limits are used up"""
+    if not circuit_breaker.allow_request():
+        raise CircuitOpen("LLM provider is unhealthy; serving fallback summaries")
+    # Rough token estimate: ~4 characters per prompt token, plus the completion budget
+    prompt_tokens = sum(len(message["content"]) for message in arguments["messages"]) // 4
+    if not rate_limiter.try_acquire(prompt_tokens + arguments["max_tokens"]):
+        circuit_breaker.release()
+        raise RateLimitExceeded("LLM rate limit reached; serving fallback summaries")
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Seconds to back off after a 429 (0 when the provider did not say), or None for other errors"""
+    if getattr(error, "status_code", None) != 429:
+        return None
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return 0.0
+
+def _record_call(started: float, response: Optional[LLMResponse] = None, error: Optional[Exception] = None):
+    """Feed the outcome of a backend call to the metrics and the circuit breaker"""
+    latency_ms = (time.perf_counter() - started) * 1000
+    if error is not None:
+        llm_metrics.record_error(latency_ms, error)
+        circuit_breaker.record_failure(_retry_after(error))
+    else:
+        llm_metrics.record_success(latency_ms, response)
+        circuit_breaker.record_success()
+
+def _store_response(key: str, content: str, progress_ids: list, json_mode: bool) -> str:
+    if json_mode:
+        json.loads(content)
+    llm_cache.set(key, content, progress_ids)
+    return content
+
+def _finish_request(key: str):
+    _in_flight.pop(key, None)
+    _executor_slots.release()
+
+def _complete(system_message: str, prompt: str, max_tokens: int, progress_ids: list, json_mode: bool = False, wait: bool = False, cached_only: bool = False) -> str:
+    """Get a chat completion, served from the response cache when the same request was made before.
+
+    In JSON mode the model is asked for a JSON object, and a response that does
+    not parse raises ValueError instead of being cached. With `wait`, the caller
+    waits for a free slot and for the answer instead of the latency budget, for
+    background work that no one is watching. With `cached_only`, a cache miss
+    raises NotCached instead of starting (or joining) a request.
+    """
+    key, arguments = _build_request(system_message, prompt, max_tokens, json_mode)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    if cached_only:
+        raise NotCached(key)
+    
+    def request() -> str:
+        started = time.perf_counter()
+        try:
+            response = backend.complete(arguments)
+        except Exception as e:
+            _record_call(started, error=e)
+            raise
+        _record_call(started, response)
+        return _store_response(key, response.content, progress_ids, json_mode)
+    
+    # Taken before the lock, so a caller waiting for a slot does not hold up the others
+    slot = _executor_slots.acquire(blocking=wait)
+    try:
+        # Identical requests already in flight are joined rather than sent again
+        with _in_flight_lock:
+            future = _in_flight.get(key)
+            if future is None:
+                if not slot:
+                    raise LLMOverloaded(f"All {LLM_MAX_IN_FLIGHT} LLM request slots are busy; serving fallback summaries")
+                _check_limits(arguments)
+                future = _executor.submit(request)
+                slot = False
+                _in_flight[key] = future
+                future.add_done_callback(lambda _: _finish_request(key))
+    finally:
+        # Released here unless the submitted request took it over
+        if slot:
+            _executor_slots.release()
     
-    if not OPENAI_AVAILABLE:
-        return generate_fallback_weekly_summary(current_week, previous_week, student_name)
+    try:
+        return future.result(timeout=None if wait else _latency_budget())
+    except FutureTimeoutError:
+        raise LatencyBudgetExceeded(f"No LLM response within {LLM_LATENCY_BUDGET_MS} ms")
+
+async def _acomplete(system_message: str, prompt: str, max_tokens: int, progress_ids: list, json_mode: bool = False) -> str:
+    """Async version of _complete, sharing the same response cache"""
+    key, arguments = _build_request(system_message, prompt, max_tokens, json_mode)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    loop = asyncio.get_running_loop()
+    state = _loop_states.get(loop)
+    if state is None:
+        state = _loop_states[loop] = _LoopState()
+    
+    async def request() -> str:
+        async with state.slots:
+            started = time.perf_counter()
+            try:
+                response = await backend.acomplete(arguments)
+            except Exception as e:
+                _record_call(started, error=e)
+                raise
+        _record_call(started, response)
+        return _store_response(key, response.content, progress_ids, json_mode)
+    
+    task = state.in_flight.get(key)
+    if task is None:
+        if state.slots.locked():
+            raise LLMOverloaded(f"All {LLM_MAX_IN_FLIGHT} LLM request slots are busy; serving fallback summaries")
+        _check_limits(arguments)
+        task = asyncio.ensure_future(request())
+        state.in_flight[key] = task
+        task.add_done_callback(lambda _: state.in_flight.pop(key, None))
     
+    try:
+        # Shielded so the request keeps running when the budget runs out
+        return await asyncio.wait_for(asyncio.shield(task), timeout=_latency_budget())
+    except asyncio.TimeoutError:
+        raise LatencyBudgetExceeded(f"No LLM response within {LLM_LATENCY_BUDGET_MS} ms")
+
+def get_llm_status() -> dict:
+    """Health of the LLM provider as seen by this process, for monitoring"""
+    return {
+        "available": LLM_AVAILABLE,
+        "backend": backend.name if backend else None,
+        "model": LLM_MODEL,
+        "circuit_breaker": circuit_breaker.state(),
+        "rate_limiter": rate_limiter.state(),
+        "in_flight": len(_in_flight) + sum(len(state.in_flight) for state in list(_loop_states.values())),
+        "max_in_flight": LLM_MAX_IN_FLIGHT,
+        "metrics": llm_metrics.snapshot()
+    }
+
+def _weekly_prompt(current_week: Progress, previous_week: Optional[Progress], student_name: str) -> str:
     prompt = f"""
     As a Quran memorization teacher, provide a constructive weekly progress summary for student {student_name}.
     
@@ -55,28 +291,15 @@ def generate_weekly_summary(current_week: Progress, previous_week: Optional[Prog
     
     Limit the summary to 2-3 paragraphs.
     """
-    
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an experienced Quran memorization teacher providing weekly progress feedback to students and parents."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        # Generate a fallback summary when AI is unavailable
-        return generate_fallback_weekly_summary(current_week, previous_week, student_name)
+    return prompt
 
-def generate_monthly_summary(weekly_summaries: list[WeeklySummary], student_name: str, month_start: date, month_end: date) -> str:
-    """Generate a natural language summary for monthly progress"""
-    
-    if not OPENAI_AVAILABLE:
-        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end)
-    
+def _weeks_in_month(weekly_summaries: List[WeeklySummary], month_start: date, month_end: date) -> int:
+    """Weeks of the month window that start on the same weekday as the student's weeks (4 or 5)"""
+    first_week = weekly_summaries[0].week_start if weekly_summaries else month_start
+    offset = (first_week.weekday() - month_start.weekday()) % 7
+    return ((month_end - month_start).days - offset) // 7 + 1
+
+def _monthly_prompt(weekly_summaries: List[WeeklySummary], student_name: str, month_start: date, month_end: date) -> str:
     total_new_ayahs = sum(ws.new_ayahs_count for ws in weekly_summaries)
     total_revision_pages = sum(ws.revision_pages_count for ws in weekly_summaries)
     attendance_weeks = len(weekly_summaries)
@@ -87,7 +310,7 @@ def generate_monthly_summary(weekly_summaries: list[WeeklySummary], student_name
     Monthly Statistics:
     - Total New Ayahs Memorized: {total_new_ayahs}
     - Total Revision Pages Covered: {total_revision_pages}
-    - Weeks of Attendance: {attendance_weeks}/4
+    - Weeks of Attendance: {attendance_weeks}/{_weeks_in_month(weekly_summaries, month_start, month_end)}
     """
     
     prompt += """
@@ -102,178 +325,196 @@ def generate_monthly_summary(weekly_summaries: list[WeeklySummary], student_name
     Focus on the monthly statistics and overall trends rather than weekly details.
     Keep the tone professional but encouraging. Limit to 3-4 paragraphs.
     """
+    return prompt
+
+def generate_weekly_summary(current_week: Progress, previous_week: Optional[Progress], student_name: str, wait: bool = False, cached_only: bool = False) -> Tuple[str, str]:
+    """Generate a natural language summary for weekly progress.
+
+    Returns the summary text and which variant it is (SUMMARY_SOURCE_AI or
+    SUMMARY_SOURCE_FALLBACK). With `wait`, the LLM is given as long as it
+    needs rather than the latency budget; with `cached_only`, only a cached
+    answer is used and the LLM is never called.
+    """
+    
+    if not LLM_AVAILABLE:
+        return generate_fallback_weekly_summary(current_week, previous_week, student_name), SUMMARY_SOURCE_FALLBACK
+    
+    prompt = _weekly_prompt(current_week, previous_week, student_name)
+    progress_ids = [getattr(current_week, "id", None), getattr(previous_week, "id", None)]
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an experienced Quran memorization teacher providing monthly progress reports to students and parents."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=800,
-            temperature=0.7
-        )
-        return response.choices[0].message.content
+        return _complete(WEEKLY_SYSTEM_MESSAGE, prompt, max_tokens=500, progress_ids=progress_ids, wait=wait, cached_only=cached_only), SUMMARY_SOURCE_AI
     except Exception as e:
-        # Generate a fallback summary when AI is unavailable
-        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end)
+        # Generate a fallback summary when AI is unavailable or slow
+        return generate_fallback_weekly_summary(current_week, previous_week, student_name), SUMMARY_SOURCE_FALLBACK
 
-def count_ayahs(text: str) -> int:
-    """Enhanced function to count ayahs mentioned in text"""
-    if not text:
-        return 0
+async def agenerate_weekly_summary(current_week: Progress, previous_week: Optional[Progress], student_name: str) -> Tuple[str, str]:
+    """Async version of generate_weekly_summary"""
     
-    import re
+    if not LLM_AVAILABLE:
+        return generate_fallback_weekly_summary(current_week, previous_week, student_name), SUMMARY_SOURCE_FALLBACK
     
-    count = 0
-    processed_positions = set()  # Track processed character positions to avoid double counting
+    prompt = _weekly_prompt(current_week, previous_week, student_name)
+    progress_ids = [getattr(current_week, "id", None), getattr(previous_week, "id", None)]
     
-    # First, handle ayah ranges: "Ayah 1-10", "Ayah 5-15", etc.
-    ayah_ranges = re.finditer(r'Ayah\s+(\d+)-(\d+)', text)
-    for match in ayah_ranges:
-        try:
-            start_num = int(match.group(1))
-            end_num = int(match.group(2))
-            if start_num <= end_num:
-                # Count the range: end - start + 1
-                range_count = end_num - start_num + 1
-                count += range_count
-                # Mark this range as processed
-                for i in range(match.start(), match.end()):
-                    processed_positions.add(i)
-        except ValueError:
-            continue
-    
-    # Then, handle single ayah references that are NOT part of ranges: "Ayah 5", "Ayah 10", etc.
-    single_ayahs = re.finditer(r'Ayah\s+(\d+)(?!\s*-\s*\d+)', text)
-    for match in single_ayahs:
-        # Check if this single ayah is not part of a processed range
-        if not any(pos in processed_positions for pos in range(match.start(), match.end())):
-            try:
-                ayah_num = int(match.group(1))
-                if ayah_num > 0:
-                    count += 1
-            except ValueError:
-                continue
-    
-    # Fallback: Look for old format ranges like "1-10", "5-15", etc. (without "Ayah" prefix)
-    if count == 0:
-        ranges = re.finditer(r'(\d+)-(\d+)', text)
-        for match in ranges:
-            # Check if this range is not part of a processed "Ayah X-Y" pattern
-            if not any(pos in processed_positions for pos in range(match.start(), match.end())):
-                try:
-                    start_num = int(match.group(1))
-                    end_num = int(match.group(2))
-                    if start_num <= end_num and end_num - start_num <= 50:  # Reasonable ayah range
-                        range_count = end_num - start_num + 1
-                        count += range_count
-                except ValueError:
-                    continue
-    
-    # Final fallback: Count single numbers (be more conservative)
-    if count == 0:
-        single_numbers = re.finditer(r'\b(\d+)\b', text)
-        for match in single_numbers:
-            # Check if this number is not part of a processed range
-            if not any(pos in processed_positions for pos in range(match.start(), match.end())):
-                try:
-                    num = int(match.group(1))
-                    if 1 <= num <= 20:  # Reasonable single ayah range
-                        count += 1
-                except ValueError:
-                    continue
-    
-    return count
+    try:
+        return await _acomplete(WEEKLY_SYSTEM_MESSAGE, prompt, max_tokens=500, progress_ids=progress_ids), SUMMARY_SOURCE_AI
+    except Exception as e:
+        # Generate a fallback summary when AI is unavailable or slow
+        return generate_fallback_weekly_summary(current_week, previous_week, student_name), SUMMARY_SOURCE_FALLBACK
 
-def generate_fallback_weekly_summary(current_week: Progress, previous_week: Optional[Progress], student_name: str) -> str:
-    """Generate a fallback weekly summary when AI is unavailable"""
+async def agenerate_weekly_summaries(weekly_summaries: List[WeeklySummary], student_name: str, max_concurrency: int = LLM_MAX_CONCURRENCY):
+    """Fill in the summary of each weekly summary, running up to `max_concurrency` requests at once"""
+    semaphore = asyncio.Semaphore(max_concurrency)
     
-    summary_parts = []
+    async def generate(ws: WeeklySummary):
+        async with semaphore:
+            ws.summary_text, ws.summary_source = await agenerate_weekly_summary(ws.current_week, ws.previous_week, student_name)
     
-    # Opening statement
-    summary_parts.append(f"Weekly Progress Summary for {student_name}")
-    summary_parts.append("=" * 50)
+    await asyncio.gather(*(generate(ws) for ws in weekly_summaries))
+
+def generate_monthly_summary(weekly_summaries: list[WeeklySummary], student_name: str, month_start: date, month_end: date, wait: bool = False) -> Tuple[str, str]:
+    """Generate a natural language summary for monthly progress, with its variant"""
     
-    # Current week progress
-    summary_parts.append(f"\nThis week's progress:")
-    if current_week.new_memorization:
-        summary_parts.append(f"• New Memorization: {current_week.new_memorization}")
-    if current_week.recent_revision:
-        summary_parts.append(f"• Recent Revision: {current_week.recent_revision}")
-    if current_week.old_revision:
-        summary_parts.append(f"• Old Revision: {current_week.old_revision}")
-    if current_week.teacher_notes:
-        summary_parts.append(f"• Teacher Notes: {current_week.teacher_notes}")
+    if not LLM_AVAILABLE:
+        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end), SUMMARY_SOURCE_FALLBACK
     
-    # Comparison with previous week if available
-    if previous_week:
-        summary_parts.append(f"\nComparison with previous week:")
-        if previous_week.new_memorization and current_week.new_memorization:
-            summary_parts.append(f"• Previous week new memorization: {previous_week.new_memorization}")
-        if previous_week.recent_revision and current_week.recent_revision:
-            summary_parts.append(f"• Previous week recent revision: {previous_week.recent_revision}")
+    prompt = _monthly_prompt(weekly_summaries, student_name, month_start, month_end)
+    progress_ids = [getattr(ws.current_week, "id", None) for ws in weekly_summaries]
     
-    # Encouragement and recommendations
-    summary_parts.append(f"\nKeep up the good work, {student_name}! Continue practicing regularly and maintain consistency in your memorization schedule.")
+    try:
+        return _complete(MONTHLY_SYSTEM_MESSAGE, prompt, max_tokens=800, progress_ids=progress_ids, wait=wait), SUMMARY_SOURCE_AI
+    except Exception as e:
+        # Generate a fallback summary when AI is unavailable or slow
+        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end), SUMMARY_SOURCE_FALLBACK
+
+async def agenerate_monthly_summary(weekly_summaries: List[WeeklySummary], student_name: str, month_start: date, month_end: date) -> Tuple[str, str]:
+    """Async version of generate_monthly_summary"""
     
-    if current_week.new_memorization:
-        summary_parts.append("Focus on perfecting the new material you've learned this week.")
-    if current_week.recent_revision:
-        summary_parts.append("Continue reviewing your recent memorization to ensure retention.")
-    if current_week.old_revision:
-        summary_parts.append("Maintain your old revision schedule to keep previously memorized portions fresh.")
+    if not LLM_AVAILABLE:
+        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end), SUMMARY_SOURCE_FALLBACK
     
-    summary_parts.append("\nMay Allah bless your efforts in memorizing the Quran. Ameen.")
+    prompt = _monthly_prompt(weekly_summaries, student_name, month_start, month_end)
+    progress_ids = [getattr(ws.current_week, "id", None) for ws in weekly_summaries]
     
-    return "\n".join(summary_parts)
+    try:
+        return await _acomplete(MONTHLY_SYSTEM_MESSAGE, prompt, max_tokens=800, progress_ids=progress_ids), SUMMARY_SOURCE_AI
+    except Exception as e:
+        # Generate a fallback summary when AI is unavailable or slow
+        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end), SUMMARY_SOURCE_FALLBACK
 
-def generate_fallback_monthly_summary(weekly_summaries: list[WeeklySummary], student_name: str, month_start: date, month_end: date) -> str:
-    """Generate a fallback monthly summary when AI is unavailable"""
+def generate_monthly_summaries(weekly_summaries: List[WeeklySummary], student_name: str, month_start: date, month_end: date, wait: bool = False, cached_only: bool = False) -> Tuple[str, str]:
+    """Generate every weekly summary of a month and the monthly summary in a single request.
+
+    Fills in the summary of each weekly summary and returns the monthly
+    summary with its variant. The weeks are listed once in the prompt (each week doubles as the
+    previous week of the next), and the model answers with a JSON object that
+    is split into sections; any section missing from the answer falls back to
+    the template summary on its own. `wait` and `cached_only` are as for
+    generate_weekly_summary.
+    """
+    
+    def fill_missing_weeks(paragraphs: dict):
+        for ws in weekly_summaries:
+            text = paragraphs.get(str(ws.week_start))
+            if isinstance(text, str) and text.strip():
+                ws.summary_text, ws.summary_source = text, SUMMARY_SOURCE_AI
+            else:
+                ws.summary_text = generate_fallback_weekly_summary(ws.current_week, ws.previous_week, student_name)
+                ws.summary_source = SUMMARY_SOURCE_FALLBACK
+    
+    if not LLM_AVAILABLE or not weekly_summaries:
+        fill_missing_weeks({})
+        return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end), SUMMARY_SOURCE_FALLBACK
     
     total_new_ayahs = sum(ws.new_ayahs_count for ws in weekly_summaries)
     total_revision_pages = sum(ws.revision_pages_count for ws in weekly_summaries)
     attendance_weeks = len(weekly_summaries)
     
-    summary_parts = []
-    
-    # Header
-    summary_parts.append(f"Monthly Progress Summary for {student_name}")
-    summary_parts.append(f"Period: {month_start.strftime('%B %d, %Y')} to {month_end.strftime('%B %d, %Y')}")
-    summary_parts.append("=" * 60)
-    
-    # Monthly statistics
-    summary_parts.append(f"\nMonthly Statistics:")
-    summary_parts.append(f"• Total New Ayahs Memorized: {total_new_ayahs}")
-    summary_parts.append(f"• Total Revision Pages Covered: {total_revision_pages}")
-    summary_parts.append(f"• Weeks of Attendance: {attendance_weeks}/4")
-    summary_parts.append(f"• Attendance Rate: {((attendance_weeks/4)*100):.1f}%")
+    prompt = f"""
+    As a Quran memorization teacher, write progress feedback for student {student_name} for the period {month_start} to {month_end}.
+    """
     
+    first_previous = weekly_summaries[0].previous_week
+    if first_previous:
+        prompt += f"""
+        Week before the period ({first_previous.week_start}, for comparison only):
+        - New Memorization: {first_previous.new_memorization}
+        - Recent Revision: {first_previous.recent_revision}
+        - Old Revision: {first_previous.old_revision}
+        - Teacher Notes: {first_previous.teacher_notes}
+        """
     
-    # Overall assessment
-    summary_parts.append(f"\nOverall Assessment:")
-    if attendance_weeks >= 3:
-        summary_parts.append(f"Excellent attendance this month! {student_name} has been very consistent.")
-    elif attendance_weeks >= 2:
-        summary_parts.append(f"Good attendance this month. {student_name} has been mostly consistent.")
-    else:
-        summary_parts.append(f"Attendance could be improved. Let's work on being more consistent next month.")
+    for ws in weekly_summaries:
+        week = ws.current_week
+        prompt += f"""
+        Week of {ws.week_start}:
+        - New Memorization: {week.new_memorization}
+        - Recent Revision: {week.recent_revision}
+        - Old Revision: {week.old_revision}
+        - Teacher Notes: {week.teacher_notes}
+        """
     
-    if total_new_ayahs > 0:
-        summary_parts.append(f"Great progress in memorization with {total_new_ayahs} new ayahs learned!")
+    prompt += f"""
+    Monthly Statistics:
+    - Total New Ayahs Memorized: {total_new_ayahs}
+    - Total Revision Pages Covered: {total_revision_pages}
+    - Weeks of Attendance: {attendance_weeks}/{_weeks_in_month(weekly_summaries, month_start, month_end)}
     
-    if total_revision_pages > 0:
-        summary_parts.append(f"Good revision work with {total_revision_pages} pages covered.")
+    Respond with a JSON object with two keys:
+    - "weekly": an object mapping each week's date (YYYY-MM-DD) to one paragraph comparing it with the week before, noting improvements, concerns and a recommendation for the next week
+    - "monthly": a 2-3 paragraph monthly summary covering overall progress, consistency, strengths, areas needing improvement and recommendations for next month
     
-    # Recommendations
-    summary_parts.append(f"\nRecommendations for next month:")
-    summary_parts.append(f"• Continue the current pace of memorization")
-    summary_parts.append(f"• Maintain regular revision schedule")
-    summary_parts.append(f"• Focus on quality over quantity")
-    summary_parts.append(f"• Practice with proper tajweed")
+    Keep the tone professional but encouraging.
+    """
     
-    # Encouragement
-    summary_parts.append(f"\nKeep up the excellent work, {student_name}! Your dedication to memorizing the Quran is commendable.")
-    summary_parts.append(f"May Allah bless your efforts and make this journey easy for you. Ameen.")
+    progress_ids = [getattr(ws.current_week, "id", None) for ws in weekly_summaries]
+    progress_ids.append(getattr(first_previous, "id", None))
     
-    return "\n".join(summary_parts)
\ No newline at end of file
+    try:
+        sections = json.loads(_complete(
+            "You are an experienced Quran memorization teacher providing weekly and monthly progress feedback to students and parents.",
+            prompt,
+            max_tokens=BATCH_TOKENS_PER_WEEK * len(weekly_summaries) + BATCH_MONTHLY_TOKENS,
+            progress_ids=progress_ids,
+            json_mode=True,
+            wait=wait,
+            cached_only=cached_only
+        ))
+    except ValueError as e:
+        # A reply that is not JSON; every section falls back to its template
+        print(f"Unparseable batched summary reply for {student_name}: {e}")
+        sections = {}
+    except Exception:
+        sections = {}
+    if not isinstance(sections, dict):
+        sections = {}
+    
+    weekly = sections.get("weekly")
+    fill_missing_weeks(weekly if isinstance(weekly, dict) else {})
+    
+    monthly = sections.get("monthly")
+    if isinstance(monthly, str) and monthly.strip():
+        return monthly, SUMMARY_SOURCE_AI
+    return generate_fallback_monthly_summary(weekly_summaries, student_name, month_start, month_end), SUMMARY_SOURCE_FALLBACK
+
+def generate_fallback_weekly_summary(current_week: Progress, previous_week: Optional[Progress], student_name: str) -> str:
+    """Generate a fallback weekly summary when AI is unavailable"""
+    return render_message(
+        "fallback_weekly_summary",
+        current_week=current_week,
+        previous_week=previous_week,
+        student_name=student_name
+    )
+
+def generate_fallback_monthly_summary(weekly_summaries: list[WeeklySummary], student_name: str, month_start: date, month_end: date) -> str:
+    """Generate a fallback monthly summary when AI is unavailable"""
+    return render_message(
+        "fallback_monthly_summary",
+        student_name=student_name,
+        month_start=month_start,
+        month_end=month_end,
+        total_new_ayahs=sum(ws.new_ayahs_count for ws in weekly_summaries),
+        total_revision_pages=sum(ws.revision_pages_count for ws in weekly_summaries),
+        attendance_weeks=len(weekly_summaries)
+    )
@@ -7,7 +7,8 @@ import os
 from dotenv import load_dotenv
 
 from database import engine, Base
-from routers import students, progress, summaries, reports
+from routers import students, progress, summaries, reports, coverage
+from report_jobs import start_report_workers
 
 # Load environment variables
 load_dotenv()
@@ -35,12 +36,18 @@ app.include_router(students.router, prefix="/api/students", tags=["students"])
 app.include_router(progress.router, prefix="/api/progress", tags=["progress"])
 app.include_router(summaries.router, prefix="/api/summaries", tags=["summaries"])
 app.include_router(reports.router, prefix="/api/reports", tags=["reports"])
+app.include_router(coverage.router, prefix="/api/coverage", tags=["coverage"])
 
 # Serve static files (for React build) - only if directory exists
 import os
 if os.path.exists("frontend/build/static"):
     app.mount("/static", StaticFiles(directory="frontend/build/static"), name="static")
 
+@app.on_event("startup")
+def resume_report_jobs():
+    # Pick up report jobs left queued by a previous run
+    start_report_workers()
+
 @app.get("/")
 async def root():
     return {"message": "Quran Memorization Tracker API"}
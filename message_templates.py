@@ -0,0 +1,150 @@
+"""
+Plain-text templates for fallback summaries and WhatsApp messages.
+
+The templates are compiled once at import and rendered with `render_message`,
+so bulk reports and class-wide broadcasts only pay for filling in the values.
+"""
+
+from typing import Any
+from jinja2 import DictLoader, Environment, StrictUndefined
+
+FALLBACK_WEEKLY_SUMMARY = """\
+Weekly Progress Summary for {{ student_name }}
+{{ "=" * 50 }}
+
+This week's progress:
+{% if current_week.new_memorization %}
+• New Memorization: {{ current_week.new_memorization }}
+{% endif %}
+{% if current_week.recent_revision %}
+• Recent Revision: {{ current_week.recent_revision }}
+{% endif %}
+{% if current_week.old_revision %}
+• Old Revision: {{ current_week.old_revision }}
+{% endif %}
+{% if current_week.teacher_notes %}
+• Teacher Notes: {{ current_week.teacher_notes }}
+{% endif %}
+{% if previous_week %}
+
+Comparison with previous week:
+{% if previous_week.new_memorization and current_week.new_memorization %}
+• Previous week new memorization: {{ previous_week.new_memorization }}
+{% endif %}
+{% if previous_week.recent_revision and current_week.recent_revision %}
+• Previous week recent revision: {{ previous_week.recent_revision }}
+{% endif %}
+{% endif %}
+
+Keep up the good work, {{ student_name }}! Continue practicing regularly and maintain consistency in your memorization schedule.
+{% if current_week.new_memorization %}
+Focus on perfecting the new material you've learned this week.
+{% endif %}
+{% if current_week.recent_revision %}
+Continue reviewing your recent memorization to ensure retention.
+{% endif %}
+{% if current_week.old_revision %}
+Maintain your old revision schedule to keep previously memorized portions fresh.
+{% endif %}
+
+May Allah bless your efforts in memorizing the Quran. Ameen.
+"""
+
+FALLBACK_MONTHLY_SUMMARY = """\
+Monthly Progress Summary for {{ student_name }}
+Period: {{ month_start.strftime('%B %d, %Y') }} to {{ month_end.strftime('%B %d, %Y') }}
+{{ "=" * 60 }}
+
+Monthly Statistics:
+• Total New Ayahs Memorized: {{ total_new_ayahs }}
+• Total Revision Pages Covered: {{ total_revision_pages }}
+• Weeks of Attendance: {{ attendance_weeks }}/4
+• Attendance Rate: {{ "%.1f" | format(attendance_weeks / 4 * 100) }}%
+
+Overall Assessment:
+{% if attendance_weeks >= 3 %}
+Excellent attendance this month! {{ student_name }} has been very consistent.
+{% elif attendance_weeks >= 2 %}
+Good attendance this month. {{ student_name }} has been mostly consistent.
+{% else %}
+Attendance could be improved. Let's work on being more consistent next month.
+{% endif %}
+{% if total_new_ayahs > 0 %}
+Great progress in memorization with {{ total_new_ayahs }} new ayahs learned!
+{% endif %}
+{% if total_revision_pages > 0 %}
+Good revision work with {{ total_revision_pages }} pages covered.
+{% endif %}
+
+Recommendations for next month:
+• Continue the current pace of memorization
+• Maintain regular revision schedule
+• Focus on quality over quantity
+• Practice with proper tajweed
+
+Keep up the excellent work, {{ student_name }}! Your dedication to memorizing the Quran is commendable.
+May Allah bless your efforts and make this journey easy for you. Ameen.
+"""
+
+WHATSAPP_WEEKLY_REPORT = """\
+📚 *Weekly Quran Progress Report*
+
+Assalamu Alaikum {{ student_name }},
+
+Here's your weekly progress summary:
+
+📊 *This Week's Progress:*
+• New Memorization: {{ report_data.get('new_memorization', 'N/A') }}
+• Recent Revision: {{ report_data.get('recent_revision', 'N/A') }}
+• Old Revision: {{ report_data.get('old_revision', 'N/A') }}
+• Teacher Notes: {{ report_data.get('teacher_notes', 'N/A') }}
+
+📈 *Summary:*
+{{ report_data.get('summary_text', 'No summary available') }}
+
+Keep up the excellent work! May Allah bless your efforts in memorizing the Quran. Ameen.
+
+---
+*Generated by Quran Progress Tracker*
+"""
+
+WHATSAPP_REPORT_READY = """\
+📚 *Weekly Quran Progress Report*
+
+Assalamu Alaikum {{ student_name }},
+
+Your weekly progress report is ready!
+
+📊 *Report Summary:*
+• Student: {{ student_name }}
+• Report Type: Weekly Progress
+• Generated: {{ generated_at.strftime('%a %b %d %H:%M:%S %Z %Y') }}
+
+📄 The detailed PDF report is attached below.
+
+May Allah bless your efforts in memorizing the Quran. Ameen.
+
+---
+*Generated by Quran Progress Tracker*
+"""
+
+_environment = Environment(
+    loader=DictLoader({
+        "fallback_weekly_summary": FALLBACK_WEEKLY_SUMMARY,
+        "fallback_monthly_summary": FALLBACK_MONTHLY_SUMMARY,
+        "whatsapp_weekly_report": WHATSAPP_WEEKLY_REPORT,
+        "whatsapp_report_ready": WHATSAPP_REPORT_READY,
+    }),
+    # Plain text: no HTML escaping, and block tags do not leave blank lines behind
+    autoescape=False,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    undefined=StrictUndefined
+)
+
+# Compiled once here; render_message only fills in the values
+TEMPLATES = {name: _environment.get_template(name) for name in _environment.list_templates()}
+
+def render_message(name: str, **context: Any) -> str:
+    """Render one of the message templates"""
+    return TEMPLATES[name].render(**context)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Database migration commands for existing deployments.
+
+`Base.metadata.create_all` only creates missing tables, so indexes and columns
+added to existing tables need to be applied with this script:
+
+    python migrate.py all      # or one of: index, ranges, counts, coverage, reports
+"""
+
+import argparse
+import sys
+from sqlalchemy import text, inspect
+
+from database import engine, SessionLocal, Student, Progress, ProgressAyahRange, StudentCoverage, Report
+from progress_history import sync_ayah_ranges, sync_progress_counts
+from coverage import rebuild_student_coverage
+from report_cache import index_cached_reports
+
+PROGRESS_STUDENT_WEEK_INDEX = "ix_progress_student_week"
+
+def find_duplicate_weeks(conn) -> list:
+    """Find (student_id, week_start) pairs that have more than one progress entry"""
+    return conn.execute(text(
+        "SELECT student_id, week_start, COUNT(*) AS entries FROM progress "
+        "GROUP BY student_id, week_start HAVING COUNT(*) > 1 "
+        "ORDER BY student_id, week_start"
+    )).fetchall()
+
+def create_student_week_index() -> bool:
+    """Build the unique (student_id, week_start) index on the progress table.
+
+    On PostgreSQL the index is built with CREATE INDEX CONCURRENTLY so reads and
+    writes continue while it builds. SQLite has no concurrent build; the index is
+    created in a single short transaction.
+    """
+    with engine.connect() as conn:
+        duplicates = find_duplicate_weeks(conn)
+    if duplicates:
+        print(f"❌ Found {len(duplicates)} student/week pairs with more than one progress entry:")
+        for student_id, week_start, entries in duplicates:
+            print(f"   - student {student_id}, week {week_start}: {entries} entries")
+        print("💡 Merge or delete the duplicate entries, then run this command again.")
+        return False
+
+    if engine.dialect.name == "postgresql":
+        # Concurrent index builds cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            # An interrupted concurrent build leaves an invalid index behind
+            is_valid = conn.execute(text(
+                "SELECT i.indisvalid FROM pg_index i "
+                "JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+            ), {"name": PROGRESS_STUDENT_WEEK_INDEX}).scalar()
+            if is_valid is False:
+                print("🔄 Dropping invalid index left by an interrupted build...")
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {PROGRESS_STUDENT_WEEK_INDEX}"))
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {PROGRESS_STUDENT_WEEK_INDEX} "
+                "ON progress (student_id, week_start)"
+            ))
+    else:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS {PROGRESS_STUDENT_WEEK_INDEX} "
+                "ON progress (student_id, week_start)"
+            ))
+
+    print(f"✅ Index {PROGRESS_STUDENT_WEEK_INDEX} is in place")
+    return True
+
+def add_progress_columns():
+    """Add columns declared on Progress that are missing from an existing progress table"""
+    existing_columns = {column["name"] for column in inspect(engine).get_columns("progress")}
+    with engine.begin() as conn:
+        for column in Progress.__table__.columns:
+            if column.name not in existing_columns:
+                print(f"🔄 Adding column progress.{column.name}...")
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE progress ADD COLUMN {column.name} {column_type}"))
+
+def _backfill_progress(update, description: str, batch_size: int = 500):
+    """Apply `update` to every progress entry, committing in batches"""
+    add_progress_columns()
+
+    db = SessionLocal()
+    processed = 0
+    try:
+        last_id = 0
+        while True:
+            batch = db.query(Progress).filter(Progress.id > last_id).order_by(Progress.id).limit(batch_size).all()
+            if not batch:
+                break
+            for progress in batch:
+                update(progress)
+            last_id = batch[-1].id
+            db.commit()
+            processed += len(batch)
+            db.expunge_all()
+            print(f"🔄 {description}: {processed} progress entries...")
+    finally:
+        db.close()
+    return processed
+
+def backfill_ayah_ranges() -> bool:
+    """Parse the memorization fields of every existing progress entry into ayah range rows"""
+    ProgressAyahRange.__table__.create(bind=engine, checkfirst=True)
+
+    processed = _backfill_progress(sync_ayah_ranges, "Parsing ayah ranges")
+    print(f"✅ Ayah ranges backfilled for {processed} progress entries")
+    return True
+
+def backfill_progress_counts() -> bool:
+    """Add the stored count columns to the progress table and fill them for existing entries"""
+    processed = _backfill_progress(sync_progress_counts, "Counting")
+    print(f"✅ Counts backfilled for {processed} progress entries")
+    return True
+
+def backfill_student_coverage() -> bool:
+    """Build the coverage bitmaps of every student from their stored ayah ranges"""
+    StudentCoverage.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        student_ids = [student_id for student_id, in db.query(Student.id).order_by(Student.id)]
+        for student_id in student_ids:
+            rebuild_student_coverage(db, student_id)
+            db.commit()
+    finally:
+        db.close()
+
+    print(f"✅ Coverage rebuilt for {len(student_ids)} students")
+    return True
+
+def backfill_reports() -> bool:
+    """Record the PDFs already in the report cache directory in the reports table"""
+    Report.__table__.create(bind=engine, checkfirst=True)
+
+    db = SessionLocal()
+    try:
+        added = index_cached_reports(db)
+    finally:
+        db.close()
+
+    print(f"✅ {added} cached reports recorded")
+    return True
+
+# Migrations in the order `all` applies them
+MIGRATIONS = {
+    "index": create_student_week_index,
+    "ranges": backfill_ayah_ranges,
+    "counts": backfill_progress_counts,
+    "coverage": backfill_student_coverage,
+    "reports": backfill_reports,
+}
+
+def run_all() -> bool:
+    """Apply every migration in order, stopping at the first failure"""
+    return all(migration() for migration in MIGRATIONS.values())
+
+COMMANDS = {**MIGRATIONS, "all": run_all}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database migrations to an existing database")
+    parser.add_argument("command", choices=sorted(COMMANDS), help="Migration to apply")
+    args = parser.parse_args()
+
+    print(f"🗄️  Database: {engine.dialect.name}")
+    sys.exit(0 if COMMANDS[args.command]() else 1)
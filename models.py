@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Dict, Optional
 from datetime import date
 
 # Student schemas
@@ -92,6 +92,7 @@ class WeeklySummary(BaseModel):
     current_week: Progress
     previous_week: Optional[Progress] = None
     summary_text: str
+    summary_source: str = "ai"  # "ai", or "fallback" when the AI summary was unavailable or too slow
     new_ayahs_count: int
     revision_pages_count: int
 
@@ -103,4 +104,86 @@ class MonthlySummary(BaseModel):
     total_revision_pages: int
     attendance_weeks: int
     summary_text: str
-    weekly_breakdown: list[WeeklySummary]
\ No newline at end of file
+    summary_source: str = "ai"
+    weekly_breakdown: list[WeeklySummary]
+
+# Report job schemas
+class ReportJobCreate(BaseModel):
+    type: str  # weekly, monthly
+    student_id: int
+    period_start: Optional[date] = None  # Week or month start; the latest one when empty
+
+class ReportJob(BaseModel):
+    id: str
+    type: str
+    student_id: int
+    period_start: Optional[date] = None
+    status: str  # queued, running, done, failed
+    attempts: int
+    error: Optional[str] = None
+    filename: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
+
+# Coverage schemas
+class CategoryCoverage(BaseModel):
+    ayahs: int
+    percentage: float
+
+class StudentCoverage(BaseModel):
+    student_id: int
+    student_name: str
+    total_ayahs: int
+    coverage: Dict[str, CategoryCoverage]
+
+class SurahCoverage(BaseModel):
+    number: int
+    name: str
+    total_ayahs: int
+    coverage: Dict[str, CategoryCoverage]
+
+class JuzCoverage(BaseModel):
+    number: int
+    name: str
+    total_ayahs: int
+    coverage: Dict[str, CategoryCoverage]
+    stale: bool
+
+# WhatsApp schemas
+class WhatsAppBroadcast(BaseModel):
+    class_day: str
+    week_start: Optional[date] = None  # The latest week of each student when empty
+    phone_numbers: Dict[int, str]  # Student id to phone number with country code
+
+class WhatsAppDelivery(BaseModel):
+    student_id: int
+    student_name: str
+    phone_number: Optional[str] = None
+    status: str  # sent, failed, skipped
+    attempts: int = 0
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+
+class WhatsAppBroadcastResult(BaseModel):
+    sent: int
+    failed: int
+    skipped: int
+    deliveries: list[WhatsAppDelivery]
+
+class WhatsAppOutboxMessage(BaseModel):
+    id: int
+    idempotency_key: str
+    student_id: Optional[int] = None
+    to_phone: str
+    status: str  # queued, sending, sent, failed
+    attempts: int
+    parts_sent: int
+    error: Optional[str] = None
+    created_at: float
+    finished_at: Optional[float] = None
+    
+    class Config:
+        from_attributes = True
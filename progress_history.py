@@ -0,0 +1,87 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from datetime import date, timedelta
+
+from database import Progress, ProgressAyahRange
+from ayah_ranges import AyahRange, PROGRESS_RANGE_FIELDS, parse_ayah_ranges, merge_ayah_ranges, count_ayah_ranges, count_pages
+
+WEEK = timedelta(days=7)
+
+def get_week_window(db: Session, student_id: int, window_start: date, window_end: date) -> List[Tuple[Progress, Optional[Progress]]]:
+    """Load a student's progress entries for a window of weeks, each paired with its previous week.
+
+    The window is fetched together with the week before it in a single query,
+    and the previous-week lookups are resolved in memory.
+    """
+    entries = db.query(Progress).filter(
+        Progress.student_id == student_id,
+        Progress.week_start >= window_start - WEEK,
+        Progress.week_start <= window_end
+    ).order_by(Progress.week_start).all()
+
+    entries_by_week = {entry.week_start: entry for entry in entries}
+
+    return [
+        (entry, entries_by_week.get(entry.week_start - WEEK))
+        for entry in entries
+        if entry.week_start >= window_start
+    ]
+
+def get_latest_week_start(db: Session, student_id: int) -> Optional[date]:
+    """Get the most recent week_start recorded for a student"""
+    latest_progress = db.query(Progress.week_start).filter(
+        Progress.student_id == student_id
+    ).order_by(Progress.week_start.desc()).first()
+    return latest_progress.week_start if latest_progress else None
+
+def week_has_progress(db: Session, student_id: int, week_start: date) -> bool:
+    """Check whether a student already has a progress entry for a week"""
+    return db.query(Progress.id).filter(
+        Progress.student_id == student_id,
+        Progress.week_start == week_start
+    ).first() is not None
+
+def parse_progress_ranges(progress: Progress) -> Dict[str, List[AyahRange]]:
+    """Parse each memorization field of a progress entry into merged ayah ranges"""
+    return {
+        field: merge_ayah_ranges(parse_ayah_ranges(getattr(progress, field)))
+        for field in PROGRESS_RANGE_FIELDS
+    }
+
+def _count_progress(ranges_by_field: Dict[str, List[AyahRange]]) -> Tuple[int, int]:
+    """Distinct new ayahs, and distinct mushaf pages touched by recent and old revision"""
+    new_ayahs_count = count_ayah_ranges(ranges_by_field["new_memorization"])
+    revision_pages_count = count_pages(ranges_by_field["recent_revision"] + ranges_by_field["old_revision"])
+    return new_ayahs_count, revision_pages_count
+
+def sync_ayah_ranges(progress: Progress, ranges_by_field: Optional[Dict[str, List[AyahRange]]] = None):
+    """Re-parse a progress entry's memorization fields into its ayah range rows"""
+    if ranges_by_field is None:
+        ranges_by_field = parse_progress_ranges(progress)
+    progress.ayah_ranges = [
+        ProgressAyahRange(category=field, surah=ayah_range.surah, start_ayah=ayah_range.start_ayah, end_ayah=ayah_range.end_ayah)
+        for field, ranges in ranges_by_field.items()
+        for ayah_range in ranges
+    ]
+
+def sync_progress_counts(progress: Progress, ranges_by_field: Optional[Dict[str, List[AyahRange]]] = None):
+    """Recompute the stored ayah/page counts of a progress entry from its memorization text"""
+    if ranges_by_field is None:
+        ranges_by_field = parse_progress_ranges(progress)
+    progress.new_ayahs_count, progress.revision_pages_count = _count_progress(ranges_by_field)
+
+def sync_parsed_fields(progress: Progress):
+    """Refresh everything derived from a progress entry's memorization text"""
+    ranges_by_field = parse_progress_ranges(progress)
+    sync_ayah_ranges(progress, ranges_by_field)
+    sync_progress_counts(progress, ranges_by_field)
+
+def get_progress_counts(progress: Progress) -> Tuple[int, int]:
+    """Get (new_ayahs_count, revision_pages_count) for a progress entry.
+
+    Entries written before the count columns existed are counted on the fly
+    until `python migrate.py counts` has backfilled them.
+    """
+    if progress.new_ayahs_count is None or progress.revision_pages_count is None:
+        return _count_progress(parse_progress_ranges(progress))
+    return progress.new_ayahs_count, progress.revision_pages_count
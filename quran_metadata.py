@@ -0,0 +1,291 @@
+"""
+Static Quran metadata shared by the backend.
+
+Mirrors the surah and juz lists the frontend keeps in frontend/src/data/surahs.js
+and frontend/src/data/juz.js.
+"""
+
+import re
+from array import array
+from functools import lru_cache
+from itertools import accumulate
+from typing import Optional
+
+# (number, name, ayah count) for all 114 surahs
+SURAHS = [
+    (1, "Al-Fatihah", 7),
+    (2, "Al-Baqarah", 286),
+    (3, "Al-Imran", 200),
+    (4, "An-Nisa", 176),
+    (5, "Al-Maidah", 120),
+    (6, "Al-An'am", 165),
+    (7, "Al-A'raf", 206),
+    (8, "Al-Anfal", 75),
+    (9, "At-Tawbah", 129),
+    (10, "Yunus", 109),
+    (11, "Hud", 123),
+    (12, "Yusuf", 111),
+    (13, "Ar-Ra'd", 43),
+    (14, "Ibrahim", 52),
+    (15, "Al-Hijr", 99),
+    (16, "An-Nahl", 128),
+    (17, "Al-Isra", 111),
+    (18, "Al-Kahf", 110),
+    (19, "Maryam", 98),
+    (20, "Taha", 135),
+    (21, "Al-Anbiya", 112),
+    (22, "Al-Hajj", 78),
+    (23, "Al-Mu'minun", 118),
+    (24, "An-Nur", 64),
+    (25, "Al-Furqan", 77),
+    (26, "Ash-Shu'ara", 227),
+    (27, "An-Naml", 93),
+    (28, "Al-Qasas", 88),
+    (29, "Al-Ankabut", 69),
+    (30, "Ar-Rum", 60),
+    (31, "Luqman", 34),
+    (32, "As-Sajdah", 30),
+    (33, "Al-Ahzab", 73),
+    (34, "Saba", 54),
+    (35, "Fatir", 45),
+    (36, "Ya-Sin", 83),
+    (37, "As-Saffat", 182),
+    (38, "Sad", 88),
+    (39, "Az-Zumar", 75),
+    (40, "Ghafir", 85),
+    (41, "Fussilat", 54),
+    (42, "Ash-Shura", 53),
+    (43, "Az-Zukhruf", 89),
+    (44, "Ad-Dukhan", 59),
+    (45, "Al-Jathiyah", 37),
+    (46, "Al-Ahqaf", 35),
+    (47, "Muhammad", 38),
+    (48, "Al-Fath", 29),
+    (49, "Al-Hujurat", 18),
+    (50, "Qaf", 45),
+    (51, "Adh-Dhariyat", 60),
+    (52, "At-Tur", 49),
+    (53, "An-Najm", 62),
+    (54, "Al-Qamar", 55),
+    (55, "Ar-Rahman", 78),
+    (56, "Al-Waqi'ah", 96),
+    (57, "Al-Hadid", 29),
+    (58, "Al-Mujadilah", 22),
+    (59, "Al-Hashr", 24),
+    (60, "Al-Mumtahanah", 13),
+    (61, "As-Saff", 14),
+    (62, "Al-Jumu'ah", 11),
+    (63, "Al-Munafiqun", 11),
+    (64, "At-Taghabun", 18),
+    (65, "At-Talaq", 12),
+    (66, "At-Tahrim", 12),
+    (67, "Al-Mulk", 30),
+    (68, "Al-Qalam", 52),
+    (69, "Al-Haqqah", 52),
+    (70, "Al-Ma'arij", 44),
+    (71, "Nuh", 28),
+    (72, "Al-Jinn", 28),
+    (73, "Al-Muzzammil", 20),
+    (74, "Al-Muddaththir", 56),
+    (75, "Al-Qiyamah", 40),
+    (76, "Al-Insan", 31),
+    (77, "Al-Mursalat", 50),
+    (78, "An-Naba", 40),
+    (79, "An-Nazi'at", 46),
+    (80, "Abasa", 42),
+    (81, "At-Takwir", 29),
+    (82, "Al-Infitar", 19),
+    (83, "Al-Mutaffifin", 36),
+    (84, "Al-Inshiqaq", 25),
+    (85, "Al-Buruj", 22),
+    (86, "At-Tariq", 17),
+    (87, "Al-A'la", 19),
+    (88, "Al-Ghashiyah", 26),
+    (89, "Al-Fajr", 30),
+    (90, "Al-Balad", 20),
+    (91, "Ash-Shams", 15),
+    (92, "Al-Layl", 21),
+    (93, "Ad-Duha", 11),
+    (94, "Ash-Sharh", 8),
+    (95, "At-Tin", 8),
+    (96, "Al-Alaq", 19),
+    (97, "Al-Qadr", 5),
+    (98, "Al-Bayyinah", 8),
+    (99, "Az-Zalzalah", 8),
+    (100, "Al-Adiyat", 11),
+    (101, "Al-Qari'ah", 11),
+    (102, "At-Takathur", 8),
+    (103, "Al-Asr", 3),
+    (104, "Al-Humazah", 9),
+    (105, "Al-Fil", 5),
+    (106, "Quraysh", 4),
+    (107, "Al-Ma'un", 7),
+    (108, "Al-Kawthar", 3),
+    (109, "Al-Kafirun", 6),
+    (110, "An-Nasr", 3),
+    (111, "Al-Masad", 5),
+    (112, "Al-Ikhlas", 4),
+    (113, "Al-Falaq", 5),
+    (114, "An-Nas", 6),
+]
+
+SURAH_COUNT = len(SURAHS)
+TOTAL_AYAHS = sum(ayahs for _, _, ayahs in SURAHS)
+
+# Ayah count per surah, indexed by surah number (index 0 is unused)
+SURAH_AYAH_COUNTS = [0] + [ayahs for _, _, ayahs in SURAHS]
+
+# Position of each surah's first ayah when all 6,236 ayahs are numbered from 0,
+# indexed by surah number (index 0 is unused)
+SURAH_OFFSETS = [0] + list(accumulate(SURAH_AYAH_COUNTS[:-1]))
+
+def ayah_index(surah: int, ayah: int) -> int:
+    """Position of an ayah in the whole Quran, counting from 0"""
+    return SURAH_OFFSETS[surah] + ayah - 1
+
+# (number, name, start surah, start ayah) for all 30 juz
+JUZ = [
+    (1, "Alif Lam Meem", 1, 1),
+    (2, "Sayaqool", 2, 142),
+    (3, "Tilkal Rusul", 2, 253),
+    (4, "Lan Tana Loo", 3, 93),
+    (5, "Wal Mohsanat", 4, 24),
+    (6, "La Yuhibbullah", 4, 148),
+    (7, "Wa Iza Samiu", 5, 82),
+    (8, "Wa Lau Annana", 6, 111),
+    (9, "Qalal Malao", 7, 88),
+    (10, "Wa A'lamu", 8, 41),
+    (11, "Yatazeroon", 9, 93),
+    (12, "Wa Mamin Da'abat", 11, 6),
+    (13, "Wa Ma Ubrioo", 12, 53),
+    (14, "Rubama", 15, 1),
+    (15, "Subhanallazi", 17, 1),
+    (16, "Qal Alam", 18, 75),
+    (17, "Aqtarabo", 21, 1),
+    (18, "Qadd Aflaha", 23, 1),
+    (19, "Wa Qalallazina", 25, 21),
+    (20, "A'man Khalaq", 27, 56),
+    (21, "Utlu Ma Oohi", 29, 46),
+    (22, "Wa Man Yaqnut", 33, 31),
+    (23, "Wa Mali", 36, 28),
+    (24, "Faman Azlam", 39, 32),
+    (25, "Elahe Yud'ao", 41, 47),
+    (26, "Ha'a Meem", 46, 1),
+    (27, "Qala Fama Khatbukum", 51, 31),
+    (28, "Qad Sami Allah", 58, 1),
+    (29, "Tabarakallazi", 67, 1),
+    (30, "Amman", 78, 1),
+]
+
+# Position of each juz's first ayah, in juz order
+JUZ_OFFSETS = [ayah_index(surah, ayah) for _, _, surah, ayah in JUZ]
+
+# (surah, ayah) starting each of the 604 pages of the standard Madani mushaf
+PAGE_STARTS = [
+    (1, 1), (2, 1), (2, 6), (2, 17), (2, 25), (2, 30), (2, 38), (2, 49), (2, 58), (2, 62),
+    (2, 70), (2, 77), (2, 84), (2, 89), (2, 94), (2, 102), (2, 106), (2, 113), (2, 120), (2, 127),
+    (2, 135), (2, 142), (2, 146), (2, 154), (2, 164), (2, 170), (2, 177), (2, 182), (2, 187), (2, 191),
+    (2, 197), (2, 203), (2, 211), (2, 216), (2, 220), (2, 225), (2, 231), (2, 234), (2, 238), (2, 246),
+    (2, 249), (2, 253), (2, 257), (2, 260), (2, 265), (2, 270), (2, 275), (2, 282), (2, 283), (3, 1),
+    (3, 10), (3, 16), (3, 23), (3, 30), (3, 38), (3, 46), (3, 53), (3, 62), (3, 71), (3, 78),
+    (3, 84), (3, 92), (3, 101), (3, 109), (3, 116), (3, 122), (3, 133), (3, 141), (3, 149), (3, 154),
+    (3, 158), (3, 166), (3, 174), (3, 181), (3, 187), (3, 195), (4, 1), (4, 7), (4, 12), (4, 15),
+    (4, 20), (4, 24), (4, 27), (4, 34), (4, 38), (4, 45), (4, 52), (4, 60), (4, 66), (4, 75),
+    (4, 80), (4, 87), (4, 92), (4, 95), (4, 102), (4, 106), (4, 114), (4, 122), (4, 128), (4, 135),
+    (4, 141), (4, 148), (4, 155), (4, 163), (4, 171), (4, 176), (5, 3), (5, 6), (5, 10), (5, 14),
+    (5, 18), (5, 24), (5, 32), (5, 37), (5, 42), (5, 46), (5, 51), (5, 58), (5, 65), (5, 71),
+    (5, 77), (5, 83), (5, 90), (5, 96), (5, 104), (5, 109), (5, 114), (6, 1), (6, 9), (6, 19),
+    (6, 28), (6, 36), (6, 45), (6, 53), (6, 60), (6, 69), (6, 74), (6, 82), (6, 91), (6, 95),
+    (6, 102), (6, 111), (6, 119), (6, 125), (6, 132), (6, 138), (6, 143), (6, 147), (6, 152), (6, 158),
+    (7, 1), (7, 12), (7, 23), (7, 31), (7, 38), (7, 44), (7, 52), (7, 58), (7, 68), (7, 74),
+    (7, 82), (7, 88), (7, 96), (7, 105), (7, 121), (7, 131), (7, 138), (7, 144), (7, 150), (7, 156),
+    (7, 160), (7, 164), (7, 171), (7, 179), (7, 188), (7, 196), (8, 1), (8, 9), (8, 17), (8, 26),
+    (8, 34), (8, 41), (8, 46), (8, 53), (8, 62), (8, 70), (9, 1), (9, 7), (9, 14), (9, 21),
+    (9, 27), (9, 32), (9, 37), (9, 41), (9, 48), (9, 55), (9, 62), (9, 69), (9, 73), (9, 80),
+    (9, 87), (9, 94), (9, 100), (9, 107), (9, 112), (9, 118), (9, 123), (10, 1), (10, 7), (10, 15),
+    (10, 21), (10, 26), (10, 34), (10, 43), (10, 54), (10, 62), (10, 71), (10, 79), (10, 89), (10, 98),
+    (10, 107), (11, 6), (11, 13), (11, 20), (11, 29), (11, 38), (11, 46), (11, 54), (11, 63), (11, 72),
+    (11, 82), (11, 89), (11, 98), (11, 109), (11, 118), (12, 5), (12, 15), (12, 23), (12, 31), (12, 38),
+    (12, 44), (12, 53), (12, 64), (12, 70), (12, 79), (12, 87), (12, 96), (12, 104), (13, 1), (13, 6),
+    (13, 14), (13, 19), (13, 29), (13, 35), (13, 43), (14, 6), (14, 11), (14, 19), (14, 25), (14, 34),
+    (14, 43), (15, 1), (15, 16), (15, 32), (15, 52), (15, 71), (15, 91), (16, 7), (16, 15), (16, 27),
+    (16, 35), (16, 43), (16, 55), (16, 65), (16, 73), (16, 80), (16, 88), (16, 94), (16, 103), (16, 111),
+    (16, 119), (17, 1), (17, 8), (17, 18), (17, 28), (17, 39), (17, 50), (17, 59), (17, 67), (17, 76),
+    (17, 87), (17, 97), (17, 105), (18, 5), (18, 16), (18, 21), (18, 28), (18, 35), (18, 46), (18, 54),
+    (18, 62), (18, 75), (18, 84), (18, 98), (19, 1), (19, 12), (19, 26), (19, 39), (19, 52), (19, 65),
+    (19, 77), (19, 96), (20, 13), (20, 38), (20, 52), (20, 65), (20, 77), (20, 88), (20, 99), (20, 114),
+    (20, 126), (21, 1), (21, 11), (21, 25), (21, 36), (21, 45), (21, 58), (21, 73), (21, 82), (21, 91),
+    (21, 102), (22, 1), (22, 6), (22, 16), (22, 24), (22, 31), (22, 39), (22, 47), (22, 56), (22, 65),
+    (22, 73), (23, 1), (23, 18), (23, 28), (23, 43), (23, 60), (23, 75), (23, 90), (23, 105), (24, 1),
+    (24, 11), (24, 21), (24, 28), (24, 32), (24, 37), (24, 44), (24, 54), (24, 59), (24, 62), (25, 3),
+    (25, 12), (25, 21), (25, 33), (25, 44), (25, 56), (25, 68), (26, 1), (26, 20), (26, 40), (26, 61),
+    (26, 84), (26, 112), (26, 137), (26, 160), (26, 184), (26, 207), (27, 1), (27, 14), (27, 23), (27, 36),
+    (27, 45), (27, 56), (27, 64), (27, 77), (27, 89), (28, 6), (28, 14), (28, 22), (28, 29), (28, 36),
+    (28, 44), (28, 51), (28, 60), (28, 71), (28, 78), (28, 85), (29, 7), (29, 15), (29, 24), (29, 31),
+    (29, 39), (29, 46), (29, 53), (29, 64), (30, 6), (30, 16), (30, 25), (30, 33), (30, 42), (30, 51),
+    (31, 1), (31, 12), (31, 20), (31, 29), (32, 1), (32, 12), (32, 21), (33, 1), (33, 7), (33, 16),
+    (33, 23), (33, 31), (33, 36), (33, 44), (33, 51), (33, 55), (33, 63), (34, 1), (34, 8), (34, 15),
+    (34, 23), (34, 32), (34, 40), (34, 49), (35, 4), (35, 12), (35, 19), (35, 31), (35, 39), (35, 45),
+    (36, 13), (36, 28), (36, 41), (36, 55), (36, 71), (37, 1), (37, 25), (37, 52), (37, 77), (37, 103),
+    (37, 127), (37, 154), (38, 1), (38, 17), (38, 27), (38, 43), (38, 62), (38, 84), (39, 6), (39, 11),
+    (39, 22), (39, 32), (39, 41), (39, 48), (39, 57), (39, 68), (39, 75), (40, 8), (40, 17), (40, 26),
+    (40, 34), (40, 41), (40, 50), (40, 59), (40, 67), (40, 78), (41, 1), (41, 12), (41, 21), (41, 30),
+    (41, 39), (41, 47), (42, 1), (42, 11), (42, 16), (42, 23), (42, 32), (42, 45), (42, 52), (43, 11),
+    (43, 23), (43, 34), (43, 48), (43, 61), (43, 74), (44, 1), (44, 19), (44, 40), (45, 1), (45, 14),
+    (45, 23), (45, 33), (46, 6), (46, 15), (46, 21), (46, 29), (47, 1), (47, 12), (47, 20), (47, 30),
+    (48, 1), (48, 10), (48, 16), (48, 24), (48, 29), (49, 5), (49, 12), (50, 1), (50, 16), (50, 36),
+    (51, 7), (51, 31), (51, 52), (52, 15), (52, 32), (53, 1), (53, 27), (53, 45), (54, 7), (54, 28),
+    (54, 50), (55, 17), (55, 41), (55, 68), (56, 17), (56, 51), (56, 77), (57, 4), (57, 12), (57, 19),
+    (57, 25), (58, 1), (58, 7), (58, 12), (58, 22), (59, 4), (59, 10), (59, 17), (60, 1), (60, 6),
+    (60, 12), (61, 6), (62, 1), (62, 9), (63, 5), (64, 1), (64, 10), (65, 1), (65, 6), (66, 1),
+    (66, 8), (67, 1), (67, 13), (67, 27), (68, 16), (68, 43), (69, 9), (69, 35), (70, 11), (70, 40),
+    (71, 11), (72, 1), (72, 14), (73, 1), (73, 20), (74, 18), (74, 48), (75, 20), (76, 6), (76, 26),
+    (77, 20), (78, 1), (78, 31), (79, 16), (80, 1), (81, 1), (82, 1), (83, 7), (83, 35), (85, 1),
+    (86, 1), (87, 16), (89, 1), (89, 24), (91, 1), (92, 15), (95, 1), (97, 1), (98, 8), (100, 10),
+    (103, 1), (106, 1), (109, 1), (112, 1),
+]
+
+PAGE_COUNT = len(PAGE_STARTS)
+
+def _build_ayah_pages() -> array:
+    """Expand PAGE_STARTS into the page number of every ayah, by position"""
+    page_offsets = [ayah_index(surah, ayah) for surah, ayah in PAGE_STARTS] + [TOTAL_AYAHS]
+    ayah_pages = array("H")
+    for page, (start, end) in enumerate(zip(page_offsets, page_offsets[1:]), 1):
+        ayah_pages.extend([page] * (end - start))
+    return ayah_pages
+
+# Page number of each ayah, indexed by ayah_index(); built once at import
+AYAH_PAGES = _build_ayah_pages()
+
+def page_of(surah: int, ayah: int) -> int:
+    """Mushaf page an ayah is on"""
+    return AYAH_PAGES[ayah_index(surah, ayah)]
+
+_ARTICLE = re.compile(r"^(al|an|ar|as|at|ad|adh|ash|az|ath)-")
+
+def _name_key(name: str) -> str:
+    """Normalize a surah name for lookups: lowercase letters only"""
+    return re.sub(r"[^a-z]", "", name.lower())
+
+def _build_name_index() -> dict:
+    index = {}
+    for number, name, _ in SURAHS:
+        lowered = name.lower()
+        keys = [_name_key(lowered), _name_key(_ARTICLE.sub("", lowered))]
+        for key in keys:
+            # Common spelling variation: "Al-Fatiha" / "Al-Fatihah"
+            for variant in (key, key + "h", key[:-1] if key.endswith("h") else key):
+                index.setdefault(variant, number)
+    return index
+
+_SURAH_NAME_INDEX = _build_name_index()
+
+@lru_cache(maxsize=1024)
+def find_surah_number(name: str) -> Optional[int]:
+    """Resolve a surah name (e.g. "Surah Al-Baqarah", "Baqarah", "2") to its number"""
+    name = re.sub(r"^sura[ht]?\s+", "", name.strip(), flags=re.IGNORECASE)
+    if name.isdigit():
+        number = int(name)
+        return number if 1 <= number <= SURAH_COUNT else None
+    return _SURAH_NAME_INDEX.get(_name_key(name))
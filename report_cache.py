@@ -0,0 +1,154 @@
+"""
+Content-addressed cache of generated PDF reports.
+
+A report's key is a hash of everything drawn on it (the summary, including its
+progress rows and summary text) and REPORT_TEMPLATE_VERSION, so an unchanged
+report is a file send and any change to the data produces a new key. The key
+doubles as the download's ETag.
+
+Reports are rendered in memory; they are only written here when the cache is
+enabled (REPORT_CACHE_DIR, off on Vercel where the disk is ephemeral). Every
+stored file is recorded in the `reports` table with the student, period and
+progress entries it was drawn from, so lookups, listings and invalidation are
+indexed queries rather than directory scans. Files are named
+
+    weekly_s3_2024-01-08_p12-13_<key>.pdf
+
+which lets index_cached_reports rebuild the table from the directory.
+"""
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from typing import Iterable, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import Report, Student
+from report_generator import REPORT_TEMPLATE_VERSION
+
+if os.getenv("VERCEL"):
+    REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "")
+else:
+    REPORT_CACHE_DIR = os.getenv("REPORT_CACHE_DIR", "reports/cache")
+
+_CACHED_REPORT = re.compile(r"^(?P<kind>weekly|monthly)_s(?P<student_id>\d+)_(?P<period>.+?)_p(?P<progress_ids>[\d-]*)_(?P<key>[0-9a-f]{64})\.pdf$")
+
+def report_key(kind: str, summary: BaseModel) -> str:
+    """Hash the content of a report into its cache key"""
+    payload = f"{kind}:{REPORT_TEMPLATE_VERSION}:{summary.model_dump_json()}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_cached_report(db: Session, key: str) -> Optional[str]:
+    """Path of the cached report with this key, if there is one"""
+    if not REPORT_CACHE_DIR:
+        return None
+    report = db.query(Report).filter(Report.key == key).first()
+    if report is None:
+        return None
+    if not os.path.exists(report.path):
+        # The file went away (a cleared /tmp, a manual cleanup); forget it
+        db.delete(report)
+        db.commit()
+        return None
+    return report.path
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+def _save_row(db: Session, key: str, kind: str, student_id: int, period: str, progress_ids: str, path: str, size: int, created_at: Optional[float] = None) -> Optional[str]:
+    """Insert or replace the row of a period; returns the path of the file it replaced"""
+    report = db.query(Report).filter(Report.student_id == student_id, Report.type == kind, Report.period == period).first()
+    old_path = report.path if report else None
+    if report is None:
+        report = Report(student_id=student_id, type=kind, period=period)
+        db.add(report)
+    report.key = key
+    report.progress_ids = progress_ids
+    report.path = path
+    report.size = size
+    report.created_at = created_at or time.time()
+    db.commit()
+    return old_path
+
+def store_report(db: Session, key: str, kind: str, student_id: int, period: str, progress_ids: Iterable[Optional[int]], pdf: bytes) -> Optional[str]:
+    """Save a rendered report in the cache; does nothing when the cache is disabled"""
+    if not REPORT_CACHE_DIR:
+        return None
+
+    os.makedirs(REPORT_CACHE_DIR, exist_ok=True)
+    ids = [str(progress_id) for progress_id in sorted({i for i in progress_ids if i is not None})]
+    path = os.path.join(REPORT_CACHE_DIR, f"{kind}_s{student_id}_{period}_p{'-'.join(ids)}_{key}.pdf")
+    # Write to a temporary name so a concurrent download never sees a partial file
+    partial_path = f"{path}.{uuid.uuid4().hex}.partial"
+    with open(partial_path, "wb") as f:
+        f.write(pdf)
+    os.replace(partial_path, path)
+
+    # The newest report of a period supersedes the older one
+    tagged_ids = f"-{'-'.join(ids)}-" if ids else ""
+    try:
+        old_path = _save_row(db, key, kind, student_id, period, tagged_ids, path, len(pdf))
+    except IntegrityError:
+        # Another request stored this period at the same time; replace its row
+        db.rollback()
+        old_path = _save_row(db, key, kind, student_id, period, tagged_ids, path, len(pdf))
+    if old_path and old_path != path:
+        _remove_file(old_path)
+    return path
+
+def list_cached_reports(db: Session, student_id: int) -> List[Report]:
+    """The cached reports of a student, newest first"""
+    return db.query(Report).filter(Report.student_id == student_id).order_by(Report.created_at.desc(), Report.id.desc()).all()
+
+def invalidate_progress(db: Session, progress_id: int, student_id: int) -> int:
+    """Delete every cached report drawn from a progress entry; returns how many were deleted"""
+    reports = db.query(Report).filter(
+        Report.student_id == student_id,
+        Report.progress_ids.like(f"%-{progress_id}-%")
+    ).all()
+    for report in reports:
+        _remove_file(report.path)
+        db.delete(report)
+    if reports:
+        db.commit()
+    return len(reports)
+
+def index_cached_reports(db: Session) -> int:
+    """Record the report files already in the cache directory; returns how many were added"""
+    if not REPORT_CACHE_DIR or not os.path.isdir(REPORT_CACHE_DIR):
+        return 0
+    known_paths = {path for path, in db.query(Report.path)}
+    student_ids = {student_id for student_id, in db.query(Student.id)}
+    added = 0
+    # Oldest first, so the newest file of a period ends up in the table
+    for path in sorted((os.path.join(REPORT_CACHE_DIR, filename) for filename in os.listdir(REPORT_CACHE_DIR)), key=os.path.getmtime):
+        match = _CACHED_REPORT.match(os.path.basename(path))
+        if not match or path in known_paths or int(match.group("student_id")) not in student_ids:
+            continue
+        ids = match.group("progress_ids")
+        file_stats = os.stat(path)
+        old_path = _save_row(
+            db, match.group("key"), match.group("kind"), int(match.group("student_id")), match.group("period"),
+            f"-{ids}-" if ids else "", path, file_stats.st_size, file_stats.st_mtime
+        )
+        if old_path and old_path != path:
+            _remove_file(old_path)
+        added += 1
+    return added
+
+def etag_matches(if_none_match: Optional[str], key: str) -> bool:
+    """Check an If-None-Match header against a report key"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return any(tag.removeprefix("W/").strip('"') == key for tag in tags)
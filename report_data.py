@@ -0,0 +1,30 @@
+"""
+The summary behind a report, with the period, file name and progress entries
+the report cache and downloads need. Shared by the single, bulk and background
+report paths so they name and key a report the same way.
+"""
+
+from typing import NamedTuple
+
+from pydantic import BaseModel
+
+from models import WeeklySummary, MonthlySummary
+
+class ReportData(NamedTuple):
+    kind: str
+    student_id: int
+    period: str
+    filename: str
+    summary: BaseModel
+    progress_ids: list
+
+def weekly_report_data(student_id: int, summary: WeeklySummary) -> ReportData:
+    period = str(summary.week_start)
+    progress_ids = [summary.current_week.id, summary.previous_week.id if summary.previous_week else None]
+    return ReportData("weekly", student_id, period, f"weekly_{summary.student_name}_{period}.pdf", summary, progress_ids)
+
+def monthly_report_data(student_id: int, summary: MonthlySummary) -> ReportData:
+    period = summary.month_start.strftime('%Y_%m')
+    progress_ids = [ws.current_week.id for ws in summary.weekly_breakdown]
+    progress_ids += [ws.previous_week.id for ws in summary.weekly_breakdown if ws.previous_week]
+    return ReportData("monthly", student_id, period, f"monthly_{summary.student_name}_{period}.pdf", summary, progress_ids)
@@ -1,52 +1,31 @@
 from reportlab.lib.pagesizes import letter, A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table
 from datetime import datetime
+from io import BytesIO
 import os
 from typing import Optional
 from models import WeeklySummary, MonthlySummary
+from report_templates import ReportLayout, get_report_layout, DETAILS_COL_WIDTHS, STATS_COL_WIDTHS
 
-def create_weekly_pdf(summary: WeeklySummary, output_path: str = None) -> str:
-    """Generate a PDF report for weekly summary"""
-    if not output_path:
-        output_path = f"reports/weekly_{summary.student_name}_{summary.week_start}.pdf"
-    
-    # Ensure reports directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
-    styles = getSampleStyleSheet()
+# Bump when the layout of the reports changes, so cached PDFs are regenerated
+REPORT_TEMPLATE_VERSION = 1
+
+def _weekly_story(summary: WeeklySummary, layout: ReportLayout) -> list:
+    """Build the flowables of a weekly report"""
     story = []
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.darkgreen
-    )
-    story.append(Paragraph("Weekly Progress Report", title_style))
-    story.append(Spacer(1, 12))
+    story.append(layout.fragment("weekly_title"))
+    story.append(layout.spacer(12))
     
     # Student info
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=6
-    )
-    story.append(Paragraph(f"<b>Student:</b> {summary.student_name}", info_style))
-    story.append(Paragraph(f"<b>Week of:</b> {summary.week_start.strftime('%B %d, %Y')}", info_style))
-    story.append(Spacer(1, 20))
+    story.append(Paragraph(f"<b>Student:</b> {summary.student_name}", layout.info))
+    story.append(Paragraph(f"<b>Week of:</b> {summary.week_start.strftime('%B %d, %Y')}", layout.info))
+    story.append(layout.spacer(20))
     
     # Progress details
-    story.append(Paragraph("Progress Details", styles['Heading2']))
-    story.append(Spacer(1, 12))
+    story.append(layout.fragment("progress_details"))
+    story.append(layout.spacer(12))
     
     # Create progress table
     progress_data = [
@@ -56,112 +35,48 @@ def create_weekly_pdf(summary: WeeklySummary, output_path: str = None) -> str:
         ['Old Revision', summary.current_week.old_revision],
         ['Teacher Notes', summary.current_week.teacher_notes]
     ]
-    
-    progress_table = Table(progress_data, colWidths=[2*inch, 4*inch])
-    progress_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    story.append(progress_table)
-    story.append(Spacer(1, 20))
+    story.append(Table(progress_data, colWidths=DETAILS_COL_WIDTHS, style=layout.stats_table))
+    story.append(layout.spacer(20))
     
     # Statistics
-    story.append(Paragraph("Statistics", styles['Heading2']))
-    story.append(Spacer(1, 12))
+    story.append(layout.fragment("statistics"))
+    story.append(layout.spacer(12))
     
     stats_data = [
         ['Metric', 'Count'],
         ['New Ayahs Memorized', str(summary.new_ayahs_count)],
         ['Revision Pages Covered', str(summary.revision_pages_count)]
     ]
-    
-    stats_table = Table(stats_data, colWidths=[3*inch, 2*inch])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    story.append(stats_table)
-    story.append(Spacer(1, 20))
+    story.append(Table(stats_data, colWidths=STATS_COL_WIDTHS, style=layout.stats_table))
+    story.append(layout.spacer(20))
     
     # AI Summary
-    story.append(Paragraph("Teacher's Summary", styles['Heading2']))
-    story.append(Spacer(1, 12))
-    
-    summary_style = ParagraphStyle(
-        'Summary',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        alignment=TA_LEFT
-    )
-    story.append(Paragraph(summary.summary_text, summary_style))
+    story.append(layout.fragment("teacher_summary"))
+    story.append(layout.spacer(12))
+    story.append(Paragraph(summary.summary_text, layout.summary))
     
     # Footer
-    story.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=TA_CENTER,
-        textColor=colors.grey
-    )
-    story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", footer_style))
+    story.append(layout.spacer(30))
+    story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", layout.footer))
     
-    doc.build(story)
-    return output_path
+    return story
 
-def create_monthly_pdf(summary: MonthlySummary, output_path: str = None) -> str:
-    """Generate a PDF report for monthly summary"""
-    if not output_path:
-        output_path = f"reports/monthly_{summary.student_name}_{summary.month_start.strftime('%Y_%m')}.pdf"
-    
-    # Ensure reports directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    
-    doc = SimpleDocTemplate(output_path, pagesize=A4)
-    styles = getSampleStyleSheet()
+def _monthly_story(summary: MonthlySummary, layout: ReportLayout) -> list:
+    """Build the flowables of a monthly report"""
     story = []
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        spaceAfter=30,
-        alignment=TA_CENTER,
-        textColor=colors.darkblue
-    )
-    story.append(Paragraph("Monthly Progress Report", title_style))
-    story.append(Spacer(1, 12))
+    story.append(layout.fragment("monthly_title"))
+    story.append(layout.spacer(12))
     
     # Student info
-    info_style = ParagraphStyle(
-        'Info',
-        parent=styles['Normal'],
-        fontSize=12,
-        spaceAfter=6
-    )
-    story.append(Paragraph(f"<b>Student:</b> {summary.student_name}", info_style))
-    story.append(Paragraph(f"<b>Month:</b> {summary.month_start.strftime('%B %Y')}", info_style))
-    story.append(Spacer(1, 20))
+    story.append(Paragraph(f"<b>Student:</b> {summary.student_name}", layout.info))
+    story.append(Paragraph(f"<b>Month:</b> {summary.month_start.strftime('%B %Y')}", layout.info))
+    story.append(layout.spacer(20))
     
     # Monthly statistics
-    story.append(Paragraph("Monthly Statistics", styles['Heading2']))
-    story.append(Spacer(1, 12))
+    story.append(layout.fragment("monthly_statistics"))
+    story.append(layout.spacer(12))
     
     stats_data = [
         ['Metric', 'Total'],
@@ -170,29 +85,16 @@ def create_monthly_pdf(summary: MonthlySummary, output_path: str = None) -> str:
         ['Weeks of Attendance', f"{summary.attendance_weeks}/4"],
         ['Attendance Rate', f"{(summary.attendance_weeks/4)*100:.1f}%"]
     ]
-    
-    stats_table = Table(stats_data, colWidths=[3*inch, 2*inch])
-    stats_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black)
-    ]))
-    
-    story.append(stats_table)
-    story.append(Spacer(1, 20))
+    story.append(Table(stats_data, colWidths=STATS_COL_WIDTHS, style=layout.stats_table))
+    story.append(layout.spacer(20))
     
     # Weekly breakdown
-    story.append(Paragraph("Weekly Breakdown", styles['Heading2']))
-    story.append(Spacer(1, 12))
+    story.append(layout.fragment("weekly_breakdown"))
+    story.append(layout.spacer(12))
     
     for i, week in enumerate(summary.weekly_breakdown, 1):
-        story.append(Paragraph(f"Week {i} - {week.week_start.strftime('%B %d, %Y')}", styles['Heading3']))
-        story.append(Spacer(1, 8))
+        story.append(Paragraph(f"Week {i} - {week.week_start.strftime('%B %d, %Y')}", layout.heading3))
+        story.append(layout.spacer(8))
         
         week_data = [
             ['Category', 'Details'],
@@ -203,57 +105,55 @@ def create_monthly_pdf(summary: MonthlySummary, output_path: str = None) -> str:
             ['New Ayahs', str(week.new_ayahs_count)],
             ['Revision Pages', str(week.revision_pages_count)]
         ]
-        
-        week_table = Table(week_data, colWidths=[2*inch, 4*inch])
-        week_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
-        
-        story.append(week_table)
-        story.append(Spacer(1, 12))
+        story.append(Table(week_data, colWidths=DETAILS_COL_WIDTHS, style=layout.week_table))
+        story.append(layout.spacer(12))
         
         # Week summary
-        story.append(Paragraph("Summary:", styles['Heading4']))
-        summary_style = ParagraphStyle(
-            'WeekSummary',
-            parent=styles['Normal'],
-            fontSize=10,
-            spaceAfter=6,
-            alignment=TA_LEFT
-        )
-        story.append(Paragraph(week.summary_text, summary_style))
-        story.append(Spacer(1, 20))
+        story.append(layout.fragment("week_summary"))
+        story.append(Paragraph(week.summary_text, layout.week_summary))
+        story.append(layout.spacer(20))
     
     # Monthly AI Summary
-    story.append(Paragraph("Monthly Summary", styles['Heading2']))
-    story.append(Spacer(1, 12))
-    
-    summary_style = ParagraphStyle(
-        'MonthlySummary',
-        parent=styles['Normal'],
-        fontSize=11,
-        spaceAfter=6,
-        alignment=TA_LEFT
-    )
-    story.append(Paragraph(summary.summary_text, summary_style))
+    story.append(layout.fragment("monthly_summary"))
+    story.append(layout.spacer(12))
+    story.append(Paragraph(summary.summary_text, layout.monthly_summary))
     
     # Footer
-    story.append(Spacer(1, 30))
-    footer_style = ParagraphStyle(
-        'Footer',
-        parent=styles['Normal'],
-        fontSize=8,
-        alignment=TA_CENTER,
-        textColor=colors.grey
-    )
-    story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", footer_style))
+    story.append(layout.spacer(30))
+    story.append(Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", layout.footer))
     
+    return story
+
+def _render(story: list) -> bytes:
+    """Lay out a report in memory and return the PDF bytes"""
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
     doc.build(story)
+    return buffer.getvalue()
+
+def render_weekly_pdf(summary: WeeklySummary, layout: Optional[ReportLayout] = None) -> bytes:
+    """Generate a PDF report for weekly summary in memory"""
+    return _render(_weekly_story(summary, layout or get_report_layout()))
+
+def render_monthly_pdf(summary: MonthlySummary, layout: Optional[ReportLayout] = None) -> bytes:
+    """Generate a PDF report for monthly summary in memory"""
+    return _render(_monthly_story(summary, layout or get_report_layout()))
+
+def _write_pdf(pdf: bytes, output_path: str) -> str:
+    # Ensure reports directory exists
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "wb") as f:
+        f.write(pdf)
     return output_path
+
+def create_weekly_pdf(summary: WeeklySummary, output_path: str = None) -> str:
+    """Generate a PDF report for weekly summary and save it to a file"""
+    if not output_path:
+        output_path = f"reports/weekly_{summary.student_name}_{summary.week_start}.pdf"
+    return _write_pdf(render_weekly_pdf(summary), output_path)
+
+def create_monthly_pdf(summary: MonthlySummary, output_path: str = None) -> str:
+    """Generate a PDF report for monthly summary and save it to a file"""
+    if not output_path:
+        output_path = f"reports/monthly_{summary.student_name}_{summary.month_start.strftime('%Y_%m')}.pdf"
+    return _write_pdf(render_monthly_pdf(summary), output_path)
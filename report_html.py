@@ -0,0 +1,141 @@
+"""
+HTML versions of the weekly and monthly reports, for previews.
+
+They show the same sections as the PDFs in report_generator and are drawn
+from the same summaries, but rendering one is a template fill of a few
+milliseconds, so the PDF is only built when it is downloaded. Templates are
+compiled once at import, like the message templates, with HTML escaping on.
+"""
+
+from datetime import datetime
+from typing import Any
+
+from jinja2 import DictLoader, Environment, StrictUndefined
+
+from models import WeeklySummary, MonthlySummary
+
+# Bump when the markup of the previews changes, so browsers refetch them
+HTML_TEMPLATE_VERSION = 1
+
+BASE = """\
+<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{% block title %}{% endblock %}</title>
+<style>
+  body { font-family: Helvetica, Arial, sans-serif; max-width: 46rem; margin: 2rem auto; padding: 0 1rem; color: #222; }
+  h1 { text-align: center; font-size: 1.5rem; margin-bottom: 2rem; }
+  h1.weekly { color: darkgreen; }
+  h1.monthly { color: darkblue; }
+  table { border-collapse: collapse; margin: 0.75rem 0 1.5rem; }
+  th, td { border: 1px solid #000; padding: 0.3rem 0.6rem; text-align: left; vertical-align: top; }
+  th { background: grey; color: whitesmoke; }
+  td { background: beige; }
+  table.details td:first-child { width: 12rem; }
+  table.week th { background: lightgrey; color: #000; }
+  table.week td { background: #fff; }
+  .summary { white-space: pre-line; }
+  footer { margin-top: 2rem; text-align: center; font-size: 0.7rem; color: grey; }
+</style>
+</head>
+<body>
+{% block content %}{% endblock %}
+<footer>Generated on {{ generated_at.strftime('%B %d, %Y at %I:%M %p') }}</footer>
+</body>
+</html>
+"""
+
+WEEKLY_REPORT = """\
+{% extends "base" %}
+{% block title %}Weekly Progress Report - {{ summary.student_name }}{% endblock %}
+{% block content %}
+<h1 class="weekly">Weekly Progress Report</h1>
+<p><b>Student:</b> {{ summary.student_name }}<br>
+<b>Week of:</b> {{ summary.week_start.strftime('%B %d, %Y') }}</p>
+
+<h2>Progress Details</h2>
+<table class="details">
+  <tr><th>Category</th><th>Details</th></tr>
+  <tr><td>New Memorization</td><td>{{ summary.current_week.new_memorization }}</td></tr>
+  <tr><td>Recent Revision</td><td>{{ summary.current_week.recent_revision }}</td></tr>
+  <tr><td>Old Revision</td><td>{{ summary.current_week.old_revision }}</td></tr>
+  <tr><td>Teacher Notes</td><td>{{ summary.current_week.teacher_notes }}</td></tr>
+</table>
+
+<h2>Statistics</h2>
+<table>
+  <tr><th>Metric</th><th>Count</th></tr>
+  <tr><td>New Ayahs Memorized</td><td>{{ summary.new_ayahs_count }}</td></tr>
+  <tr><td>Revision Pages Covered</td><td>{{ summary.revision_pages_count }}</td></tr>
+</table>
+
+<h2>Teacher's Summary</h2>
+<p class="summary">{{ summary.summary_text }}</p>
+{% endblock %}
+"""
+
+MONTHLY_REPORT = """\
+{% extends "base" %}
+{% block title %}Monthly Progress Report - {{ summary.student_name }}{% endblock %}
+{% block content %}
+<h1 class="monthly">Monthly Progress Report</h1>
+<p><b>Student:</b> {{ summary.student_name }}<br>
+<b>Month:</b> {{ summary.month_start.strftime('%B %Y') }}</p>
+
+<h2>Monthly Statistics</h2>
+<table>
+  <tr><th>Metric</th><th>Total</th></tr>
+  <tr><td>New Ayahs Memorized</td><td>{{ summary.total_new_ayahs }}</td></tr>
+  <tr><td>Revision Pages Covered</td><td>{{ summary.total_revision_pages }}</td></tr>
+  <tr><td>Weeks of Attendance</td><td>{{ summary.attendance_weeks }}/4</td></tr>
+  <tr><td>Attendance Rate</td><td>{{ "%.1f" | format(summary.attendance_weeks / 4 * 100) }}%</td></tr>
+</table>
+
+<h2>Weekly Breakdown</h2>
+{% for week in summary.weekly_breakdown %}
+<h3>Week {{ loop.index }} - {{ week.week_start.strftime('%B %d, %Y') }}</h3>
+<table class="details week">
+  <tr><th>Category</th><th>Details</th></tr>
+  <tr><td>New Memorization</td><td>{{ week.current_week.new_memorization }}</td></tr>
+  <tr><td>Recent Revision</td><td>{{ week.current_week.recent_revision }}</td></tr>
+  <tr><td>Old Revision</td><td>{{ week.current_week.old_revision }}</td></tr>
+  <tr><td>Teacher Notes</td><td>{{ week.current_week.teacher_notes }}</td></tr>
+  <tr><td>New Ayahs</td><td>{{ week.new_ayahs_count }}</td></tr>
+  <tr><td>Revision Pages</td><td>{{ week.revision_pages_count }}</td></tr>
+</table>
+<h4>Summary:</h4>
+<p class="summary">{{ week.summary_text }}</p>
+{% endfor %}
+
+<h2>Monthly Summary</h2>
+<p class="summary">{{ summary.summary_text }}</p>
+{% endblock %}
+"""
+
+_environment = Environment(
+    loader=DictLoader({
+        "base": BASE,
+        "weekly_report": WEEKLY_REPORT,
+        "monthly_report": MONTHLY_REPORT,
+    }),
+    # Student names, notes and AI summaries are user content
+    autoescape=True,
+    trim_blocks=True,
+    lstrip_blocks=True,
+    undefined=StrictUndefined
+)
+
+TEMPLATES = {name: _environment.get_template(name) for name in ("weekly_report", "monthly_report")}
+
+def _render(name: str, **context: Any) -> str:
+    return TEMPLATES[name].render(generated_at=datetime.now(), **context)
+
+def render_weekly_html(summary: WeeklySummary) -> str:
+    """Render the weekly report as an HTML page"""
+    return _render("weekly_report", summary=summary)
+
+def render_monthly_html(summary: MonthlySummary) -> str:
+    """Render the monthly report as an HTML page"""
+    return _render("monthly_report", summary=summary)
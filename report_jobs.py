@@ -0,0 +1,131 @@
+"""
+Background generation of PDF reports.
+
+A report requested as a job is written to the report_jobs table and answered
+straight away with the job's id. A fixed pool of worker threads
+(REPORT_JOB_WORKERS) builds the summary and PDF off the request threads and
+keeps the PDF on the job row for download, so a burst of monthly reports at
+month end queues up instead of tying up the server's threadpool. As no one
+waits on the request, the AI summaries are not held to LLM_LATENCY_BUDGET_MS.
+
+The queue is a background_queue.DatabaseQueue over the table, so queued jobs
+survive a restart and several server processes can share it. A job whose
+worker died is picked up again once REPORT_JOB_LEASE_SECONDS have passed.
+Failed attempts are retried with backoff up to REPORT_JOB_MAX_ATTEMPTS, and
+finished jobs are purged after REPORT_JOB_TTL_HOURS.
+"""
+
+import os
+import time
+import uuid
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from background_queue import DatabaseQueue
+from database import ReportJob
+from routers.summaries import load_weekly_summary, load_monthly_summary, fill_weekly_summary, fill_monthly_summary
+from report_data import ReportData, weekly_report_data, monthly_report_data
+from report_cache import report_key, get_cached_report, store_report
+from bulk_reports import get_report_pool, render_report
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "3"))
+REPORT_JOB_LEASE_SECONDS = int(os.getenv("REPORT_JOB_LEASE_SECONDS", "600"))
+REPORT_JOB_TTL_HOURS = int(os.getenv("REPORT_JOB_TTL_HOURS", "24"))
+# How often idle workers look for jobs queued by other processes
+REPORT_JOB_POLL_SECONDS = float(os.getenv("REPORT_JOB_POLL_SECONDS", "5"))
+RETRY_BACKOFF_SECONDS = 30
+
+def enqueue_report_job(db: Session, kind: str, student_id: int, period_start: Optional[date]) -> ReportJob:
+    """Queue a report and wake a worker"""
+    now = time.time()
+    job = ReportJob(
+        id=uuid.uuid4().hex,
+        type=kind,
+        student_id=student_id,
+        period_start=period_start,
+        status=QUEUED,
+        attempts=0,
+        created_at=now,
+        run_after=now
+    )
+    db.add(job)
+    db.commit()
+    _queue.notify()
+    return job
+
+def start_report_workers():
+    """Start the worker threads if they are not running yet; queued jobs resume from the table"""
+    _queue.start()
+
+def run_report_jobs():
+    """Run the due jobs in this thread, where there are no worker threads (RUN_IN_REQUEST)"""
+    _queue.run_pending()
+
+def _report_data(db: Session, job: ReportJob) -> ReportData:
+    # No one is waiting on the response, so the summaries wait for the LLM instead of falling back
+    if job.type == "weekly":
+        return weekly_report_data(job.student_id, fill_weekly_summary(load_weekly_summary(job.student_id, job.period_start, db), wait=True))
+    return monthly_report_data(job.student_id, fill_monthly_summary(load_monthly_summary(job.student_id, job.period_start, db), wait=True))
+
+def _build_pdf(db: Session, report: ReportData) -> bytes:
+    """The report's PDF from the report cache, or rendered on the report worker processes"""
+    key = report_key(report.kind, report.summary)
+    cached_path = get_cached_report(db, key)
+    if cached_path:
+        try:
+            with open(cached_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+    pdf = get_report_pool().submit(render_report, report.kind, report.summary.model_dump_json()).result()
+    store_report(db, key, report.kind, report.student_id, report.period, report.progress_ids, pdf)
+    return pdf
+
+def _run_job(db: Session, job: ReportJob):
+    try:
+        report = _report_data(db, job)
+        pdf = _build_pdf(db, report)
+    except HTTPException as e:
+        # Missing student or progress: retrying will not help
+        job.status, job.error, job.finished_at = FAILED, e.detail, time.time()
+    except Exception as e:
+        db.rollback()
+        _queue.retry_later(job, f"Error generating PDF: {e}")
+    else:
+        job.status, job.error, job.filename, job.pdf, job.finished_at = DONE, None, report.filename, pdf, time.time()
+    db.commit()
+
+def _process(db: Session) -> bool:
+    """Run the oldest due job, if any"""
+    jobs = _queue.claim(db, 1)
+    for job in jobs:
+        _run_job(db, job)
+    return bool(jobs)
+
+_queue = DatabaseQueue(
+    "report-job",
+    ReportJob,
+    _process,
+    workers=REPORT_JOB_WORKERS,
+    lease_seconds=REPORT_JOB_LEASE_SECONDS,
+    max_attempts=REPORT_JOB_MAX_ATTEMPTS,
+    ttl_seconds=REPORT_JOB_TTL_HOURS * 60 * 60,
+    poll_seconds=REPORT_JOB_POLL_SECONDS,
+    retry_backoff_seconds=RETRY_BACKOFF_SECONDS,
+    # A job only builds a PDF, so one whose worker died is run again
+    retry_expired_leases=True,
+    expired_error=f"Report generation did not finish within {REPORT_JOB_LEASE_SECONDS} seconds in {REPORT_JOB_MAX_ATTEMPTS} attempts",
+    queued=QUEUED,
+    running=RUNNING,
+    done=DONE,
+    failed=FAILED
+)
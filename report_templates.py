@@ -0,0 +1,94 @@
+"""
+Layout objects shared by the PDF reports.
+
+The stylesheet, paragraph styles, table styles and the fixed parts of a report
+(titles, section headings, spacers) are built once and reused, so rendering a
+report only creates the flowables that carry its data. Platypus marks the
+flowables it lays out, so a fixed fragment is handed out as a shallow copy
+that shares the parsed text, and each thread gets its own ReportLayout (one
+per process in the bulk report workers).
+"""
+
+import copy
+import threading
+
+from reportlab.platypus import Paragraph, Spacer, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+
+# Column widths of the details and statistics tables
+DETAILS_COL_WIDTHS = [2*inch, 4*inch]
+STATS_COL_WIDTHS = [3*inch, 2*inch]
+# Week, new memorization, revision, teacher notes, new ayahs, revision pages
+TERM_COL_WIDTHS = [0.85*inch, 1.45*inch, 1.45*inch, 1.55*inch, 0.45*inch, 0.45*inch]
+
+def _table_style(header_background, header_text, header_font_size: int, header_padding: int, body_background) -> TableStyle:
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), header_background),
+        ('TEXTCOLOR', (0, 0), (-1, 0), header_text),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), header_font_size),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), header_padding),
+        ('BACKGROUND', (0, 1), (-1, -1), body_background),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ])
+
+class ReportLayout:
+    """Styles and static fragments of the weekly, monthly and term reports"""
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+        self.heading3 = styles['Heading3']
+
+        # Paragraph styles
+        self.weekly_title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, spaceAfter=30, alignment=TA_CENTER, textColor=colors.darkgreen)
+        self.monthly_title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, spaceAfter=30, alignment=TA_CENTER, textColor=colors.darkblue)
+        self.info = ParagraphStyle('Info', parent=styles['Normal'], fontSize=12, spaceAfter=6)
+        self.summary = ParagraphStyle('Summary', parent=styles['Normal'], fontSize=11, spaceAfter=6, alignment=TA_LEFT)
+        self.week_summary = ParagraphStyle('WeekSummary', parent=styles['Normal'], fontSize=10, spaceAfter=6, alignment=TA_LEFT)
+        self.monthly_summary = ParagraphStyle('MonthlySummary', parent=styles['Normal'], fontSize=11, spaceAfter=6, alignment=TA_LEFT)
+        self.footer = ParagraphStyle('Footer', parent=styles['Normal'], fontSize=8, alignment=TA_CENTER, textColor=colors.grey)
+        self.term_title = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=18, spaceAfter=30, alignment=TA_CENTER, textColor=colors.darkslategray)
+        self.student_heading = ParagraphStyle('StudentHeading', parent=styles['Heading2'], keepWithNext=1)
+        self.cell = ParagraphStyle('Cell', parent=styles['Normal'], fontSize=8, leading=10)
+
+        # Table styles
+        self.stats_table = _table_style(colors.grey, colors.whitesmoke, 12, 12, colors.beige)
+        self.week_table = _table_style(colors.lightgrey, colors.black, 10, 8, colors.white)
+        self.term_table = _table_style(colors.lightgrey, colors.black, 8, 6, colors.white)
+        self.term_table.add('VALIGN', (0, 0), (-1, -1), 'TOP')
+
+        # Fixed text, parsed once
+        self._fragments = {
+            "weekly_title": Paragraph("Weekly Progress Report", self.weekly_title),
+            "monthly_title": Paragraph("Monthly Progress Report", self.monthly_title),
+            "progress_details": Paragraph("Progress Details", styles['Heading2']),
+            "statistics": Paragraph("Statistics", styles['Heading2']),
+            "teacher_summary": Paragraph("Teacher's Summary", styles['Heading2']),
+            "monthly_statistics": Paragraph("Monthly Statistics", styles['Heading2']),
+            "weekly_breakdown": Paragraph("Weekly Breakdown", styles['Heading2']),
+            "week_summary": Paragraph("Summary:", styles['Heading4']),
+            "monthly_summary": Paragraph("Monthly Summary", styles['Heading2']),
+            "term_title": Paragraph("Term Progress Report", self.term_title)
+        }
+        self._spacers = {height: Spacer(1, height) for height in (8, 12, 20, 30)}
+
+    def fragment(self, name: str):
+        """A fixed paragraph of the reports, ready to add to a story"""
+        return copy.copy(self._fragments[name])
+
+    def spacer(self, height: int) -> Spacer:
+        return copy.copy(self._spacers[height])
+
+class _ThreadLayout(threading.local):
+    def __init__(self):
+        self.layout = ReportLayout()
+
+_thread_layout = _ThreadLayout()
+
+def get_report_layout() -> ReportLayout:
+    """The layout of the current thread, built on its first report"""
+    return _thread_layout.layout
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Dict, List
+from datetime import date, timedelta
+
+from database import get_db, Student
+from models import CategoryCoverage, StudentCoverage as StudentCoverageModel, SurahCoverage, JuzCoverage
+from coverage import load_coverage, load_revised_since, summarize_spans, count_bits, count_in_span, SURAH_SPANS, JUZ_SPANS
+from quran_metadata import SURAHS, JUZ, TOTAL_AYAHS
+
+router = APIRouter()
+
+def _get_student(student_id: int, db: Session) -> Student:
+    student = db.query(Student).filter(Student.id == student_id).first()
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return student
+
+def _category_coverage(counts: Dict[str, int], total_ayahs: int) -> Dict[str, CategoryCoverage]:
+    return {
+        field: CategoryCoverage(ayahs=ayahs, percentage=round(ayahs / total_ayahs * 100, 2))
+        for field, ayahs in counts.items()
+    }
+
+@router.get("/{student_id}", response_model=StudentCoverageModel)
+def get_student_coverage(student_id: int, db: Session = Depends(get_db)):
+    """Get how much of the Quran a student has memorized and revised"""
+    student = _get_student(student_id, db)
+    bitmaps = load_coverage(db, student_id)
+
+    counts = {field: count_bits(bitmap) for field, bitmap in bitmaps.items()}
+    return StudentCoverageModel(
+        student_id=student.id,
+        student_name=student.name,
+        total_ayahs=TOTAL_AYAHS,
+        coverage=_category_coverage(counts, TOTAL_AYAHS)
+    )
+
+@router.get("/{student_id}/surahs", response_model=List[SurahCoverage])
+def get_surah_coverage(student_id: int, db: Session = Depends(get_db)):
+    """Get a student's coverage of each surah"""
+    _get_student(student_id, db)
+    bitmaps = load_coverage(db, student_id)
+
+    return [
+        SurahCoverage(number=number, name=name, total_ayahs=ayahs, coverage=_category_coverage(counts, ayahs))
+        for (number, name, ayahs), counts in zip(SURAHS, summarize_spans(bitmaps, SURAH_SPANS))
+    ]
+
+@router.get("/{student_id}/juz", response_model=List[JuzCoverage])
+def get_juz_coverage(student_id: int, stale_after_weeks: int = 4, db: Session = Depends(get_db)):
+    """Get a student's coverage of each juz.
+
+    A juz is stale when the student has covered part of it but has not revised
+    any of it in the last `stale_after_weeks` weeks.
+    """
+    _get_student(student_id, db)
+    bitmaps = load_coverage(db, student_id)
+    covered = bitmaps["new_memorization"] | bitmaps["recent_revision"] | bitmaps["old_revision"]
+    revised_recently = load_revised_since(db, student_id, date.today() - timedelta(weeks=stale_after_weeks))
+
+    juz_coverage = []
+    for (number, name, _, _), (start, length), counts in zip(JUZ, JUZ_SPANS, summarize_spans(bitmaps, JUZ_SPANS)):
+        stale = count_in_span(covered, start, length) > 0 and count_in_span(revised_recently, start, length) == 0
+        juz_coverage.append(JuzCoverage(
+            number=number,
+            name=name,
+            total_ayahs=length,
+            coverage=_category_coverage(counts, length),
+            stale=stale
+        ))
+    return juz_coverage
@@ -5,6 +5,11 @@ from datetime import date
 
 from database import get_db, Progress, Student
 from models import ProgressCreate, ProgressUpdate, Progress as ProgressModel
+from progress_history import week_has_progress, sync_parsed_fields
+from ayah_ranges import PROGRESS_RANGE_FIELDS
+from coverage import add_progress_to_coverage, rebuild_student_coverage
+from llm_cache import llm_cache
+import report_cache
 
 router = APIRouter()
 
@@ -16,6 +21,10 @@ def create_progress(progress: ProgressCreate, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
+    # Only one progress entry is allowed per student per week
+    if week_has_progress(db, progress.student_id, progress.week_start):
+        raise HTTPException(status_code=400, detail="Progress entry already exists for this week")
+    
     db_progress = Progress(
         student_id=progress.student_id,
         week_start=progress.week_start,
@@ -24,7 +33,9 @@ def create_progress(progress: ProgressCreate, db: Session = Depends(get_db)):
         old_revision=progress.old_revision,
         teacher_notes=progress.teacher_notes
     )
+    sync_parsed_fields(db_progress)
     db.add(db_progress)
+    add_progress_to_coverage(db, db_progress)
     db.commit()
     db.refresh(db_progress)
     return db_progress
@@ -56,6 +67,8 @@ def update_progress(progress_id: int, progress_update: ProgressUpdate, db: Sessi
         raise HTTPException(status_code=404, detail="Progress entry not found")
     
     if progress_update.week_start is not None:
+        if progress_update.week_start != progress.week_start and week_has_progress(db, progress.student_id, progress_update.week_start):
+            raise HTTPException(status_code=400, detail="Progress entry already exists for this week")
         progress.week_start = progress_update.week_start
     if progress_update.new_memorization is not None:
         progress.new_memorization = progress_update.new_memorization
@@ -66,8 +79,17 @@ def update_progress(progress_id: int, progress_update: ProgressUpdate, db: Sessi
     if progress_update.teacher_notes is not None:
         progress.teacher_notes = progress_update.teacher_notes
     
+    # Re-parse ayah ranges and counts only when the memorization text changed
+    if any(getattr(progress_update, field) is not None for field in PROGRESS_RANGE_FIELDS):
+        sync_parsed_fields(progress)
+        rebuild_student_coverage(db, progress.student_id)
+    
     db.commit()
     db.refresh(progress)
+    
+    # Summaries and reports generated from the old text are no longer valid
+    llm_cache.invalidate_progress(progress_id)
+    report_cache.invalidate_progress(db, progress_id, progress.student_id)
     return progress
 
 @router.delete("/{progress_id}")
@@ -78,5 +100,8 @@ def delete_progress(progress_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Progress entry not found")
     
     db.delete(progress)
+    rebuild_student_coverage(db, progress.student_id)
     db.commit()
+    llm_cache.invalidate_progress(progress_id)
+    report_cache.invalidate_progress(db, progress_id, progress.student_id)
     return {"message": "Progress entry deleted successfully"}
@@ -1,18 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Query, Response
+from fastapi.responses import FileResponse, HTMLResponse, StreamingResponse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
+from typing import List, Optional
 from datetime import date
+from itertools import chain
+from urllib.parse import quote
 import os
+import tempfile
 
-from database import get_db, Student
-from routers.summaries import get_weekly_summary, get_monthly_summary
-from report_generator import create_weekly_pdf, create_monthly_pdf
+from database import get_db, Student, Report, ReportJob
+from models import ReportJob as ReportJobModel, ReportJobCreate
+from routers.summaries import get_weekly_summary, get_monthly_summary, load_weekly_summary, load_monthly_summary, load_class_summaries, fill_weekly_summary, fill_monthly_summary
+from report_generator import render_weekly_pdf, render_monthly_pdf
+from report_html import render_weekly_html, render_monthly_html, HTML_TEMPLATE_VERSION
+from report_cache import report_key, get_cached_report, store_report, list_cached_reports, etag_matches
+from llm_service import LLM_MAX_CONCURRENCY
+from bulk_reports import stream_reports_zip
+from report_data import ReportData, weekly_report_data, monthly_report_data
+from report_jobs import enqueue_report_job, run_report_jobs, DONE, FAILED
+from background_queue import RUN_IN_REQUEST
+from term_reports import iter_class_progress, term_report_sections, write_term_pdf
 
 router = APIRouter()
 
-@router.get("/weekly/{student_id}")
-def download_weekly_report(student_id: int, week_start: date = None, db: Session = Depends(get_db)):
-    """Download weekly progress report as PDF"""
+def _attachment_headers(filename: str) -> dict:
+    """Content-Disposition for a download, with an RFC 5987 name for non-ASCII student names"""
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+def _report_response(report: ReportData, render, if_none_match: Optional[str], db: Session):
+    """Serve a report, rendering it in memory only when its content changed"""
+    key = report_key(report.kind, report.summary)
+    headers = {"ETag": f'"{key}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, key):
+        return Response(status_code=304, headers=headers)
+    
+    cached_path = get_cached_report(db, key)
+    if cached_path:
+        return FileResponse(path=cached_path, filename=report.filename, media_type='application/pdf', headers=headers)
+    
+    try:
+        pdf = render(report.summary)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
+    
+    # Persisted only when the report cache is enabled; the response never waits on a file read
+    store_report(db, key, report.kind, report.student_id, report.period, report.progress_ids, pdf)
+    return Response(content=pdf, media_type='application/pdf', headers={**headers, **_attachment_headers(report.filename)})
+
+def _html_response(report: ReportData, render, if_none_match: Optional[str]):
+    """Serve the HTML preview of a report, revalidated through its ETag"""
+    key = report_key(f"{report.kind}_html_{HTML_TEMPLATE_VERSION}", report.summary)
+    headers = {"ETag": f'"{key}"', "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, key):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=render(report.summary), headers=headers)
+
+def _weekly_report(student_id: int, week_start: Optional[date], db: Session) -> ReportData:
+    """The data of a weekly report, shared by the PDF and the HTML preview"""
     # Check if student exists
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
@@ -20,28 +69,10 @@ def download_weekly_report(student_id: int, week_start: date = None, db: Session
     
     # Get weekly summary
     summary = get_weekly_summary(student_id, week_start, db)
-    
-    # Generate PDF
-    filename = f"weekly_{student.name}_{summary.week_start}.pdf"
-    # Use /tmp directory for Vercel deployment
-    if os.getenv("VERCEL"):
-        filepath = f"/tmp/{filename}"
-    else:
-        filepath = f"reports/{filename}"
-    
-    try:
-        pdf_path = create_weekly_pdf(summary, filepath)
-        return FileResponse(
-            path=pdf_path,
-            filename=filename,
-            media_type='application/pdf'
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
+    return weekly_report_data(student_id, summary)
 
-@router.get("/monthly/{student_id}")
-def download_monthly_report(student_id: int, month_start: date = None, db: Session = Depends(get_db)):
-    """Download monthly progress report as PDF"""
+def _monthly_report(student_id: int, month_start: Optional[date], db: Session) -> ReportData:
+    """The data of a monthly report, shared by the PDF and the HTML preview"""
     # Check if student exists
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
@@ -49,24 +80,200 @@ def download_monthly_report(student_id: int, month_start: date = None, db: Sessi
     
     # Get monthly summary
     summary = get_monthly_summary(student_id, month_start, db)
+    return monthly_report_data(student_id, summary)
+
+@router.get("/weekly/{student_id}")
+def download_weekly_report(student_id: int, week_start: date = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Download weekly progress report as PDF"""
+    return _report_response(_weekly_report(student_id, week_start, db), render_weekly_pdf, if_none_match, db)
+
+@router.get("/monthly/{student_id}")
+def download_monthly_report(student_id: int, month_start: date = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Download monthly progress report as PDF"""
+    return _report_response(_monthly_report(student_id, month_start, db), render_monthly_pdf, if_none_match, db)
+
+@router.get("/preview/weekly/{student_id}", response_class=HTMLResponse)
+def preview_weekly_report(student_id: int, week_start: date = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Preview weekly progress report as an HTML page"""
+    # Previews never call the LLM: the summary is the cached one, or the fallback
+    summary = fill_weekly_summary(load_weekly_summary(student_id, week_start, db), cached_only=True)
+    return _html_response(weekly_report_data(student_id, summary), render_weekly_html, if_none_match)
+
+@router.get("/preview/monthly/{student_id}", response_class=HTMLResponse)
+def preview_monthly_report(student_id: int, month_start: date = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Preview monthly progress report as an HTML page"""
+    summary = fill_monthly_summary(load_monthly_summary(student_id, month_start, db), cached_only=True)
+    return _html_response(monthly_report_data(student_id, summary), render_monthly_html, if_none_match)
+
+def _select_students(class_day: Optional[str], student_ids: Optional[List[int]], db: Session) -> List[Student]:
+    """The students of a bulk download, by class day and/or explicit ids"""
+    if not class_day and not student_ids:
+        raise HTTPException(status_code=400, detail="Provide a class_day or student_ids")
     
-    # Generate PDF
-    filename = f"monthly_{student.name}_{summary.month_start.strftime('%Y_%m')}.pdf"
-    # Use /tmp directory for Vercel deployment
-    if os.getenv("VERCEL"):
-        filepath = f"/tmp/{filename}"
-    else:
-        filepath = f"reports/{filename}"
+    query = db.query(Student)
+    if class_day:
+        query = query.filter(Student.class_day == class_day)
+    if student_ids:
+        query = query.filter(Student.id.in_(student_ids))
+    students = query.order_by(Student.name, Student.id).all()
+    if not students:
+        raise HTTPException(status_code=404, detail="No students found")
+    return students
+
+def _unique_filename(report: ReportData, used: set) -> ReportData:
+    """Keep names unique inside the archive when two students share a name"""
+    filename = report.filename
+    if filename in used:
+        stem, extension = filename.rsplit(".", 1)
+        filename = f"{stem}_{report.student_id}.{extension}"
+    used.add(filename)
+    return report._replace(filename=filename)
+
+def _bulk_response(kind: str, label: str, reports: List[ReportData], missing: list, prepare) -> StreamingResponse:
+    skipped = [f"{student.name} (id {student.id}): {reason}" for student, reason in missing]
+    return StreamingResponse(
+        stream_reports_zip(reports, skipped, prepare=prepare, prepare_workers=LLM_MAX_CONCURRENCY),
+        media_type="application/zip",
+        headers=_attachment_headers(f"{kind}_reports_{label}.zip")
+    )
+
+# No one reads a bulk download's summaries before the archive is opened, so they are
+# generated in the stream and wait for the LLM rather than the latency budget
+def _fill_weekly_report(report: ReportData):
+    fill_weekly_summary(report.summary, wait=True)
+
+def _fill_monthly_report(report: ReportData):
+    fill_monthly_summary(report.summary, wait=True)
+
+@router.get("/bulk/weekly")
+def download_bulk_weekly_reports(class_day: Optional[str] = None, student_ids: Optional[List[int]] = Query(None), week_start: date = None, db: Session = Depends(get_db)):
+    """Download the weekly reports of a class (or of the given students) as a ZIP of PDFs"""
+    students = _select_students(class_day, student_ids, db)
+    loaded, missing = load_class_summaries(students, load_weekly_summary, week_start, db)
+    
+    used = set()
+    reports = [_unique_filename(weekly_report_data(student.id, summary), used) for student, summary in loaded]
+    
+    return _bulk_response("weekly", f"{class_day or 'students'}_{week_start or 'latest'}", reports, missing, _fill_weekly_report)
+
+@router.get("/bulk/monthly")
+def download_bulk_monthly_reports(class_day: Optional[str] = None, student_ids: Optional[List[int]] = Query(None), month_start: date = None, db: Session = Depends(get_db)):
+    """Download the monthly reports of a class (or of the given students) as a ZIP of PDFs"""
+    students = _select_students(class_day, student_ids, db)
+    loaded, missing = load_class_summaries(students, load_monthly_summary, month_start, db)
     
+    used = set()
+    reports = [_unique_filename(monthly_report_data(student.id, summary), used) for student, summary in loaded]
+    
+    label = f"{class_day or 'students'}_{month_start.strftime('%Y_%m') if month_start else 'latest'}"
+    return _bulk_response("monthly", label, reports, missing, _fill_monthly_report)
+
+@router.get("/term")
+def download_term_report(class_day: str, start: date, end: date, db: Session = Depends(get_db)):
+    """Download a class's progress over a term or year as one PDF, with a section per student"""
+    if end < start:
+        raise HTTPException(status_code=400, detail="The term must end on or after its start")
+    
+    rows = iter_class_progress(db, class_day, start, end)
+    first_row = next(rows, None)
+    if first_row is None:
+        raise HTTPException(status_code=404, detail="No progress entries found for this class in the specified term")
+    
+    # Written to disk rather than kept in memory, and removed once it has been sent
+    output = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
     try:
-        pdf_path = create_monthly_pdf(summary, filepath)
-        return FileResponse(
-            path=pdf_path,
-            filename=filename,
-            media_type='application/pdf'
-        )
+        with output:
+            write_term_pdf(term_report_sections(chain([first_row], rows), class_day, start, end), output)
     except Exception as e:
+        os.remove(output.name)
         raise HTTPException(status_code=500, detail=f"Error generating PDF: {str(e)}")
+    
+    return FileResponse(
+        path=output.name,
+        filename=f"term_{class_day}_{start}_{end}.pdf",
+        media_type='application/pdf',
+        background=BackgroundTask(os.remove, output.name)
+    )
+
+def _run_jobs_in_request(background_tasks: BackgroundTasks):
+    # No worker thread outlives a serverless invocation, so jobs run before it ends
+    if RUN_IN_REQUEST:
+        background_tasks.add_task(run_report_jobs)
+
+@router.post("/jobs", response_model=ReportJobModel, status_code=202)
+def create_report_job(job: ReportJobCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Queue a weekly or monthly report for background generation"""
+    if job.type not in ("weekly", "monthly"):
+        raise HTTPException(status_code=400, detail="Report type must be weekly or monthly")
+    
+    # Check if student exists
+    student = db.query(Student).filter(Student.id == job.student_id).first()
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    
+    report_job = enqueue_report_job(db, job.type, job.student_id, job.period_start)
+    _run_jobs_in_request(background_tasks)
+    return report_job
+
+def _get_job(job_id: str, db: Session) -> ReportJob:
+    job = db.query(ReportJob).filter(ReportJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    return job
+
+@router.get("/jobs/{job_id}", response_model=ReportJobModel)
+def get_report_job(job_id: str, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Get the status of a report job"""
+    job = _get_job(job_id, db)
+    # Polling also drives the retries that are due
+    _run_jobs_in_request(background_tasks)
+    return job
+
+@router.get("/jobs/{job_id}/download")
+def download_report_job(job_id: str, db: Session = Depends(get_db)):
+    """Download the PDF of a finished report job"""
+    job = _get_job(job_id, db)
+    if job.status == FAILED:
+        raise HTTPException(status_code=409, detail=f"Report job failed: {job.error}")
+    if job.status != DONE:
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    return Response(content=job.pdf, media_type='application/pdf', headers=_attachment_headers(job.filename))
+
+def _report_entry(report: Report, student_name: str) -> dict:
+    return {
+        "filename": f"{report.type}_{student_name}_{report.period}.pdf",
+        "type": report.type,
+        "period": report.period,
+        "created_at": report.created_at,
+        "size": report.size,
+        "week_start": report.period if report.type == "weekly" else None
+    }
+
+@router.get("/list")
+def list_all_reports(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500), type: Optional[str] = None, db: Session = Depends(get_db)):
+    """List the reports of all students, newest first, a page at a time"""
+    query = db.query(Report, Student.name).join(Student, Report.student_id == Student.id)
+    if type:
+        query = query.filter(Report.type == type)
+    
+    page = query.order_by(Report.created_at.desc(), Report.id.desc()).offset(offset).limit(limit).all()
+    
+    # Per-student counts cover every page, for the "N reports" figures
+    counts_query = db.query(Report.student_id, func.count(Report.id)).group_by(Report.student_id)
+    if type:
+        counts_query = counts_query.filter(Report.type == type)
+    counts = {student_id: count for student_id, count in counts_query}
+    
+    return {
+        "total": sum(counts.values()),
+        "offset": offset,
+        "limit": limit,
+        "counts": counts,
+        "reports": [
+            {"student_id": report.student_id, "student_name": student_name, **_report_entry(report, student_name)}
+            for report, student_name in page
+        ]
+    }
 
 @router.get("/list/{student_id}")
 def list_reports(student_id: int, db: Session = Depends(get_db)):
@@ -76,35 +283,5 @@ def list_reports(student_id: int, db: Session = Depends(get_db)):
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
-    reports_dir = "reports"
-    if not os.path.exists(reports_dir):
-        return {"reports": []}
-    
-    # Find reports for this student
-    student_reports = []
-    for filename in os.listdir(reports_dir):
-        if filename.startswith(f"weekly_{student.name}") or filename.startswith(f"monthly_{student.name}"):
-            filepath = os.path.join(reports_dir, filename)
-            file_stats = os.stat(filepath)
-            # Extract week_start from filename for weekly reports
-            week_start = None
-            if filename.startswith("weekly_"):
-                try:
-                    # Extract date from filename like "weekly_Hafsa_2025-08-31.pdf"
-                    date_part = filename.split("_")[-1].replace(".pdf", "")
-                    week_start = date_part
-                except:
-                    pass
-            
-            student_reports.append({
-                "filename": filename,
-                "type": "weekly" if filename.startswith("weekly_") else "monthly",
-                "created_at": file_stats.st_mtime,
-                "size": file_stats.st_size,
-                "week_start": week_start
-            })
-    
-    # Sort by creation time (newest first)
-    student_reports.sort(key=lambda x: x["created_at"], reverse=True)
-    
-    return {"reports": student_reports}
+    # Reports kept by the report cache, one per week or month, newest first
+    return {"reports": [_report_entry(report, student.name) for report in list_cached_reports(db, student_id)]}
@@ -1,17 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
 from datetime import date, timedelta
+import asyncio
 
-from database import get_db, Progress, Student
+from database import get_db, Student
 from models import WeeklySummary, MonthlySummary, Progress as ProgressModel
-from llm_service import generate_weekly_summary, generate_monthly_summary, count_ayahs
+from llm_service import generate_weekly_summary, generate_monthly_summaries, agenerate_weekly_summary, agenerate_weekly_summaries, agenerate_monthly_summary, get_llm_status, SUMMARY_SOURCE_AI
+from progress_history import get_week_window, get_latest_week_start, get_progress_counts
+from llm_cache import llm_cache
 
 router = APIRouter()
 
-@router.get("/weekly/{student_id}", response_model=WeeklySummary)
-def get_weekly_summary(student_id: int, week_start: Optional[date] = None, db: Session = Depends(get_db)):
-    """Get weekly summary for a student"""
+def load_weekly_summary(student_id: int, week_start: Optional[date], db: Session) -> WeeklySummary:
+    """Load a week's progress and counts; the summary text is left empty"""
     # Check if student exists
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
@@ -19,47 +22,33 @@ def get_weekly_summary(student_id: int, week_start: Optional[date] = None, db: S
     
     # If no week_start provided, get the most recent week
     if not week_start:
-        latest_progress = db.query(Progress).filter(Progress.student_id == student_id).order_by(Progress.week_start.desc()).first()
-        if not latest_progress:
+        week_start = get_latest_week_start(db, student_id)
+        if not week_start:
             raise HTTPException(status_code=404, detail="No progress entries found for this student")
-        week_start = latest_progress.week_start
     
-    # Get current week progress
-    current_week = db.query(Progress).filter(
-        Progress.student_id == student_id,
-        Progress.week_start == week_start
-    ).first()
+    # Get current week progress together with the previous week
+    window = get_week_window(db, student_id, week_start, week_start)
     
-    if not current_week:
+    if not window:
         raise HTTPException(status_code=404, detail="No progress entry found for the specified week")
     
-    # Get previous week progress
-    previous_week_start = week_start - timedelta(days=7)
-    previous_week = db.query(Progress).filter(
-        Progress.student_id == student_id,
-        Progress.week_start == previous_week_start
-    ).first()
+    current_week, previous_week = window[0]
     
     # Count ayahs and pages
-    new_ayahs_count = count_ayahs(current_week.new_memorization)
-    revision_pages_count = count_ayahs(current_week.recent_revision) + count_ayahs(current_week.old_revision)
-    
-    # Generate AI summary
-    summary_text = generate_weekly_summary(current_week, previous_week, student.name)
+    new_ayahs_count, revision_pages_count = get_progress_counts(current_week)
     
     return WeeklySummary(
         student_name=student.name,
         week_start=week_start,
         current_week=current_week,
         previous_week=previous_week,
-        summary_text=summary_text,
+        summary_text="",
         new_ayahs_count=new_ayahs_count,
         revision_pages_count=revision_pages_count
     )
 
-@router.get("/monthly/{student_id}", response_model=MonthlySummary)
-def get_monthly_summary(student_id: int, month_start: Optional[date] = None, db: Session = Depends(get_db)):
-    """Get monthly summary for a student"""
+def load_monthly_breakdown(student_id: int, month_start: Optional[date], db: Session) -> Tuple[date, date, List[WeeklySummary]]:
+    """Load a month's weekly breakdown; the summary texts are left empty"""
     # Check if student exists
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
@@ -67,11 +56,11 @@ def get_monthly_summary(student_id: int, month_start: Optional[date] = None, db:
     
     # If no month_start provided, get the most recent month
     if not month_start:
-        latest_progress = db.query(Progress).filter(Progress.student_id == student_id).order_by(Progress.week_start.desc()).first()
-        if not latest_progress:
+        latest_week_start = get_latest_week_start(db, student_id)
+        if not latest_week_start:
             raise HTTPException(status_code=404, detail="No progress entries found for this student")
         # Get the first day of the month
-        month_start = latest_progress.week_start.replace(day=1)
+        month_start = latest_week_start.replace(day=1)
     
     # Calculate month end
     if month_start.month == 12:
@@ -79,57 +68,115 @@ def get_monthly_summary(student_id: int, month_start: Optional[date] = None, db:
     else:
         month_end = month_start.replace(month=month_start.month + 1) - timedelta(days=1)
     
-    # Get all progress entries for the month
-    progress_entries = db.query(Progress).filter(
-        Progress.student_id == student_id,
-        Progress.week_start >= month_start,
-        Progress.week_start <= month_end
-    ).order_by(Progress.week_start).all()
+    # Get all progress entries for the month, each paired with its previous week
+    progress_entries = get_week_window(db, student_id, month_start, month_end)
     
     if not progress_entries:
         raise HTTPException(status_code=404, detail="No progress entries found for the specified month")
     
-    # Generate weekly summaries for each week
     weekly_summaries = []
-    for progress in progress_entries:
-        # Get previous week for comparison
-        previous_week_start = progress.week_start - timedelta(days=7)
-        previous_week = db.query(Progress).filter(
-            Progress.student_id == student_id,
-            Progress.week_start == previous_week_start
-        ).first()
-        
-        new_ayahs_count = count_ayahs(progress.new_memorization)
-        revision_pages_count = count_ayahs(progress.recent_revision) + count_ayahs(progress.old_revision)
-        
-        summary_text = generate_weekly_summary(progress, previous_week, student.name)
+    for progress, previous_week in progress_entries:
+        new_ayahs_count, revision_pages_count = get_progress_counts(progress)
         
         weekly_summary = WeeklySummary(
             student_name=student.name,
             week_start=progress.week_start,
             current_week=progress,
             previous_week=previous_week,
-            summary_text=summary_text,
+            summary_text="",
             new_ayahs_count=new_ayahs_count,
             revision_pages_count=revision_pages_count
         )
         weekly_summaries.append(weekly_summary)
     
+    return month_start, month_end, weekly_summaries
+
+def build_monthly_summary(weekly_summaries: List[WeeklySummary], month_start: date, month_end: date, summary_text: str, summary_source: str) -> MonthlySummary:
     # Calculate totals
     total_new_ayahs = sum(ws.new_ayahs_count for ws in weekly_summaries)
     total_revision_pages = sum(ws.revision_pages_count for ws in weekly_summaries)
     attendance_weeks = len(weekly_summaries)
     
-    # Generate monthly AI summary
-    summary_text = generate_monthly_summary(weekly_summaries, student.name, month_start, month_end)
-    
     return MonthlySummary(
-        student_name=student.name,
+        student_name=weekly_summaries[0].student_name,
         month_start=month_start,
         month_end=month_end,
         total_new_ayahs=total_new_ayahs,
         total_revision_pages=total_revision_pages,
         attendance_weeks=attendance_weeks,
         summary_text=summary_text,
+        summary_source=summary_source,
         weekly_breakdown=weekly_summaries
     )
+
+def load_monthly_summary(student_id: int, month_start: Optional[date], db: Session) -> MonthlySummary:
+    """Load a month's breakdown and totals; the summary texts are left empty"""
+    month_start, month_end, weekly_summaries = load_monthly_breakdown(student_id, month_start, db)
+    return build_monthly_summary(weekly_summaries, month_start, month_end, "", SUMMARY_SOURCE_AI)
+
+def load_class_summaries(students: List[Student], load: Callable, period: Optional[date], db: Session) -> Tuple[list, list]:
+    """Load the summary of each student with `load` (load_weekly_summary or load_monthly_summary).
+
+    Returns (student, summary) pairs, and (student, reason) pairs for the
+    students with nothing to report. The session is not thread-safe, so the
+    students are loaded one by one; the AI text can then be generated side by
+    side, as it only needs the loaded rows.
+    """
+    loaded, skipped = [], []
+    for student in students:
+        try:
+            loaded.append((student, load(student.id, period, db)))
+        except HTTPException as e:
+            skipped.append((student, e.detail))
+    return loaded, skipped
+
+def fill_weekly_summary(summary: WeeklySummary, wait: bool = False, cached_only: bool = False) -> WeeklySummary:
+    """Generate the AI summary of a loaded week; `wait` lifts the latency budget for work no one is waiting on,
+    and `cached_only` serves a cached summary or the fallback without calling the LLM"""
+    summary.summary_text, summary.summary_source = generate_weekly_summary(summary.current_week, summary.previous_week, summary.student_name, wait=wait, cached_only=cached_only)
+    return summary
+
+def fill_monthly_summary(summary: MonthlySummary, wait: bool = False, cached_only: bool = False) -> MonthlySummary:
+    """Generate the weekly and monthly AI summaries of a loaded month in one request"""
+    summary.summary_text, summary.summary_source = generate_monthly_summaries(summary.weekly_breakdown, summary.student_name, summary.month_start, summary.month_end, wait=wait, cached_only=cached_only)
+    return summary
+
+@router.get("/weekly/{student_id}", response_model=WeeklySummary)
+def get_weekly_summary(student_id: int, week_start: Optional[date] = None, db: Session = Depends(get_db)):
+    """Get weekly summary for a student"""
+    return fill_weekly_summary(load_weekly_summary(student_id, week_start, db))
+
+@router.get("/monthly/{student_id}", response_model=MonthlySummary)
+def get_monthly_summary(student_id: int, month_start: Optional[date] = None, db: Session = Depends(get_db)):
+    """Get monthly summary for a student"""
+    return fill_monthly_summary(load_monthly_summary(student_id, month_start, db))
+
+@router.get("/async/weekly/{student_id}", response_model=WeeklySummary)
+async def get_weekly_summary_async(student_id: int, week_start: Optional[date] = None, db: Session = Depends(get_db)):
+    """Get weekly summary for a student without holding a worker thread during the AI call"""
+    summary = await run_in_threadpool(load_weekly_summary, student_id, week_start, db)
+    summary.summary_text, summary.summary_source = await agenerate_weekly_summary(summary.current_week, summary.previous_week, summary.student_name)
+    return summary
+
+@router.get("/async/monthly/{student_id}", response_model=MonthlySummary)
+async def get_monthly_summary_async(student_id: int, month_start: Optional[date] = None, db: Session = Depends(get_db)):
+    """Get monthly summary for a student, generating the weekly summaries concurrently"""
+    month_start, month_end, weekly_summaries = await run_in_threadpool(load_monthly_breakdown, student_id, month_start, db)
+    student_name = weekly_summaries[0].student_name
+    
+    # Weekly summaries run side by side; the monthly summary only needs the counts
+    _, (summary_text, summary_source) = await asyncio.gather(
+        agenerate_weekly_summaries(weekly_summaries, student_name),
+        agenerate_monthly_summary(weekly_summaries, student_name, month_start, month_end)
+    )
+    return build_monthly_summary(weekly_summaries, month_start, month_end, summary_text, summary_source)
+
+@router.get("/cache/stats")
+def get_summary_cache_stats():
+    """Get hit/miss counters of the AI summary cache"""
+    return llm_cache.stats()
+
+@router.get("/llm/status")
+def get_summary_llm_status():
+    """Get circuit breaker, rate limiter and concurrency state of the AI summary provider"""
+    return get_llm_status()
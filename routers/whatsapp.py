@@ -1,20 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 import os
 from datetime import date
 
-from database import get_db, Student, Progress
-from routers.summaries import get_weekly_summary
+from database import get_db, Student, Progress, WhatsAppMessage
+from models import WhatsAppBroadcast, WhatsAppBroadcastResult, WhatsAppDelivery, WhatsAppOutboxMessage
+from progress_history import get_latest_week_start
+from routers.summaries import get_weekly_summary, load_weekly_summary, load_class_summaries, fill_weekly_summary
+from llm_service import LLM_AVAILABLE, LLM_MAX_CONCURRENCY, SUMMARY_SOURCE_FALLBACK
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from whatsapp_simple import get_whatsapp_share_link, create_weekly_report_message
-from whatsapp_integration import send_weekly_report_whatsapp
+from whatsapp_integration import weekly_report_payloads, WhatsAppSender
+from whatsapp_outbox import enqueue_whatsapp, requeue_whatsapp, send_outbox, FAILED
+from background_queue import RUN_IN_REQUEST
 
 router = APIRouter()
 
+def _report_data(summary) -> dict:
+    """The fields of a weekly summary shown in the WhatsApp message"""
+    return {
+        "new_memorization": summary.current_week.new_memorization,
+        "recent_revision": summary.current_week.recent_revision,
+        "old_revision": summary.current_week.old_revision,
+        "teacher_notes": summary.current_week.teacher_notes,
+        "summary_text": summary.summary_text
+    }
+
+def _send_in_request(background_tasks: BackgroundTasks):
+    # No worker thread outlives a serverless invocation, so the outbox is sent before it ends
+    if RUN_IN_REQUEST:
+        background_tasks.add_task(send_outbox)
+
+def _require_whatsapp_credentials():
+    if not os.getenv("WHATSAPP_ACCESS_TOKEN"):
+        raise HTTPException(
+            status_code=400, 
+            detail="WhatsApp Business API not configured. Please set WHATSAPP_ACCESS_TOKEN environment variable."
+        )
+
 @router.get("/weekly/{student_id}/whatsapp-link")
 def get_weekly_whatsapp_link(
     student_id: int, 
@@ -33,13 +61,7 @@ def get_weekly_whatsapp_link(
         summary = get_weekly_summary(student_id, week_start, db)
         
         # Create report data
-        report_data = {
-            "new_memorization": summary.current_week.new_memorization,
-            "recent_revision": summary.current_week.recent_revision,
-            "old_revision": summary.current_week.old_revision,
-            "teacher_notes": summary.current_week.teacher_notes,
-            "summary_text": summary.summary_text
-        }
+        report_data = _report_data(summary)
         
         # Generate WhatsApp link
         whatsapp_link = get_whatsapp_share_link(phone_number, student.name, report_data)
@@ -54,42 +76,119 @@ def get_weekly_whatsapp_link(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating WhatsApp link: {str(e)}")
 
-@router.post("/weekly/{student_id}/send-whatsapp")
+@router.post("/weekly/{student_id}/send-whatsapp", status_code=202)
 def send_weekly_whatsapp(
     student_id: int,
+    background_tasks: BackgroundTasks,
     phone_number: str = Query(..., description="Student's phone number with country code"),
     week_start: Optional[date] = None,
     report_url: Optional[str] = Query(None, description="URL to PDF report (optional)"),
+    idempotency_key: Optional[str] = Header(None, description="Requests with the same key send the report once"),
     db: Session = Depends(get_db)
 ):
-    """Send weekly report via WhatsApp (requires WhatsApp Business API setup)"""
+    """Queue weekly report for sending via WhatsApp (requires WhatsApp Business API setup)"""
     # Check if student exists
     student = db.query(Student).filter(Student.id == student_id).first()
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     
     # Check if WhatsApp credentials are configured
-    if not os.getenv("WHATSAPP_ACCESS_TOKEN"):
-        raise HTTPException(
-            status_code=400, 
-            detail="WhatsApp Business API not configured. Please set WHATSAPP_ACCESS_TOKEN environment variable."
-        )
+    _require_whatsapp_credentials()
     
-    try:
-        # Send via WhatsApp Business API
-        success = send_weekly_report_whatsapp(phone_number, student.name, report_url)
-        
-        if success:
-            return {
-                "message": "Weekly report sent successfully via WhatsApp",
-                "student_name": student.name,
-                "phone_number": phone_number
-            }
+    # Without a key from the client, a report goes to a number once per week
+    if not idempotency_key:
+        week = week_start or get_latest_week_start(db, student_id) or date.today()
+        idempotency_key = f"weekly:{student_id}:{week}:{phone_number}"
+    
+    message, queued = enqueue_whatsapp(db, idempotency_key, phone_number, weekly_report_payloads(phone_number, student.name, report_url), student_id)
+    _send_in_request(background_tasks)
+    return {
+        "message": "Weekly report queued for sending via WhatsApp" if queued else "Weekly report was already queued for sending via WhatsApp",
+        "student_name": student.name,
+        "phone_number": phone_number,
+        "outbox_id": message.id,
+        "status": message.status
+    }
+
+def _get_outbox_message(message_id: int, db: Session) -> WhatsAppMessage:
+    message = db.query(WhatsAppMessage).filter(WhatsAppMessage.id == message_id).first()
+    if not message:
+        raise HTTPException(status_code=404, detail="WhatsApp message not found")
+    return message
+
+@router.get("/outbox/{message_id}", response_model=WhatsAppOutboxMessage)
+def get_outbox_message(message_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Get the delivery status of a queued WhatsApp message"""
+    message = _get_outbox_message(message_id, db)
+    # Polling also drives the retries that are due
+    _send_in_request(background_tasks)
+    return message
+
+@router.post("/outbox/{message_id}/retry", response_model=WhatsAppOutboxMessage)
+def retry_outbox_message(message_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    """Queue a failed WhatsApp message again; parts already delivered are not resent"""
+    message = _get_outbox_message(message_id, db)
+    if message.status != FAILED:
+        raise HTTPException(status_code=409, detail=f"Only failed messages can be retried (status: {message.status})")
+    message = requeue_whatsapp(db, message)
+    _send_in_request(background_tasks)
+    return message
+
+@router.post("/broadcast/weekly", response_model=WhatsAppBroadcastResult)
+def broadcast_weekly_whatsapp(broadcast: WhatsAppBroadcast, db: Session = Depends(get_db)):
+    """Send every student of a class their weekly report via WhatsApp, with a result per student"""
+    _require_whatsapp_credentials()
+    
+    students = db.query(Student).filter(Student.class_day == broadcast.class_day).order_by(Student.name, Student.id).all()
+    if not students:
+        raise HTTPException(status_code=404, detail="No students found")
+    
+    deliveries, recipients = [], []
+    for student in students:
+        if broadcast.phone_numbers.get(student.id):
+            recipients.append(student)
         else:
-            raise HTTPException(status_code=500, detail="Failed to send WhatsApp message")
-            
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error sending WhatsApp message: {str(e)}")
+            deliveries.append(WhatsAppDelivery(student_id=student.id, student_name=student.name, status="skipped", error="No phone number given"))
+    
+    loaded, missing = load_class_summaries(recipients, load_weekly_summary, broadcast.week_start, db)
+    for student, reason in missing:
+        deliveries.append(WhatsAppDelivery(student_id=student.id, student_name=student.name, phone_number=broadcast.phone_numbers[student.id], status="skipped", error=reason))
+    
+    # A message cannot be taken back, so the summaries wait for the LLM rather than the latency budget
+    with ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY) as executor:
+        list(executor.map(lambda item: fill_weekly_summary(item[1], wait=True), loaded))
+    
+    summaries = []
+    for student, summary in loaded:
+        phone_number = broadcast.phone_numbers[student.id]
+        if LLM_AVAILABLE and summary.summary_source == SUMMARY_SOURCE_FALLBACK:
+            deliveries.append(WhatsAppDelivery(
+                student_id=student.id,
+                student_name=student.name,
+                phone_number=phone_number,
+                status="skipped",
+                error="The AI summary could not be generated; not sending the template summary"
+            ))
+        else:
+            summaries.append((student, phone_number, summary))
+    
+    # Sent side by side over one pooled connection set, paced under the Graph API limits
+    messages = [(phone_number, create_weekly_report_message(student.name, _report_data(summary))) for student, phone_number, summary in summaries]
+    results = WhatsAppSender().send_messages(messages)
+    for (student, phone_number, _), result in zip(summaries, results):
+        deliveries.append(WhatsAppDelivery(
+            student_id=student.id,
+            student_name=student.name,
+            phone_number=phone_number,
+            status="sent" if result.success else "failed",
+            attempts=result.attempts,
+            message_id=result.message_id,
+            error=result.error
+        ))
+    
+    deliveries.sort(key=lambda delivery: (delivery.student_name, delivery.student_id))
+    counts = {status: sum(delivery.status == status for delivery in deliveries) for status in ("sent", "failed", "skipped")}
+    return WhatsAppBroadcastResult(**counts, deliveries=deliveries)
 
 @router.get("/weekly/{student_id}/whatsapp-preview")
 def preview_weekly_whatsapp_message(
@@ -108,13 +207,7 @@ def preview_weekly_whatsapp_message(
         summary = get_weekly_summary(student_id, week_start, db)
         
         # Create report data
-        report_data = {
-            "new_memorization": summary.current_week.new_memorization,
-            "recent_revision": summary.current_week.recent_revision,
-            "old_revision": summary.current_week.old_revision,
-            "teacher_notes": summary.current_week.teacher_notes,
-            "summary_text": summary.summary_text
-        }
+        report_data = _report_data(summary)
         
         # Generate message preview
         message_preview = create_weekly_report_message(student.name, report_data)
@@ -0,0 +1,135 @@
+"""
+Term and year reports of a whole class, as one PDF.
+
+A class's term holds hundreds of progress entries, so the report is never
+built as a single story. The entries are read through a server-side cursor
+(TERM_REPORT_FETCH_ROWS at a time) in student order, each student becomes one
+section of flowables, and a section is only created once platypus has laid
+out the one before it. What stays in memory while the document is built is
+one student's rows and flowables plus the finished pages, so memory grows
+with the length of the PDF rather than with the rows and flowables behind it.
+
+The PDF is written to a file so the request does not keep a second copy of
+it. Term reports carry the recorded progress only; they do not request AI
+summaries, which for a whole class would be one per student per week.
+"""
+
+import os
+from datetime import date, datetime
+from itertools import groupby
+from typing import Iterable, Iterator, Optional
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Table, PageBreak
+from sqlalchemy.orm import Session
+
+from database import Progress, Student
+from progress_history import get_progress_counts
+from report_templates import ReportLayout, get_report_layout, TERM_COL_WIDTHS
+
+TERM_REPORT_FETCH_ROWS = int(os.getenv("TERM_REPORT_FETCH_ROWS", "500"))
+
+def iter_class_progress(db: Session, class_day: str, start: date, end: date) -> Iterator:
+    """Stream a class's progress rows for a term, grouped by student and ordered by week"""
+    return iter(db.query(
+        Student.id.label("student_id"),
+        Student.name.label("student_name"),
+        Progress.week_start,
+        Progress.new_memorization,
+        Progress.recent_revision,
+        Progress.old_revision,
+        Progress.teacher_notes,
+        Progress.new_ayahs_count,
+        Progress.revision_pages_count
+    ).join(Progress, Progress.student_id == Student.id).filter(
+        Student.class_day == class_day,
+        Progress.week_start >= start,
+        Progress.week_start <= end
+    ).order_by(Student.name, Student.id, Progress.week_start).yield_per(TERM_REPORT_FETCH_ROWS))
+
+def _cell(text: Optional[str], layout: ReportLayout) -> Paragraph:
+    """A wrapping table cell for free text entered by teachers"""
+    return Paragraph(escape(text or "").replace("\n", "<br/>"), layout.cell)
+
+def _title_section(class_day: str, start: date, end: date, layout: ReportLayout) -> list:
+    return [
+        layout.fragment("term_title"),
+        layout.spacer(12),
+        Paragraph(f"<b>Class:</b> {escape(class_day)}", layout.info),
+        Paragraph(f"<b>Term:</b> {start.strftime('%B %d, %Y')} - {end.strftime('%B %d, %Y')}", layout.info),
+        layout.spacer(20),
+        Paragraph(f"Generated on {datetime.now().strftime('%B %d, %Y at %I:%M %p')}", layout.footer)
+    ]
+
+def _student_section(student_name: str, rows: Iterable, layout: ReportLayout) -> list:
+    """One student's weeks of the term, with their totals"""
+    week_data = [['Week', 'New Memorization', 'Revision', 'Teacher Notes', 'Ayahs', 'Pages']]
+    total_new_ayahs = total_revision_pages = 0
+    for row in rows:
+        new_ayahs_count, revision_pages_count = get_progress_counts(row)
+        total_new_ayahs += new_ayahs_count
+        total_revision_pages += revision_pages_count
+        revision = "\n".join(text for text in (row.recent_revision, row.old_revision) if text)
+        week_data.append([
+            row.week_start.strftime('%b %d, %Y'),
+            _cell(row.new_memorization, layout),
+            _cell(revision, layout),
+            _cell(row.teacher_notes, layout),
+            str(new_ayahs_count),
+            str(revision_pages_count)
+        ])
+
+    attendance_weeks = len(week_data) - 1
+    return [
+        PageBreak(),
+        Paragraph(escape(student_name), layout.student_heading),
+        Paragraph(
+            f"<b>Weeks of Attendance:</b> {attendance_weeks} &nbsp; "
+            f"<b>New Ayahs Memorized:</b> {total_new_ayahs} &nbsp; "
+            f"<b>Revision Pages Covered:</b> {total_revision_pages}",
+            layout.info
+        ),
+        layout.spacer(8),
+        # Long terms run over several pages; the header row is repeated on each
+        Table(week_data, colWidths=TERM_COL_WIDTHS, style=layout.term_table, repeatRows=1)
+    ]
+
+def term_report_sections(rows: Iterable, class_day: str, start: date, end: date, layout: Optional[ReportLayout] = None) -> Iterator[list]:
+    """The sections of a term report, one per student, created as they are consumed"""
+    layout = layout or get_report_layout()
+    yield _title_section(class_day, start, end, layout)
+    for (_, student_name), student_rows in groupby(rows, key=lambda row: (row.student_id, row.student_name)):
+        yield _student_section(student_name, student_rows, layout)
+
+class _SectionStory(list):
+    """Story for doc.build that takes the next section only when the build has used up the last one.
+
+    The build loop reads the story through len() and indexing, so the
+    sections are pulled from here while the layout already done is dropped.
+    """
+
+    def __init__(self, sections: Iterable[list]):
+        super().__init__()
+        self._sections = iter(sections)
+
+    def _fill(self):
+        while self._sections is not None and not list.__len__(self):
+            section = next(self._sections, None)
+            if section is None:
+                self._sections = None
+            else:
+                self.extend(section)
+
+    def __len__(self) -> int:
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+def write_term_pdf(sections: Iterable[list], output) -> None:
+    """Lay out the sections of a term report into a file name or binary file"""
+    doc = SimpleDocTemplate(output, pagesize=A4)
+    doc.build(_SectionStory(sections))
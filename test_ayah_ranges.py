@@ -0,0 +1,64 @@
+"""Tests for the ayah range parser behind the stored progress counts"""
+
+import pytest
+
+from ayah_ranges import AyahRange, parse_ayah_ranges, merge_ayah_ranges, count_ayah_ranges, count_pages
+
+# Written by the frontend's formatSurahAyah (frontend/src/data/surahs.js)
+def test_single_surah_range():
+    assert parse_ayah_ranges("Al-Baqarah Ayah 1-10") == [AyahRange(2, 1, 10)]
+
+def test_cross_surah_range():
+    ranges = parse_ayah_ranges("Al-Baqarah Ayah 280 - Al-Imran Ayah 10")
+    assert ranges == [AyahRange(2, 280, 286), AyahRange(3, 1, 10)]
+    assert count_ayah_ranges(ranges) == 17
+
+def test_cross_surah_range_covers_the_surahs_between():
+    ranges = parse_ayah_ranges("Al-Fatihah Ayah 5 - Al-Imran Ayah 2")
+    assert ranges == [AyahRange(1, 5, 7), AyahRange(2, 1, 286), AyahRange(3, 1, 2)]
+
+@pytest.mark.parametrize("text, expected", [
+    ("Surah Al-Ikhlas", [AyahRange(112, 1, 4)]),
+    ("Al-Ikhlas", [AyahRange(112, 1, 4)]),
+    ("An-Nas", [AyahRange(114, 1, 6)]),
+])
+def test_whole_surah(text, expected):
+    assert parse_ayah_ranges(text) == expected
+
+def test_overlapping_ranges_are_counted_once():
+    ranges = parse_ayah_ranges("Al-Mulk Ayah 1-10, Ayah 5-15")
+    assert ranges == [AyahRange(67, 1, 10), AyahRange(67, 5, 15)]
+    assert merge_ayah_ranges(ranges) == [AyahRange(67, 1, 15)]
+    assert count_ayah_ranges(ranges) == 15
+
+def test_adjacent_ranges_merge_but_other_surahs_do_not():
+    ranges = [AyahRange(67, 1, 5), AyahRange(67, 6, 10), AyahRange(2, 1, 5)]
+    assert merge_ayah_ranges(ranges) == [AyahRange(2, 1, 5), AyahRange(67, 1, 10)]
+
+def test_reversed_range():
+    assert parse_ayah_ranges("Al-Mulk Ayah 10-1") == [AyahRange(67, 1, 10)]
+
+def test_range_is_clamped_to_the_surah():
+    assert parse_ayah_ranges("Al-Fatihah Ayah 1-50") == [AyahRange(1, 1, 7)]
+    assert parse_ayah_ranges("Al-Fatihah Ayah 10-20") == []
+
+def test_unknown_surah_counts_ayahs_but_no_pages():
+    ranges = parse_ayah_ranges("Not A Surah Ayah 1-5")
+    assert ranges == [AyahRange(None, 1, 5)]
+    assert count_ayah_ranges(ranges) == 5
+    assert count_pages(ranges) == 0
+
+def test_unknown_surah_name_alone_is_ignored():
+    assert parse_ayah_ranges("Not A Surah") == []
+
+@pytest.mark.parametrize("text", ["", None, "12", "revision (focus on tajweed)"])
+def test_no_references(text):
+    assert parse_ayah_ranges(text) == []
+
+def test_surah_carries_over_to_later_clauses():
+    assert parse_ayah_ranges("Al-Mulk Ayah 1-5, Ayah 10") == [AyahRange(67, 1, 5), AyahRange(67, 10, 10)]
+
+def test_pages_are_counted_once_across_ranges():
+    single = count_pages([AyahRange(2, 1, 20)])
+    assert single == 3
+    assert count_pages([AyahRange(2, 1, 10), AyahRange(2, 5, 20)]) == single
@@ -1,108 +1,213 @@
 import requests
 import os
-from typing import Optional
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional, Tuple
+from datetime import datetime
 import json
 
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.retry import Retry
+
+from message_templates import render_message
+
+# Seconds to wait for the Graph API to accept a connection, and to answer
+WHATSAPP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("WHATSAPP_CONNECT_TIMEOUT_SECONDS", "5"))
+WHATSAPP_READ_TIMEOUT_SECONDS = float(os.getenv("WHATSAPP_READ_TIMEOUT_SECONDS", "15"))
+# Messages in flight at once during a broadcast, and messages sent per second overall
+WHATSAPP_MAX_CONCURRENCY = int(os.getenv("WHATSAPP_MAX_CONCURRENCY", "8"))
+WHATSAPP_MESSAGES_PER_SECOND = float(os.getenv("WHATSAPP_MESSAGES_PER_SECOND", "20"))
+WHATSAPP_MAX_ATTEMPTS = int(os.getenv("WHATSAPP_MAX_ATTEMPTS", "4"))
+RETRY_BACKOFF_SECONDS = 1.0
+MAX_RETRY_DELAY_SECONDS = 60.0
+
+# Graph API error codes of the app, account and throughput rate limits, which can also come with a 400
+RATE_LIMIT_ERROR_CODES = {4, 80007, 130429}
+# Too many messages to one recipient: only that recipient waits
+PAIR_RATE_LIMIT_ERROR_CODE = 131056
+
+class SendResult(NamedTuple):
+    success: bool
+    attempts: int
+    status_code: Optional[int] = None
+    message_id: Optional[str] = None
+    error: Optional[str] = None
+    retryable: bool = False  # Failed in a way that can safely be sent again
+    retry_after: Optional[float] = None  # Seconds the API asked to wait, or the backoff
+
+class _Throttle:
+    """Spaces requests out to a steady rate, and holds every sender back after a rate limit response"""
+
+    def __init__(self, per_second: float):
+        self.interval = 1 / per_second if per_second > 0 else 0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot, self._paused_until)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+_throttle = _Throttle(WHATSAPP_MESSAGES_PER_SECOND)
+
+def get_session() -> requests.Session:
+    """The process-wide HTTP session, keeping connections to the Graph API open between messages"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Only failed connections are retried here: the request was never sent
+            retries = Retry(connect=WHATSAPP_MAX_ATTEMPTS - 1, read=0, status=0, other=0, redirect=0, backoff_factor=RETRY_BACKOFF_SECONDS)
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=WHATSAPP_MAX_CONCURRENCY, max_retries=retries))
+        return _session
+
+def _graph_error(response: requests.Response) -> Tuple[Optional[int], str]:
+    """The Graph API error code and message of a failed response"""
+    try:
+        error = response.json().get("error", {})
+        return error.get("code"), error.get("message") or response.reason
+    except ValueError:
+        return None, response.reason
+
+def _never_sent(error: requests.exceptions.RequestException) -> bool:
+    """Whether the request failed before a connection was made, so the message cannot have gone out"""
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    # Also covers connections refused and names that did not resolve
+    return isinstance(error, requests.exceptions.ConnectTimeout) or isinstance(reason, ConnectTimeoutError)
+
+def text_payload(to_phone: str, message: str) -> dict:
+    return {
+        "messaging_product": "whatsapp",
+        "to": to_phone,
+        "type": "text",
+        "text": {"body": message}
+    }
+
+def document_payload(to_phone: str, document_url: str, filename: str, caption: str = "") -> dict:
+    return {
+        "messaging_product": "whatsapp",
+        "to": to_phone,
+        "type": "document",
+        "document": {
+            "link": document_url,
+            "filename": filename,
+            "caption": caption
+        }
+    }
+
+def _retry_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """Retry-After when the API sent one, otherwise exponential backoff with jitter"""
+    if retry_after:
+        try:
+            return min(float(retry_after), MAX_RETRY_DELAY_SECONDS)
+        except ValueError:
+            pass
+    delay = min(RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1), MAX_RETRY_DELAY_SECONDS)
+    return delay / 2 + random.uniform(0, delay / 2)
+
 class WhatsAppSender:
     def __init__(self):
         # WhatsApp Business API credentials
         self.access_token = os.getenv("WHATSAPP_ACCESS_TOKEN")
         self.phone_number_id = os.getenv("WHATSAPP_PHONE_NUMBER_ID")
         self.base_url = f"https://graph.facebook.com/v18.0/{self.phone_number_id}/messages"
-        
-    def send_message(self, to_phone: str, message: str) -> bool:
-        """Send a text message via WhatsApp Business API"""
+    
+    def post(self, data: dict, max_attempts: int = WHATSAPP_MAX_ATTEMPTS) -> SendResult:
+        """Send one message payload, retrying rate limits and server errors up to `max_attempts` times"""
         if not self.access_token or not self.phone_number_id:
-            print("WhatsApp credentials not configured")
-            return False
-            
+            return SendResult(False, 0, error="WhatsApp credentials not configured")
+        
         headers = {
             "Authorization": f"Bearer {self.access_token}",
             "Content-Type": "application/json"
         }
         
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to_phone,
-            "type": "text",
-            "text": {"body": message}
-        }
-        
-        try:
-            response = requests.post(self.base_url, headers=headers, json=data)
-            response.raise_for_status()
+        attempt = 0
+        while True:
+            attempt += 1
+            _throttle.wait()
+            try:
+                response = get_session().post(
+                    self.base_url, headers=headers, json=data,
+                    timeout=(WHATSAPP_CONNECT_TIMEOUT_SECONDS, WHATSAPP_READ_TIMEOUT_SECONDS)
+                )
+            except requests.exceptions.RequestException as e:
+                # A timeout or dropped connection may come after the message went out; it is not sent twice
+                return SendResult(False, attempt, error=str(e), retryable=_never_sent(e))
+            
+            if response.ok:
+                try:
+                    message_id = response.json()["messages"][0]["id"]
+                except (ValueError, KeyError, IndexError):
+                    message_id = None
+                return SendResult(True, attempt, response.status_code, message_id)
+            
+            code, message = _graph_error(response)
+            error = f"{response.status_code} {message}"
+            rate_limited = response.status_code == 429 or code in RATE_LIMIT_ERROR_CODES
+            retryable = rate_limited or code == PAIR_RATE_LIMIT_ERROR_CODE or response.status_code >= 500
+            delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+            if rate_limited:
+                # The limit covers the whole business number, so every sender waits
+                _throttle.pause(delay)
+            if not retryable or attempt >= max_attempts:
+                return SendResult(False, attempt, response.status_code, error=error, retryable=retryable, retry_after=delay if retryable else None)
+            time.sleep(delay)
+    
+    def send_message(self, to_phone: str, message: str) -> bool:
+        """Send a text message via WhatsApp Business API"""
+        result = self.post(text_payload(to_phone, message))
+        if result.success:
             print(f"WhatsApp message sent successfully to {to_phone}")
-            return True
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to send WhatsApp message: {e}")
-            return False
+        else:
+            print(f"Failed to send WhatsApp message: {result.error}")
+        return result.success
+    
+    def send_messages(self, messages: List[Tuple[str, str]]) -> List[SendResult]:
+        """Send text messages to several recipients, WHATSAPP_MAX_CONCURRENCY at a time; results are in order"""
+        with ThreadPoolExecutor(max_workers=WHATSAPP_MAX_CONCURRENCY) as executor:
+            return list(executor.map(lambda item: self.post(text_payload(*item)), messages))
     
     def send_document(self, to_phone: str, document_url: str, filename: str, caption: str = "") -> bool:
         """Send a document (PDF report) via WhatsApp Business API"""
-        if not self.access_token or not self.phone_number_id:
-            print("WhatsApp credentials not configured")
-            return False
-            
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to_phone,
-            "type": "document",
-            "document": {
-                "link": document_url,
-                "filename": filename,
-                "caption": caption
-            }
-        }
-        
-        try:
-            response = requests.post(self.base_url, headers=headers, json=data)
-            response.raise_for_status()
+        result = self.post(document_payload(to_phone, document_url, filename, caption))
+        if result.success:
             print(f"WhatsApp document sent successfully to {to_phone}")
-            return True
-        except requests.exceptions.RequestException as e:
-            print(f"Failed to send WhatsApp document: {e}")
-            return False
+        else:
+            print(f"Failed to send WhatsApp document: {result.error}")
+        return result.success
+
+def weekly_report_payloads(student_phone: str, student_name: str, report_url: Optional[str]) -> List[dict]:
+    """The messages of a weekly report: the text, then the PDF when there is a link to it"""
+    message = render_message("whatsapp_report_ready", student_name=student_name, generated_at=datetime.now().astimezone())
+    payloads = [text_payload(student_phone, message)]
+    if report_url:
+        payloads.append(document_payload(student_phone, report_url, f"Weekly_Report_{student_name}.pdf", "Weekly Progress Report PDF"))
+    return payloads
 
 def send_weekly_report_whatsapp(student_phone: str, student_name: str, report_url: str):
     """Send weekly report via WhatsApp"""
     sender = WhatsAppSender()
     
-    # Create the message
-    message = f"""
-📚 *Weekly Quran Progress Report*
-
-Assalamu Alaikum {student_name},
-
-Your weekly progress report is ready! 
-
-📊 *Report Summary:*
-• Student: {student_name}
-• Report Type: Weekly Progress
-• Generated: {os.popen('date').read().strip()}
-
-📄 The detailed PDF report is attached below.
-
-May Allah bless your efforts in memorizing the Quran. Ameen.
-
----
-*Generated by Quran Progress Tracker*
-    """
-    
     # Send the message
-    success = sender.send_message(student_phone, message)
+    text, *document = weekly_report_payloads(student_phone, student_name, report_url)
+    success = sender.post(text).success
     
-    if success and report_url:
+    if success and document:
         # Send the PDF document
-        sender.send_document(
-            to_phone=student_phone,
-            document_url=report_url,
-            filename=f"Weekly_Report_{student_name}.pdf",
-            caption="Weekly Progress Report PDF"
-        )
+        sender.post(document[0])
     
     return success
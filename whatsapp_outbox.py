@@ -0,0 +1,148 @@
+"""
+Durable outbox for WhatsApp messages.
+
+A message to send is written to the whatsapp_outbox table and the request
+returns straight away; a background worker sends the outbox in batches of
+WHATSAPP_OUTBOX_BATCH_SIZE, WHATSAPP_MAX_CONCURRENCY at a time, through the
+pooled WhatsAppSender. A Graph API outage or rate limit leaves the message
+queued for a later attempt with backoff (up to WHATSAPP_OUTBOX_MAX_ATTEMPTS),
+so nothing is lost when the Sunday send hits a bad minute.
+
+Every message has an idempotency key, unique in the table, so a repeated
+request (a double click, a client retry) finds the message already queued
+instead of sending it twice. A message can have several parts (the report
+text, then the PDF); parts are sent in order and a part that went out is
+never sent again. A part whose outcome is unknown (the request timed out, or
+the worker stopped while its lease was held) is failed rather than resent,
+and can be re-queued by hand. Finished messages, and with them their keys,
+are purged after WHATSAPP_OUTBOX_TTL_DAYS. The table is drained as a
+background_queue.DatabaseQueue.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from background_queue import DatabaseQueue
+from database import WhatsAppMessage
+from whatsapp_integration import WhatsAppSender, SendResult, WHATSAPP_MAX_CONCURRENCY
+
+QUEUED = "queued"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+
+WHATSAPP_OUTBOX_BATCH_SIZE = int(os.getenv("WHATSAPP_OUTBOX_BATCH_SIZE", "20"))
+WHATSAPP_OUTBOX_MAX_ATTEMPTS = int(os.getenv("WHATSAPP_OUTBOX_MAX_ATTEMPTS", "8"))
+WHATSAPP_OUTBOX_LEASE_SECONDS = int(os.getenv("WHATSAPP_OUTBOX_LEASE_SECONDS", "300"))
+WHATSAPP_OUTBOX_TTL_DAYS = int(os.getenv("WHATSAPP_OUTBOX_TTL_DAYS", "30"))
+# How often the idle worker looks for retries that are due and messages queued by other processes
+WHATSAPP_OUTBOX_POLL_SECONDS = float(os.getenv("WHATSAPP_OUTBOX_POLL_SECONDS", "5"))
+RETRY_BACKOFF_SECONDS = 30
+MAX_RETRY_DELAY_SECONDS = 60 * 60
+
+def enqueue_whatsapp(db: Session, idempotency_key: str, to_phone: str, payloads: List[dict], student_id: Optional[int] = None) -> Tuple[WhatsAppMessage, bool]:
+    """Queue a message and wake the worker; returns the message and whether it was newly queued"""
+    existing = db.query(WhatsAppMessage).filter(WhatsAppMessage.idempotency_key == idempotency_key).first()
+    if existing:
+        return existing, False
+
+    now = time.time()
+    message = WhatsAppMessage(
+        idempotency_key=idempotency_key,
+        student_id=student_id,
+        to_phone=to_phone,
+        payloads=json.dumps(payloads),
+        parts_sent=0,
+        message_ids="[]",
+        status=QUEUED,
+        attempts=0,
+        created_at=now,
+        run_after=now
+    )
+    db.add(message)
+    try:
+        db.commit()
+    except IntegrityError:
+        # The same key was queued by a concurrent request
+        db.rollback()
+        return db.query(WhatsAppMessage).filter(WhatsAppMessage.idempotency_key == idempotency_key).one(), False
+
+    _queue.notify()
+    return message, True
+
+def requeue_whatsapp(db: Session, message: WhatsAppMessage) -> WhatsAppMessage:
+    """Queue a failed message again with fresh attempts; the parts already sent are skipped"""
+    message.status, message.attempts, message.run_after, message.finished_at = QUEUED, 0, time.time(), None
+    db.commit()
+    _queue.notify()
+    return message
+
+def start_outbox_worker():
+    """Start the worker thread if it is not running yet; queued messages resume from the table"""
+    _queue.start()
+
+def send_outbox():
+    """Send the due messages in this thread, where there is no worker thread (RUN_IN_REQUEST)"""
+    _queue.run_pending()
+
+def _send_parts(sender: WhatsAppSender, payloads: List[dict]) -> Tuple[List[Optional[str]], Optional[SendResult]]:
+    """Send the parts in order, stopping at the first failure; returns the sent parts' ids and the failure"""
+    message_ids = []
+    for payload in payloads:
+        # One attempt per claim: retries are scheduled through the table
+        result = sender.post(payload, max_attempts=1)
+        if not result.success:
+            return message_ids, result
+        message_ids.append(result.message_id)
+    return message_ids, None
+
+def _record(message: WhatsAppMessage, message_ids: List[Optional[str]], failure: Optional[SendResult]):
+    now = time.time()
+    message.parts_sent += len(message_ids)
+    message.message_ids = json.dumps(json.loads(message.message_ids) + message_ids)
+    if failure is None:
+        message.status, message.error, message.finished_at = SENT, None, now
+    elif failure.retryable:
+        _queue.retry_later(message, failure.error, failure.retry_after or 0)
+    else:
+        message.status, message.error, message.finished_at = FAILED, failure.error, now
+
+def _process(db: Session) -> bool:
+    """Send the next batch of due messages, if any"""
+    batch = _queue.claim(db, WHATSAPP_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return False
+    sender = WhatsAppSender()
+    # The session stays on this thread; the senders only get the payloads
+    pending = [json.loads(message.payloads)[message.parts_sent:] for message in batch]
+    with ThreadPoolExecutor(max_workers=WHATSAPP_MAX_CONCURRENCY) as executor:
+        for message, (message_ids, failure) in zip(batch, executor.map(lambda payloads: _send_parts(sender, payloads), pending)):
+            _record(message, message_ids, failure)
+    db.commit()
+    return True
+
+_queue = DatabaseQueue(
+    "whatsapp-outbox",
+    WhatsAppMessage,
+    _process,
+    workers=1,
+    lease_seconds=WHATSAPP_OUTBOX_LEASE_SECONDS,
+    max_attempts=WHATSAPP_OUTBOX_MAX_ATTEMPTS,
+    ttl_seconds=WHATSAPP_OUTBOX_TTL_DAYS * 24 * 60 * 60,
+    poll_seconds=WHATSAPP_OUTBOX_POLL_SECONDS,
+    retry_backoff_seconds=RETRY_BACKOFF_SECONDS,
+    max_retry_delay_seconds=MAX_RETRY_DELAY_SECONDS,
+    # A part may have gone out before the worker stopped, so the message is not sent again
+    retry_expired_leases=False,
+    expired_error="Sending was interrupted; the message may have been delivered, so it was not sent again",
+    queued=QUEUED,
+    running=SENDING,
+    done=SENT,
+    failed=FAILED
+)
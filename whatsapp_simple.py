@@ -1,5 +1,6 @@
 import urllib.parse
 from typing import Dict, Any
+from message_templates import render_message
 
 def generate_whatsapp_link(phone_number: str, message: str) -> str:
     """
@@ -21,29 +22,7 @@ def generate_whatsapp_link(phone_number: str, message: str) -> str:
 
 def create_weekly_report_message(student_name: str, report_data: Dict[str, Any]) -> str:
     """Create a formatted message for weekly report"""
-    message = f"""
-📚 *Weekly Quran Progress Report*
-
-Assalamu Alaikum {student_name},
-
-Here's your weekly progress summary:
-
-📊 *This Week's Progress:*
-• New Memorization: {report_data.get('new_memorization', 'N/A')}
-• Recent Revision: {report_data.get('recent_revision', 'N/A')}
-• Old Revision: {report_data.get('old_revision', 'N/A')}
-• Teacher Notes: {report_data.get('teacher_notes', 'N/A')}
-
-📈 *Summary:*
-{report_data.get('summary_text', 'No summary available')}
-
-Keep up the excellent work! May Allah bless your efforts in memorizing the Quran. Ameen.
-
----
-*Generated by Quran Progress Tracker*
-    """
-    
-    return message.strip()
+    return render_message("whatsapp_weekly_report", student_name=student_name, report_data=report_data)
 
 def get_whatsapp_share_link(student_phone: str, student_name: str, report_data: Dict[str, Any]) -> str:
     """Get WhatsApp share link for weekly report"""